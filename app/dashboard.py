@@ -10,7 +10,7 @@ import pandas as pd
 import plotly.express as px
 
 from src.database.connection import DatabaseConnection
-from src.database.repository import AuctionRepository
+from src.database.repository import AuctionRepository, RollupRepository, month_start
 
 st.set_page_config(
     page_title="Energy Auction Results Dashboard",
@@ -65,96 +65,156 @@ if AUTH_PASSWORD:
 st.title("French Energy Auction Results")
 st.markdown("Interactive visualization of auction data by region and technology")
 
+# Map technology names to English
+TECH_MAP = {
+    'Eolien onshore': 'Onshore Wind',
+    'Hydraulique': 'Hydroelectric',
+    'Solaire': 'Solar',
+    'Thermique': 'Thermal'
+}
+
+
+DETAIL_PAGE_SIZE = 500
+
 
 @st.cache_data(ttl=300)
-def load_data():
-    db = DatabaseConnection()
-    session = db.connect()
-    repo = AuctionRepository(session)
-
-    auctions = repo.get_all_auctions()
-    db.close()
-
-    df = pd.DataFrame([
-        {
-            'auction_date': a.auction_date,
-            'region': a.region,
-            'technology': a.technology,
-            'volume_offered_mwh': float(a.volume_offered_mwh) if a.volume_offered_mwh else 0,
-            'volume_allocated_mwh': float(a.volume_allocated_mwh) if a.volume_allocated_mwh else 0,
-            'weighted_avg_price_eur': float(a.weighted_avg_price_eur) if a.weighted_avg_price_eur else 0,
-        }
-        for a in auctions
-    ])
-
-    # Map technology names to English
-    tech_map = {
-        'Eolien onshore': 'Onshore Wind',
-        'Hydraulique': 'Hydroelectric',
-        'Solaire': 'Solar',
-        'Thermique': 'Thermal'
-    }
-    df['technology_en'] = df['technology'].map(tech_map).fillna(df['technology'])
+def load_auctions(start, end, regions, technologies, columns):
+    with DatabaseConnection().session_scope() as session:
+        df = AuctionRepository(session).fetch_frame(
+            start=start, end=end, regions=regions, technologies=technologies, columns=columns
+        )
+
+    df[list(columns)] = df[list(columns)].fillna(0)
+    df['technology_en'] = df['technology'].map(lambda technology: TECH_MAP.get(technology, technology))
 
     return df
 
 
-df = load_data()
+@st.cache_data(ttl=300)
+def load_page(start, end, regions, technologies, after):
+    with DatabaseConnection().session_scope() as session:
+        page = AuctionRepository(session).query_auctions(
+            start=start, end=end, regions=regions, technologies=technologies,
+            columns=AuctionRepository.VALUE_COLUMNS, after=after, limit=DETAIL_PAGE_SIZE, descending=True
+        )
+
+    df = pd.DataFrame(page.rows, columns=AuctionRepository.KEY_COLUMNS + AuctionRepository.VALUE_COLUMNS)
+    for column in AuctionRepository.VALUE_COLUMNS:
+        df[column] = df[column].astype(float).fillna(0)
+    df['technology_en'] = df['technology'].map(TECH_MAP).fillna(df['technology'])
+
+    return df, page.next_key
+
+
+# Charts and metrics read the monthly rollups, raw rows are only queried for the
+# scatter plot and the detail table
+@st.cache_data(ttl=300)
+def load_rollups():
+    with DatabaseConnection().session_scope() as session:
+        rollups = RollupRepository(session).get_rollups()
+
+        rollup_df = pd.DataFrame([
+            {
+                'month': r.month,
+                'region': r.region,
+                'technology': r.technology,
+                'record_count': r.record_count,
+                'volume_offered_mwh': float(r.volume_offered_mwh) if r.volume_offered_mwh else 0,
+                'volume_allocated_mwh': float(r.volume_allocated_mwh) if r.volume_allocated_mwh else 0,
+                'price_sum': float(r.price_sum) if r.price_sum else 0,
+            }
+            for r in rollups
+        ])
+
+    if not rollup_df.empty:
+        rollup_df['technology_en'] = rollup_df['technology'].map(TECH_MAP).fillna(rollup_df['technology'])
+
+    return rollup_df
 
-if df.empty:
+
+@st.cache_data(ttl=300)
+def load_date_range():
+    with DatabaseConnection().session_scope() as session:
+        return AuctionRepository(session).get_date_range()
+
+
+def mean_price(frame: pd.DataFrame) -> float:
+    # Unpriced auctions count as zero, as in the detail table
+    records = frame['record_count'].sum()
+    return frame['price_sum'].sum() / records if records else 0.0
+
+
+rollup_df = load_rollups()
+
+if rollup_df.empty:
     st.warning("No auction data found in the database.")
     st.stop()
 
 # Sidebar filters
 st.sidebar.header("Filters")
 
-# Date filter
-if 'auction_date' in df.columns and df['auction_date'].notna().any():
-    date_range = st.sidebar.date_input(
-        "Date Range",
-        value=(df['auction_date'].min(), df['auction_date'].max()),
-        min_value=df['auction_date'].min(),
-        max_value=df['auction_date'].max()
-    )
+# Date filter, bounded by the auction dates themselves since rollup months
+# start on the 1st and would cut off the rest of the last month
+first_date, last_date = load_date_range()
+date_range = st.sidebar.date_input(
+    "Date Range",
+    value=(first_date, last_date),
+    min_value=first_date,
+    max_value=last_date
+)
 
 selected_regions = st.sidebar.multiselect(
     "Select Regions",
-    options=sorted(df['region'].unique()),
-    default=sorted(df['region'].unique())
+    options=sorted(rollup_df['region'].unique()),
+    default=sorted(rollup_df['region'].unique())
 )
 
 selected_tech = st.sidebar.multiselect(
     "Select Technologies",
-    options=df['technology_en'].unique(),
-    default=df['technology_en'].unique()
+    options=rollup_df['technology_en'].unique(),
+    default=rollup_df['technology_en'].unique()
 )
 
-# Filter data
-filtered_df = df[
-    (df['region'].isin(selected_regions)) &
-    (df['technology_en'].isin(selected_tech))
-]
 
-if 'date_range' in dir() and len(date_range) == 2:
-    filtered_df = filtered_df[
-        (filtered_df['auction_date'] >= date_range[0]) &
-        (filtered_df['auction_date'] <= date_range[1])
+def filter_rollups(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame[
+        (frame['region'].isin(selected_regions)) &
+        (frame['technology_en'].isin(selected_tech))
     ]
+    if len(date_range) == 2:
+        # A month is kept if any of its days is in range, as RollupRepository filters it
+        frame = frame[
+            (frame['month'] >= month_start(date_range[0])) &
+            (frame['month'] <= date_range[1])
+        ]
+    return frame
+
+
+filtered_rollups = filter_rollups(rollup_df)
+
+filters = {
+    'start': date_range[0] if len(date_range) == 2 else None,
+    'end': date_range[1] if len(date_range) == 2 else None,
+    'regions': tuple(sorted(selected_regions)),
+    'technologies': tuple(sorted(
+        rollup_df.loc[rollup_df['technology_en'].isin(selected_tech), 'technology'].unique()
+    )),
+}
 
 # Key metrics
 st.subheader("Key Metrics")
 col1, col2, col3, col4 = st.columns(4)
 with col1:
-    total_allocated = filtered_df['volume_allocated_mwh'].sum()
+    total_allocated = filtered_rollups['volume_allocated_mwh'].sum()
     st.metric("Total Volume Allocated (MWh)", f"{total_allocated:,.0f}")
 with col2:
-    total_offered = filtered_df['volume_offered_mwh'].sum()
+    total_offered = filtered_rollups['volume_offered_mwh'].sum()
     st.metric("Total Volume Offered (MWh)", f"{total_offered:,.0f}")
 with col3:
-    avg_price = filtered_df['weighted_avg_price_eur'].mean()
+    avg_price = mean_price(filtered_rollups)
     st.metric("Avg Price (EUR/MWh)", f"{avg_price:.2f}")
 with col4:
-    num_auctions = len(filtered_df)
+    num_auctions = filtered_rollups['record_count'].sum()
     st.metric("Number of Records", f"{num_auctions:,}")
 
 st.markdown("---")
@@ -164,7 +224,7 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Volume Allocated by Region")
-    region_data = filtered_df.groupby('region')['volume_allocated_mwh'].sum().reset_index()
+    region_data = filtered_rollups.groupby('region')['volume_allocated_mwh'].sum().reset_index()
     region_data = region_data.sort_values('volume_allocated_mwh', ascending=True)
     fig1 = px.bar(
         region_data,
@@ -180,7 +240,7 @@ with col1:
 
 with col2:
     st.subheader("Volume Distribution by Technology")
-    tech_data = filtered_df.groupby('technology_en')['volume_allocated_mwh'].sum().reset_index()
+    tech_data = filtered_rollups.groupby('technology_en')['volume_allocated_mwh'].sum().reset_index()
     fig2 = px.pie(
         tech_data,
         values='volume_allocated_mwh',
@@ -202,7 +262,8 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Average Price by Technology")
-    price_data = filtered_df.groupby('technology_en')['weighted_avg_price_eur'].mean().reset_index()
+    price_data = filtered_rollups.groupby('technology_en')[['price_sum', 'record_count']].sum().reset_index()
+    price_data['weighted_avg_price_eur'] = price_data['price_sum'] / price_data['record_count']
     price_data = price_data.sort_values('weighted_avg_price_eur', ascending=False)
     fig3 = px.bar(
         price_data,
@@ -223,7 +284,7 @@ with col1:
 with col2:
     st.subheader("Volume by Technology (Sunburst)")
     fig4 = px.sunburst(
-        filtered_df,
+        filtered_rollups,
         path=['technology_en', 'region'],
         values='volume_allocated_mwh',
         color='technology_en',
@@ -240,7 +301,7 @@ with col2:
 # Stacked bar chart
 st.subheader("Volume by Region and Technology")
 fig5 = px.bar(
-    filtered_df,
+    filtered_rollups.groupby(['region', 'technology_en'])['volume_allocated_mwh'].sum().reset_index(),
     x='region',
     y='volume_allocated_mwh',
     color='technology_en',
@@ -257,13 +318,13 @@ fig5.update_layout(height=500, xaxis_tickangle=-45)
 st.plotly_chart(fig5, width='stretch')
 
 # Time series if multiple dates exist
-unique_dates = filtered_df['auction_date'].nunique()
+unique_dates = filtered_rollups['month'].nunique()
 if unique_dates > 1:
     st.subheader("Volume Over Time")
-    time_data = filtered_df.groupby(['auction_date', 'technology_en'])['volume_allocated_mwh'].sum().reset_index()
+    time_data = filtered_rollups.groupby(['month', 'technology_en'])['volume_allocated_mwh'].sum().reset_index()
     fig6 = px.line(
         time_data,
-        x='auction_date',
+        x='month',
         y='volume_allocated_mwh',
         color='technology_en',
         color_discrete_map={
@@ -273,15 +334,16 @@ if unique_dates > 1:
             'Thermal': '#EF476F'
         },
         markers=True,
-        labels={'volume_allocated_mwh': 'Volume (MWh)', 'auction_date': 'Date', 'technology_en': 'Technology'}
+        labels={'volume_allocated_mwh': 'Volume (MWh)', 'month': 'Date', 'technology_en': 'Technology'}
     )
     fig6.update_layout(height=400)
     st.plotly_chart(fig6, width='stretch')
 
 # Scatter plot
 st.subheader("Volume vs Price Analysis")
+scatter_df = load_auctions(**filters, columns=('volume_allocated_mwh', 'weighted_avg_price_eur'))
 fig7 = px.scatter(
-    filtered_df,
+    scatter_df,
     x='volume_allocated_mwh',
     y='weighted_avg_price_eur',
     color='technology_en',
@@ -301,9 +363,15 @@ fig7 = px.scatter(
 fig7.update_layout(height=500)
 st.plotly_chart(fig7, width='stretch')
 
-# Data table
+# Data table, paged by the key of the last row shown
 st.subheader("Detailed Data")
-display_df = filtered_df[[
+if st.session_state.get('detail_filters') != filters:
+    st.session_state.detail_filters = filters
+    st.session_state.detail_pages = [None]
+detail_pages = st.session_state.detail_pages
+
+page_df, next_key = load_page(**filters, after=detail_pages[-1])
+display_df = page_df[[
     'auction_date', 'region', 'technology_en',
     'volume_offered_mwh', 'volume_allocated_mwh', 'weighted_avg_price_eur'
 ]].rename(columns={
@@ -316,5 +384,17 @@ display_df = filtered_df[[
 })
 st.dataframe(display_df, use_container_width=True, hide_index=True)
 
+col1, col2, col3 = st.columns([1, 1, 6])
+with col1:
+    if st.button("Previous", disabled=len(detail_pages) == 1):
+        detail_pages.pop()
+        st.rerun()
+with col2:
+    if st.button("Next", disabled=next_key is None):
+        detail_pages.append(next_key)
+        st.rerun()
+with col3:
+    st.caption(f"Page {len(detail_pages)}")
+
 st.markdown("---")
 st.caption("Data source: French Energy Auction Results Database")
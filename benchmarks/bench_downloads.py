@@ -0,0 +1,86 @@
+import argparse
+import logging
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.logging import logger
+from src.scraping.pipeline import ScrapePipeline
+from src.scraping.rate_limiter import HostRateLimiter
+from src.scraping.scraper import EEXScraper
+from src.storage import BlobStore
+
+
+def make_handler(body: bytes, latency: float):
+
+    class StubHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def run(scraper: EEXScraper, links, body: bytes, workers: int) -> float:
+    with tempfile.TemporaryDirectory() as store_root:
+        # Every file is known with this content, so the pipeline downloads and
+        # stores each one and skips it as unchanged; nothing is parsed or written
+        known = {filename: BlobStore.digest(body) for _, filename in links}
+        pipeline = ScrapePipeline(
+            scraper, BlobStore(store_root), None, None, known, download_workers=workers, parse_workers=1
+        )
+        start = time.perf_counter()
+        pipeline.run(links)
+        elapsed = time.perf_counter() - start
+
+    assert pipeline.stats["download"].items == len(links) and not pipeline.failed_downloads
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline download throughput against a local stub server")
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.05, help="Server-side delay per request (s)")
+    parser.add_argument("--rate", type=float, default=20.0, help="Token bucket rate per host (req/s)")
+    parser.add_argument("--burst", type=float, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    # The pipeline logs every file
+    logger.setLevel(logging.WARNING)
+
+    body = b"x" * (args.size_kb * 1024)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(body, args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    links = [(f"{base}/files/{i}.xlsx", f"{i}.xlsx") for i in range(args.files)]
+
+    print(f"{args.files} files x {args.size_kb} KiB, {args.latency * 1000:.0f} ms latency, "
+          f"rate {args.rate}/s burst {args.burst}")
+    print(f"{'workers':>8} {'seconds':>9} {'files/s':>9} {'MiB/s':>8}")
+
+    try:
+        for workers in args.workers:
+            scraper = EEXScraper(rate_limiter=HostRateLimiter(args.rate, args.burst))
+            elapsed = run(scraper, links, body, workers)
+            mib = args.files * len(body) / (1024 * 1024)
+            print(f"{workers:>8} {elapsed:>9.2f} {args.files / elapsed:>9.1f} {mib / elapsed:>8.1f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+from src.database.models import Base
+from src.database.repository import AuctionRepository
+
+SCHEMA = "bench_fetch"
+REGIONS = [f"Region {i}" for i in range(13)]
+TECHNOLOGIES = ["Eolien onshore", "Hydraulique", "Solaire", "Thermique"]
+
+
+def synthetic_auctions(rows: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(rows):
+        day, combination = divmod(i, len(REGIONS) * len(TECHNOLOGIES))
+        region, technology = divmod(combination, len(TECHNOLOGIES))
+        yield {
+            "auction_date": date(2000, 1, 1) + timedelta(days=day),
+            "region": REGIONS[region],
+            "technology": TECHNOLOGIES[technology],
+            "volume_offered_mwh": Decimal(rng.randint(0, 10 ** 8)) / 100,
+            "volume_allocated_mwh": Decimal(rng.randint(0, 10 ** 8)) / 100,
+            "weighted_avg_price_eur": Decimal(rng.randint(0, 10 ** 6)) / 10 ** 4 if rng.random() > 0.05 else None,
+            "source_file": "bench.xlsx",
+        }
+
+
+def orm_frame(repo: AuctionRepository) -> pd.DataFrame:
+    # What the dashboard used to do: hydrate every Auction, then Decimal -> float per value
+    return pd.DataFrame([
+        {
+            'auction_date': a.auction_date,
+            'region': a.region,
+            'technology': a.technology,
+            'volume_offered_mwh': float(a.volume_offered_mwh) if a.volume_offered_mwh else 0,
+            'volume_allocated_mwh': float(a.volume_allocated_mwh) if a.volume_allocated_mwh else 0,
+            'weighted_avg_price_eur': float(a.weighted_avg_price_eur) if a.weighted_avg_price_eur else 0,
+        }
+        for a in repo.get_all_auctions()
+    ])
+
+
+def row_frame(repo: AuctionRepository) -> pd.DataFrame:
+    df = pd.DataFrame(repo.query_auctions(columns=AuctionRepository.VALUE_COLUMNS, limit=None).rows)
+    return df.astype({column: float for column in AuctionRepository.VALUE_COLUMNS})
+
+
+def column_frame(repo: AuctionRepository) -> pd.DataFrame:
+    return repo.fetch_frame(columns=AuctionRepository.VALUE_COLUMNS)
+
+
+PATHS = {"orm": orm_frame, "rows": row_frame, "columnar": column_frame}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auction DataFrame fetch paths against a scratch PostgreSQL schema")
+    parser.add_argument("--url", default=settings.DATABASE_URL)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    print(f"{'rows':>8} {'path':<9} {'seconds':>8} {'rows/s':>10} {'MiB':>7} {'speedup':>8}")
+
+    try:
+        for rows in args.rows:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            Base.metadata.create_all(engine, tables=[Base.metadata.tables["auctions"]])
+            with Session(engine) as session:
+                AuctionRepository(session).upsert_auctions(list(synthetic_auctions(rows)))
+
+            baseline = None
+            for name, fetch in PATHS.items():
+                timings = []
+                for _ in range(args.repeat):
+                    with Session(engine) as session:
+                        start = time.perf_counter()
+                        frame = fetch(AuctionRepository(session))
+                        timings.append(time.perf_counter() - start)
+                    if len(frame) != rows:
+                        raise AssertionError(f"{name} fetched {len(frame)} rows, expected {rows}")
+
+                best = min(timings)
+                baseline = baseline or best
+                memory = frame.memory_usage(deep=True).sum() / (1024 * 1024)
+                print(f"{rows:>8} {name:<9} {best:>8.3f} {rows / best:>10.0f} {memory:>7.1f} {baseline / best:>7.1f}x")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.scraping.scraper import EEXScraper
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+
+def build_page(size_mb: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = ["<html><head><title>Archive</title></head><body><table>"]
+    size = 0
+    i = 0
+    while size < size_mb * 1024 * 1024:
+        kind = rng.random()
+        if kind < 0.05:
+            row = f'<tr><td><a href="/files/results_{i}.xlsx">Download results {i}</a></td></tr>'
+        elif kind < 0.07:
+            row = f'<tr><td><a href="/files/pack_{i}.zip"><span>Download</span> pack {i}</a></td></tr>'
+        else:
+            row = (
+                f'<tr class="row-{i % 2}"><td data-id="{i}">Auction {i}</td>'
+                f'<td><a href="/news/{i}.html" title="News item {i}">Read more</a></td>'
+                f'<td><span class="price">{rng.uniform(0, 5):.3f}</span> EUR/MWh</td></tr>'
+            )
+        parts.append(row)
+        size += len(row)
+        i += 1
+    parts.append("</table></body></html>")
+    return "".join(parts)
+
+
+def soup_links(base_url: str, html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    excel_links = []
+    for link in soup.find_all("a", href=True):
+        href = link["href"]
+        link_text = link.get_text(strip=True)
+        if any(ext in href.lower() for ext in [".xlsx", ".xls"]):
+            excel_links.append((urljoin(base_url, href), href.split("/")[-1]))
+        elif "download" in link_text.lower() or "result" in link_text.lower():
+            if href.endswith((".xlsx", ".xls", ".zip")):
+                excel_links.append((urljoin(base_url, href), href.split("/")[-1]))
+    return excel_links
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Link extraction on large archive pages")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    scraper = EEXScraper()
+    print(f"{'MiB':>6} {'links':>7} {'extractor s':>12} {'soup s':>8} {'speedup':>8}")
+
+    for size in args.sizes:
+        html = build_page(size)
+        links = scraper.find_excel_links(html)
+        fast = best_of(lambda: scraper.find_excel_links(html), args.repeat)
+
+        if BeautifulSoup is None:
+            print(f"{size:>6.1f} {len(links):>7} {fast:>12.3f} {'n/a':>8} {'n/a':>8}")
+            continue
+
+        assert soup_links(scraper.base_url, html) == links
+        slow = best_of(lambda: soup_links(scraper.base_url, html), args.repeat)
+        print(f"{size:>6.1f} {len(links):>7} {fast:>12.3f} {slow:>8.3f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import settings
+from src.scraping.parser import AuctionParser
+from synthetic import WorkbookSpec, eex_workbook
+
+BASELINE_PATH = Path(__file__).parent / "parser_baseline.json"
+
+SCENARIOS = {
+    "single-sheet": WorkbookSpec(sheets=1, rows=52),
+    "monthly-archive": WorkbookSpec(sheets=12, rows=52, language="en"),
+    "decade-archive": WorkbookSpec(sheets=120, rows=52),
+    "header-offset": WorkbookSpec(sheets=12, rows=52, header_offset=30),
+    "text-numbers": WorkbookSpec(sheets=12, rows=52, number_format="text", language="en"),
+    "spaced-numbers": WorkbookSpec(sheets=12, rows=52, number_format="spaced"),
+    "styled-numbers": WorkbookSpec(sheets=12, rows=52, number_format="styled"),
+    "large-sheet": WorkbookSpec(sheets=1, rows=50_000),
+}
+
+
+def measure(content: bytes, expected_rows: int, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        # What parse_stored_workbook runs in the parser processes
+        batch = AuctionParser(source_file="bench.xlsx").parse_excel_batch(content)
+        timings.append(time.perf_counter() - start)
+        if batch.num_rows != expected_rows:
+            raise AssertionError(f"parsed {batch.num_rows} rows, expected {expected_rows}")
+        del batch
+
+    # Traced separately, tracemalloc slows parsing down several times
+    tracemalloc.start()
+    try:
+        AuctionParser(source_file="bench.xlsx").parse_excel_batch(content)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "rows": expected_rows,
+        "seconds": round(best, 4),
+        "rows_per_s": round(expected_rows / best),
+        "peak_mib": round(peak / (1024 * 1024), 2),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result["rows_per_s"] < reference["rows_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['rows_per_s']} rows/s vs baseline {reference['rows_per_s']}")
+        if result["peak_mib"] > reference["peak_mib"] * (1 + tolerance):
+            regressions.append(f"{name}: peak {result['peak_mib']} MiB vs baseline {reference['peak_mib']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AuctionParser throughput and peak memory on synthetic workbooks")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backend", choices=["streaming", "pandas"], default=settings.PARSER_BACKEND)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown or memory growth")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args()
+
+    settings.PARSER_BACKEND = args.backend
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    baseline = stored.get("backends", {}).get(args.backend, {})
+
+    print(f"backend {args.backend}, best of {args.repeat}")
+    print(f"{'scenario':<16} {'rows':>7} {'seconds':>8} {'rows/s':>9} {'peak MiB':>9} {'vs base':>8}")
+
+    results = {}
+    for name in args.scenarios:
+        spec = SCENARIOS[name]
+        result = measure(eex_workbook(spec), spec.expected_rows, args.repeat)
+        results[name] = result
+
+        reference = baseline.get(name)
+        change = f"{result['rows_per_s'] / reference['rows_per_s']:>7.2f}x" if reference else f"{'n/a':>8}"
+        print(
+            f"{name:<16} {result['rows']:>7} {result['seconds']:>8.3f} "
+            f"{result['rows_per_s']:>9} {result['peak_mib']:>9.2f} {change}"
+        )
+
+    if args.save_baseline:
+        stored.setdefault("backends", {}).setdefault(args.backend, {}).update(results)
+        stored["python"] = platform.python_version()
+        stored["machine"] = platform.machine()
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import io
+import random
+from typing import NamedTuple
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+
+from src.scraping.enums import Region
+
+MONTHS = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+)
+
+TECHNOLOGY_LABELS = {
+    "en": ("Wind", "Solar", "Hydro", "Thermal"),
+    "fr": ("Eolien onshore", "Solaire", "Hydraulique", "Thermique"),
+}
+
+# The parser keys on the English header words; the French exports use the
+# "auctionned"/"sold" wording
+HEADER_LABELS = {
+    "en": ("Region", "Technology", "Volume Offered (MWh)", "Volume Allocated (MWh)", "Weighted average price (EUR/MWh)"),
+    "fr": ("Région", "Filière", "Volume auctionned (MWh)", "Volume sold (MWh)", "Average price (EUR/MWh)"),
+}
+
+TOTAL_LABELS = {"en": "Total", "fr": "Total général"}
+
+NUMBER_FORMATS = ("numeric", "styled", "text", "spaced")
+
+
+class WorkbookSpec(NamedTuple):
+    sheets: int = 1
+    rows: int = 52
+    header_offset: int = 2
+    language: str = "fr"
+    number_format: str = "numeric"
+    seed: int = 0
+
+    @property
+    def expected_rows(self) -> int:
+        return self.sheets * self.rows
+
+
+def _number(value: float, number_format: str, sheet, decimals: int):
+    if number_format == "numeric":
+        return value
+    if number_format == "styled":
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.number_format = "#,##0." + "0" * decimals
+        return cell
+    text = f"{value:,.{decimals}f}"
+    return text.replace(",", " ") if number_format == "spaced" else text
+
+
+def eex_workbook(spec: WorkbookSpec) -> bytes:
+    """Build an EEX-like results workbook whose sheets each hold spec.rows auction rows.
+
+    Rows cycle through region/technology pairs and are followed by a total
+    line the parser must skip.
+    """
+    if spec.language not in HEADER_LABELS:
+        raise ValueError(f"Unknown label language: {spec.language}")
+    if spec.number_format not in NUMBER_FORMATS:
+        raise ValueError(f"Unknown number format: {spec.number_format}")
+
+    rng = random.Random(spec.seed)
+    regions = [region.value for region in Region]
+    technologies = TECHNOLOGY_LABELS[spec.language]
+
+    wb = openpyxl.Workbook(write_only=True)
+    for index in range(spec.sheets):
+        month = MONTHS[index % 12]
+        year = 2015 + index // 12
+        ws = wb.create_sheet(f"{month} {year}")
+
+        if spec.header_offset:
+            ws.append([f"Guarantees of origin auction results - {month} {year}"])
+            for _ in range(spec.header_offset - 1):
+                ws.append([])
+        ws.append(list(HEADER_LABELS[spec.language]))
+
+        for row in range(spec.rows):
+            offered = rng.randint(1_000, 500_000) + rng.randint(0, 99) / 100
+            ws.append([
+                regions[row // len(technologies) % len(regions)],
+                technologies[row % len(technologies)],
+                _number(offered, spec.number_format, ws, 2),
+                _number(round(offered * rng.uniform(0.2, 1), 2), spec.number_format, ws, 2),
+                _number(round(rng.uniform(0.05, 12), 4), spec.number_format, ws, 4),
+            ])
+        ws.append([TOTAL_LABELS[spec.language], None, None, None, None])
+
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
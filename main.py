@@ -2,16 +2,29 @@
 import argparse
 
 from config.logging import logger
+from src.database import DatabaseConnection, RollupRepository
 from src.scheduler import start_scheduler
-from src.scraping import run_scrape
+from src.scraping import run_reparse, run_scrape
 
 
 def main():
     parser = argparse.ArgumentParser(description="EEX French Auction Data Scraper")
     parser.add_argument("--once", action="store_true", help="Run scraper once and exit")
+    parser.add_argument("--reparse", action="store_true", help="Re-parse archived raw workbooks and exit")
+    parser.add_argument("--workers", type=int, help="Number of parser processes for --reparse")
+    parser.add_argument(
+        "--rebuild-rollups", action="store_true", help="Recompute all monthly auction rollups and exit"
+    )
     args = parser.parse_args()
 
-    if args.once:
+    if args.rebuild_rollups:
+        logger.info("Rebuilding monthly auction rollups...")
+        with DatabaseConnection().session_scope() as session:
+            logger.info(f"Rebuilt {RollupRepository(session).rebuild()} rollups")
+    elif args.reparse:
+        logger.info("Running reparse of archived workbooks...")
+        run_reparse(workers=args.workers)
+    elif args.once:
         logger.info("Running single scrape...")
         run_scrape()
     else:
@@ -1,12 +1,27 @@
-from src.database.models import Auction, ScrapeLog, Base
+from src.database.models import (
+    Auction, AuctionMonthlyRollup, IngestedFile, IngestedSheet, ScrapeLog, ScrapeMetric, Base
+)
 from src.database.connection import DatabaseConnection
-from src.database.repository import AuctionRepository, ScrapeLogRepository
+from src.database.repository import (
+    AuctionPage, AuctionRepository, IngestedFileRepository, RollupRepository, ScrapeLogRepository,
+    StageMetric, StageTrend, UpsertResult
+)
 
 __all__ = [
     'Auction',
+    'AuctionMonthlyRollup',
+    'IngestedFile',
+    'IngestedSheet',
     'ScrapeLog',
+    'ScrapeMetric',
     'Base',
     'DatabaseConnection',
+    'AuctionPage',
     'AuctionRepository',
+    'IngestedFileRepository',
+    'RollupRepository',
     'ScrapeLogRepository',
+    'StageMetric',
+    'StageTrend',
+    'UpsertResult',
 ]
\ No newline at end of file
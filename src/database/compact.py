@@ -0,0 +1,199 @@
+from typing import Dict, NamedTuple, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from config.logging import logger
+from src.database.models import Auction
+from src.database.schema import advisory_lock
+
+FACT_TABLE = "auction_facts"
+
+
+class Dimension(NamedTuple):
+    table: str
+    column: str
+    key: str
+    size: int
+
+
+DIMENSIONS = (
+    Dimension("regions", "region", "region_id", 100),
+    Dimension("technologies", "technology", "technology_id", 50),
+    Dimension("source_files", "source_file", "source_file_id", 255),
+)
+
+
+class Measure(NamedTuple):
+    column: str
+    fact_column: str
+    # Decimals kept by the wide table's Numeric column
+    decimals: int
+    precision: int
+
+
+    @property
+    def scale(self) -> int:
+        # One unit per last decimal, so every value of numeric(precision, decimals)
+        # fits a bigint exactly; the same fixed point as AuctionBatch
+        return 10 ** self.decimals
+
+
+MEASURES = (
+    Measure("volume_offered_mwh", "volume_offered_cmwh", 2, 15),
+    Measure("volume_allocated_mwh", "volume_allocated_cmwh", 2, 15),
+    Measure("weighted_avg_price_eur", "price_eur_x10000", 4, 10),
+)
+
+
+def is_compact(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(f"SELECT to_regclass('{FACT_TABLE}') IS NOT NULL")).scalar()
+
+
+def scaled(expression: str, measure: Measure) -> str:
+    return f"(round({expression}, {measure.decimals}) * {measure.scale})::bigint"
+
+
+def dimension_inserts(source: str) -> Tuple[str, ...]:
+    """Statements adding the names in `source` that the dimension tables do not hold yet.
+
+    Names already present are filtered out first, so their ids do not burn
+    sequence values on conflict.
+    """
+    return tuple(
+        f"INSERT INTO {dim.table} (name) SELECT DISTINCT source.{dim.column} FROM {source} "
+        f"WHERE source.{dim.column} IS NOT NULL "
+        f"AND NOT EXISTS (SELECT 1 FROM {dim.table} WHERE {dim.table}.name = source.{dim.column}) "
+        "ON CONFLICT (name) DO NOTHING"
+        for dim in DIMENSIONS
+    )
+
+
+def fact_select(source: str, with_id: bool = False) -> str:
+    """Select the fact columns, in FACT_COLUMNS order, for rows of `source` in wide form."""
+    region, technology, source_file = DIMENSIONS
+    measures = ", ".join(scaled(f"source.{measure.column}", measure) for measure in MEASURES)
+    leading = "source.id, source.auction_date" if with_id else "source.auction_date"
+    return (
+        f"SELECT {leading}, {region.table}.id, {technology.table}.id, {measures}, "
+        f"{source_file.table}.id, source.created_at FROM {source} "
+        f"JOIN {region.table} ON {region.table}.name = source.{region.column} "
+        f"JOIN {technology.table} ON {technology.table}.name = source.{technology.column} "
+        f"LEFT JOIN {source_file.table} ON {source_file.table}.name = source.{source_file.column}"
+    )
+
+
+FACT_COLUMNS = (
+    ("auction_date",)
+    + tuple(dim.key for dim in DIMENSIONS[:2])
+    + tuple(measure.fact_column for measure in MEASURES)
+    + (DIMENSIONS[2].key, "created_at")
+)
+
+FACT_KEY = ("auction_date", "region_id", "technology_id")
+
+
+def ensure_compact(engine: Engine, seeds: Dict[str, Sequence[str]] = None):
+    """Move auctions into auction_facts keyed by dimension ids, behind an auctions view.
+
+    The view returns the wide table's columns and types, so readers are
+    unaffected; writers need to target auction_facts.
+    """
+    if engine.dialect.name != "postgresql":
+        logger.warning(f"Compact auction storage needs PostgreSQL, not {engine.dialect.name}")
+        return
+
+    with engine.connect() as conn:
+        if is_compact(conn):
+            return
+
+    if seeds is None:
+        # Imported here, src.scraping imports this package
+        from src.scraping.batch import REGIONS, TECHNOLOGIES
+        seeds = {"regions": REGIONS, "technologies": TECHNOLOGIES}
+
+    with engine.begin() as conn:
+        advisory_lock(conn)
+        if not is_compact(conn):
+            _convert(conn, seeds)
+
+
+def _convert(conn: Connection, seeds: Dict[str, Sequence[str]]):
+    logger.info("Converting auctions into compact fact and dimension tables")
+    conn.execute(text("LOCK TABLE auctions IN ACCESS EXCLUSIVE MODE"))
+
+    for dim in DIMENSIONS:
+        id_type = "smallserial" if dim.table in seeds else "serial"
+        conn.execute(text(
+            f"CREATE TABLE {dim.table} (id {id_type} PRIMARY KEY, name varchar({dim.size}) NOT NULL UNIQUE)"
+        ))
+        # Seeded ids match the codes of AuctionBatch, which makes them stable across databases
+        names = list(seeds.get(dim.table, ()))
+        if names:
+            conn.execute(
+                text(f"INSERT INTO {dim.table} (id, name) SELECT ordinality - 1, name "
+                     "FROM unnest(CAST(:names AS varchar[])) WITH ORDINALITY AS seed(name, ordinality)"),
+                {"names": names}
+            )
+            conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{dim.table}', 'id'), {len(names)}, false)"))
+
+    # Columns ordered widest first, so rows carry no alignment padding
+    measures = ", ".join(f"{measure.fact_column} bigint" for measure in MEASURES)
+    region, technology, source_file = DIMENSIONS
+    conn.execute(text(
+        f"CREATE TABLE {FACT_TABLE} ("
+        f"{measures}, created_at timestamp without time zone, "
+        "id integer NOT NULL DEFAULT nextval('auctions_id_seq') PRIMARY KEY, "
+        "auction_date date NOT NULL, "
+        f"{source_file.key} integer REFERENCES {source_file.table} (id), "
+        f"{region.key} smallint NOT NULL REFERENCES {region.table} (id), "
+        f"{technology.key} smallint NOT NULL REFERENCES {technology.table} (id), "
+        f"CONSTRAINT uq_auction_facts_key UNIQUE ({', '.join(FACT_KEY)}))"
+    ))
+
+    for statement in dimension_inserts("auctions AS source"):
+        conn.execute(text(statement))
+    conn.execute(text(
+        f"INSERT INTO {FACT_TABLE} (id, {', '.join(FACT_COLUMNS)}) "
+        f"{fact_select('auctions AS source', with_id=True)}"
+    ))
+
+    # The sequence would go with the wide table otherwise
+    conn.execute(text(f"ALTER SEQUENCE auctions_id_seq OWNED BY {FACT_TABLE}.id"))
+    conn.execute(text("DROP TABLE auctions"))
+
+    for name, columns in (
+        ("ix_auction_facts_technology_date", f"({technology.key}, auction_date) INCLUDE "
+                                             f"({', '.join(measure.fact_column for measure in MEASURES)})"),
+        ("ix_auction_facts_region_date", f"({region.key}, auction_date)"),
+        ("ix_auction_facts_auction_date_brin", "USING brin (auction_date)"),
+    ):
+        conn.execute(text(f"CREATE INDEX {name} ON {FACT_TABLE} {columns}"))
+
+    conn.execute(text(create_view_sql()))
+    conn.execute(text(f"ANALYZE {FACT_TABLE}"))
+
+
+def create_view_sql() -> str:
+    columns = {
+        "id": "facts.id",
+        "auction_date": "facts.auction_date",
+        "created_at": "facts.created_at",
+    }
+    for dim in DIMENSIONS:
+        columns[dim.column] = f"{dim.table}.name"
+    for measure in MEASURES:
+        columns[measure.column] = (
+            f"CAST(facts.{measure.fact_column} / {measure.scale}.0 AS numeric({measure.precision}, {measure.decimals}))"
+        )
+
+    region, technology, source_file = DIMENSIONS
+    select = ", ".join(f"{columns[column.name]} AS {column.name}" for column in Auction.__table__.columns)
+    return (
+        f"CREATE VIEW auctions AS SELECT {select} FROM {FACT_TABLE} AS facts "
+        f"JOIN {region.table} ON {region.table}.id = facts.{region.key} "
+        f"JOIN {technology.table} ON {technology.table}.id = facts.{technology.key} "
+        f"LEFT JOIN {source_file.table} ON {source_file.table}.id = facts.{source_file.key}"
+    )
@@ -1,31 +1,76 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 
+from config.logging import logger
 from config.settings import settings
-from src.database.models import Base
+from src.database.compact import ensure_compact
+from src.database.partitioning import ensure_partitions
+from src.database.schema import ensure_schema
+
+_engines: Dict[str, Engine] = {}
+_checked_urls: Set[str] = set()
+_lock = threading.Lock()
+_schema_lock = threading.Lock()
+
+
+def get_engine(database_url: str = None) -> Engine:
+    """Return the process-wide engine for a URL, creating it on first use."""
+    database_url = database_url or settings.DATABASE_URL
+    with _lock:
+        engine = _engines.get(database_url)
+        if engine is None:
+            engine = create_engine(
+                database_url,
+                echo=False,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_pre_ping=settings.DB_POOL_PRE_PING,
+                pool_recycle=settings.DB_POOL_RECYCLE,
+            )
+            _engines[database_url] = engine
+        return engine
 
 
 class DatabaseConnection:
 
     def __init__(self, database_url: str = None):
         self.database_url = database_url or settings.DATABASE_URL
-        self.engine = create_engine(self.database_url, echo=False)
-        self._session: Session = None
-
-    def create_tables(self):
-        Base.metadata.create_all(self.engine)
-
-    def get_session(self) -> Session:
-        if self._session is None:
-            session_factory = sessionmaker(bind=self.engine)
-            self._session = session_factory()
-        return self._session
-
-    def connect(self) -> Session:
-        self.create_tables()
-        return self.get_session()
-
-    def close(self):
-        if self._session:
-            self._session.close()
-            self._session = None
+        self.engine = get_engine(self.database_url)
+        self._session_factory = sessionmaker(bind=self.engine)
+
+    def ensure_schema(self):
+        with _schema_lock:
+            if self.database_url in _checked_urls:
+                return
+            ensure_schema(self.engine)
+            if settings.AUCTIONS_COMPACT_STORAGE:
+                if settings.AUCTIONS_PARTITION_BY_YEAR:
+                    logger.warning("Compact auction storage is not partitioned, ignoring AUCTIONS_PARTITION_BY_YEAR")
+                ensure_compact(self.engine)
+            elif settings.AUCTIONS_PARTITION_BY_YEAR:
+                ensure_partitions(self.engine)
+            _checked_urls.add(self.database_url)
+
+    def ensure_partitions(self):
+        """Create the yearly partitions through next year, for processes that outlive a new year."""
+        if settings.AUCTIONS_PARTITION_BY_YEAR and not settings.AUCTIONS_COMPACT_STORAGE:
+            self.ensure_schema()
+            ensure_partitions(self.engine)
+
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        self.ensure_schema()
+        session = self._session_factory()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
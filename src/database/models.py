@@ -1,6 +1,6 @@
 from datetime import datetime
 from sqlalchemy import (
-    Column, Integer, String, Date, DateTime, Numeric, Text,
+    BigInteger, Column, Float, ForeignKey, Index, Integer, String, Date, DateTime, Numeric, Text,
     UniqueConstraint
 )
 from sqlalchemy.orm import declarative_base
@@ -26,6 +26,15 @@ class Auction(Base):
             'auction_date', 'region', 'technology',
             name='uq_auction_date_region_technology'
         ),
+        # Technology and region filters over date ranges; the technology one
+        # also answers volume/price aggregates from the index alone
+        Index(
+            'ix_auctions_technology_date', 'technology', 'auction_date',
+            postgresql_include=['volume_offered_mwh', 'volume_allocated_mwh', 'weighted_avg_price_eur']
+        ),
+        Index('ix_auctions_region_date', 'region', 'auction_date'),
+        # Rows arrive roughly in date order, so a BRIN index stays tiny
+        Index('ix_auctions_auction_date_brin', 'auction_date', postgresql_using='brin'),
     )
 
     def __repr__(self):
@@ -46,3 +55,93 @@ class ScrapeLog(Base):
 
     def __repr__(self):
         return f"<ScrapeLog(run_at={self.run_at}, status={self.status})>"
+
+
+class ScrapeMetric(Base):
+    """One measurement of a scrape run: a page fetch, a file download, parse or write, or a cache counter."""
+
+    __tablename__ = "scrape_metrics"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    scrape_log_id = Column(Integer, ForeignKey("scrape_logs.id", ondelete="CASCADE"), nullable=False, index=True)
+    stage = Column(String(20), nullable=False)
+    # Outcome, sheet or counter name, depending on the stage
+    name = Column(String(255))
+    source_file = Column(String(255))
+    items = Column(BigInteger)
+    size_bytes = Column(BigInteger)
+    seconds = Column(Float)
+
+    def __repr__(self):
+        return f"<ScrapeMetric(stage={self.stage}, name={self.name}, source={self.source_file})>"
+
+
+class IngestedFile(Base):
+    __tablename__ = "ingested_files"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    filename = Column(String(255), nullable=False, unique=True)
+    content_hash = Column(String(64), nullable=False, index=True)
+    size_bytes = Column(BigInteger)
+    row_count = Column(Integer, default=0)
+    parse_seconds = Column(Float)
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<IngestedFile(filename={self.filename}, hash={self.content_hash[:12]})>"
+
+
+class IngestedSheet(Base):
+    __tablename__ = "ingested_sheets"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source_file = Column(String(255), nullable=False)
+    sheet_name = Column(String(255), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('source_file', 'sheet_name', name='uq_ingested_sheet_source_sheet'),
+        # Archive members are stored as "<archive>!<member>" and looked up by prefix
+        Index(
+            'ix_ingested_sheets_source_file_pattern', 'source_file',
+            postgresql_ops={'source_file': 'text_pattern_ops'}
+        ),
+    )
+
+    def __repr__(self):
+        return f"<IngestedSheet(source={self.source_file}, sheet={self.sheet_name})>"
+
+
+class AuctionMonthlyRollup(Base):
+    """Auction sums per month, region and technology, rebuilt from auctions for the months a scrape touched."""
+
+    __tablename__ = "auction_monthly_rollups"
+
+    month = Column(Date, primary_key=True)
+    region = Column(String(100), primary_key=True)
+    technology = Column(String(50), primary_key=True)
+    record_count = Column(Integer, nullable=False)
+    volume_offered_mwh = Column(Numeric(20, 2))
+    volume_allocated_mwh = Column(Numeric(20, 2))
+    price_sum = Column(Numeric(20, 4))
+    priced_count = Column(Integer, nullable=False)
+    # sum(price * allocated volume), for volume-weighted average prices
+    price_volume_sum = Column(Numeric(30, 6))
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<AuctionMonthlyRollup(month={self.month}, region={self.region}, "
+            f"tech={self.technology}, records={self.record_count})>"
+        )
+
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<SchemaVersion(version={self.version})>"
@@ -0,0 +1,111 @@
+from datetime import date
+from typing import Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from config.logging import logger
+from src.database.compact import is_compact
+from src.database.models import Auction
+from src.database.schema import advisory_lock
+
+DEFAULT_PARTITION = "auctions_default"
+PARTITION_PREFIX = "auctions_y"
+
+
+def partition_name(year: int) -> str:
+    return f"{PARTITION_PREFIX}{year}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    return bool(conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('auctions'))"
+    )).scalar())
+
+
+def year_partitions(conn: Connection) -> Set[int]:
+    names = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass('auctions')"
+    )).scalars()
+    return {int(name[len(PARTITION_PREFIX):]) for name in names if name.startswith(PARTITION_PREFIX)}
+
+
+def ensure_partitions(engine: Engine, through_year: int = None):
+    """Range-partition auctions by year and keep partitions created ahead of the data.
+
+    Dates outside the yearly partitions land in auctions_default.
+    """
+    if engine.dialect.name != "postgresql":
+        logger.warning(f"Yearly partitioning needs PostgreSQL, not {engine.dialect.name}")
+        return
+
+    through_year = through_year or date.today().year + 1
+    with engine.connect() as conn:
+        if is_compact(conn):
+            logger.warning("Auctions use compact storage, which is not partitioned")
+            return
+        if is_partitioned(conn) and through_year in year_partitions(conn):
+            return
+
+    with engine.begin() as conn:
+        advisory_lock(conn)
+        if not is_partitioned(conn):
+            _convert(conn)
+
+        first_year = conn.execute(text("SELECT min(EXTRACT(YEAR FROM auction_date))::int FROM auctions")).scalar()
+        existing = year_partitions(conn)
+        for year in range(min(first_year or through_year, through_year), through_year + 1):
+            if year not in existing:
+                _create_year_partition(conn, year)
+
+
+def _convert(conn: Connection):
+    logger.info("Converting auctions into a yearly partitioned table")
+    indexes = sorted(Auction.__table__.indexes, key=lambda index: index.name)
+
+    conn.execute(text("LOCK TABLE auctions IN ACCESS EXCLUSIVE MODE"))
+    for index in indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    conn.execute(text("ALTER TABLE auctions RENAME TO auctions_unpartitioned"))
+    conn.execute(text("ALTER TABLE auctions_unpartitioned RENAME CONSTRAINT auctions_pkey TO auctions_unpartitioned_pkey"))
+    conn.execute(text(
+        "ALTER TABLE auctions_unpartitioned RENAME CONSTRAINT uq_auction_date_region_technology "
+        "TO uq_auction_unpartitioned"
+    ))
+
+    # Unique constraints on a partitioned table must include the partition key
+    conn.execute(text(
+        "CREATE TABLE auctions (LIKE auctions_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (auction_date)"
+    ))
+    conn.execute(text("ALTER SEQUENCE auctions_id_seq OWNED BY auctions.id"))
+    conn.execute(text("ALTER TABLE auctions ADD CONSTRAINT auctions_pkey PRIMARY KEY (id, auction_date)"))
+    conn.execute(text(
+        "ALTER TABLE auctions ADD CONSTRAINT uq_auction_date_region_technology "
+        "UNIQUE (auction_date, region, technology)"
+    ))
+    conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF auctions DEFAULT"))
+    for index in indexes:
+        index.create(conn)
+
+    conn.execute(text("INSERT INTO auctions SELECT * FROM auctions_unpartitioned"))
+    conn.execute(text("DROP TABLE auctions_unpartitioned"))
+
+
+def _create_year_partition(conn: Connection, year: int):
+    bounds = {"lower": date(year, 1, 1), "upper": date(year + 1, 1, 1)}
+
+    # Rows of that year sitting in the default partition would block attaching it
+    conn.execute(text("CREATE TEMP TABLE auction_moved (LIKE auctions) ON COMMIT DROP"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        "WHERE auction_date >= :lower AND auction_date < :upper RETURNING *) "
+        "INSERT INTO auction_moved SELECT * FROM moved"
+    ), bounds)
+    conn.execute(text(
+        f"CREATE TABLE {partition_name(year)} PARTITION OF auctions "
+        f"FOR VALUES FROM ('{bounds['lower']}') TO ('{bounds['upper']}')"
+    ))
+    conn.execute(text("INSERT INTO auctions SELECT * FROM auction_moved"))
+    conn.execute(text("DROP TABLE auction_moved"))
@@ -1,16 +1,79 @@
-from datetime import datetime
-from typing import List, Optional
+import io
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
 
+import pandas as pd
+from sqlalchemy import BigInteger, Date, DateTime, Float, Integer, Numeric, Select, cast, func, select, text, tuple_
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-from src.database.models import Auction, ScrapeLog
+from src.database import compact
+from src.database.models import (
+    Auction, AuctionMonthlyRollup, IngestedFile, IngestedSheet, ScrapeLog, ScrapeMetric
+)
+
+if TYPE_CHECKING:
+    from src.scraping.batch import AuctionBatch
+
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_text(value) -> str:
+    if value is None:
+        return "\\N"
+    return str(value).translate(_COPY_ESCAPES)
+
+
+class UpsertResult(NamedTuple):
+    inserted: int
+    updated: int = 0
+    unchanged: int = 0
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.updated
+
+
+def _apply_filters(query, model, date_column, start, end, regions, technologies):
+    if start is not None:
+        query = query.filter(date_column >= start)
+    if end is not None:
+        query = query.filter(date_column <= end)
+    if regions is not None:
+        query = query.filter(model.region.in_(regions))
+    if technologies is not None:
+        query = query.filter(model.technology.in_(technologies))
+    return query
+
+
+class AuctionPage(NamedTuple):
+    rows: List[dict]
+    # Pass as `after` to fetch the following page, None on the last page
+    next_key: Optional[Tuple[date, str, str]]
 
 
 class AuctionRepository:
 
+    VALUE_COLUMNS = (
+        'volume_offered_mwh',
+        'volume_allocated_mwh',
+        'weighted_avg_price_eur',
+    )
+
+    UPDATABLE_COLUMNS = VALUE_COLUMNS + ('source_file',)
+
+    KEY_COLUMNS = ('auction_date', 'region', 'technology')
+
+    INSERT_COLUMNS = KEY_COLUMNS + UPDATABLE_COLUMNS
+
+    PAGE_SIZE = 500
+
+    FETCH_CHUNK_SIZE = 10000
+
     def __init__(self, session: Session):
         self.session = session
+        self._compact: Optional[bool] = None
 
     def get_all_auctions(self) -> List[Auction]:
         return (
@@ -19,30 +82,299 @@ class AuctionRepository:
             .all()
         )
 
-    def upsert_auctions(self, auctions: List[dict]) -> int:
-        if not auctions:
-            return 0
+    def get_date_range(self) -> Tuple[Optional[date], Optional[date]]:
+        """Return the first and last auction_date stored, or (None, None) when empty."""
+        first, last = self.session.query(func.min(Auction.auction_date), func.max(Auction.auction_date)).one()
+        return first, last
 
-        inserted_count = 0
+    def query_auctions(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        regions: Optional[Sequence[str]] = None,
+        technologies: Optional[Sequence[str]] = None,
+        columns: Optional[Sequence[str]] = None,
+        after: Optional[Tuple[date, str, str]] = None,
+        limit: Optional[int] = PAGE_SIZE,
+        descending: bool = False
+    ) -> AuctionPage:
+        """Fetch one page of auctions in (auction_date, region, technology) order.
 
-        for auction_data in auctions:
-            if not self._validate_auction(auction_data):
-                continue
+        Pages continue from the key of the last row seen rather than an offset, so
+        each page costs the same however deep it is. A limit of None returns every
+        matching row. The key columns are always part of the projection.
+        """
+        columns = self._projection(columns)
+        stmt = self._select(
+            [getattr(Auction, column) for column in columns],
+            start, end, regions, technologies, after, limit + 1 if limit is not None else None, descending
+        )
 
-            stmt = insert(Auction).values(**auction_data)
-            stmt = stmt.on_conflict_do_nothing(
-                index_elements=['auction_date', 'region', 'technology']
-            )
-            result = self.session.execute(stmt)
-            if result.rowcount > 0:
-                inserted_count += 1
+        rows = [row._asdict() for row in self.session.execute(stmt)]
+        if limit is None or len(rows) <= limit:
+            return AuctionPage(rows, None)
+        rows = rows[:limit]
+        return AuctionPage(rows, tuple(rows[-1][column] for column in self.KEY_COLUMNS))
+
+    def fetch_frame(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        regions: Optional[Sequence[str]] = None,
+        technologies: Optional[Sequence[str]] = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """Load matching auctions straight into a typed DataFrame, without building ORM objects.
+
+        Numeric columns come back as float64, region and technology as categoricals.
+        """
+        columns = self._projection(columns)
+        types = {column: Auction.__table__.columns[column].type for column in columns}
+        stmt = self._select(
+            [
+                cast(getattr(Auction, column), Float).label(column)
+                if isinstance(types[column], Numeric) else getattr(Auction, column)
+                for column in columns
+            ],
+            start, end, regions, technologies
+        )
+
+        dtypes = {}
+        dates = []
+        for column, column_type in types.items():
+            if column in ('region', 'technology'):
+                dtypes[column] = 'category'
+            elif isinstance(column_type, (Date, DateTime)):
+                dates.append(column)
+            elif isinstance(column_type, Numeric):
+                dtypes[column] = 'float64'
+            elif isinstance(column_type, Integer):
+                dtypes[column] = 'Int64'
+            else:
+                dtypes[column] = 'object'
+
+        if self.session.get_bind().dialect.name == 'postgresql':
+            frame = self._copy_frame(stmt, dtypes)
+        else:
+            frame = self._stream_frame(stmt, columns)
+        for column in dates:
+            frame[column] = pd.to_datetime(frame[column])
+        return frame.astype(dtypes)
+
+    def _copy_frame(self, stmt: Select, dtypes: Dict[str, str]) -> pd.DataFrame:
+        compiled = stmt.compile(
+            dialect=self.session.get_bind().dialect, compile_kwargs={"render_postcompile": True}
+        )
+        buffer = io.StringIO()
+        cursor = self.session.connection().connection.cursor()
+        try:
+            query = cursor.mogrify(str(compiled), compiled.params).decode()
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", buffer)
+        finally:
+            cursor.close()
+        buffer.seek(0)
+        # Only empty fields are missing, a region called "NA" is not
+        return pd.read_csv(buffer, dtype=dtypes, keep_default_na=False, na_values=[""])
+
+    def _stream_frame(self, stmt: Select, columns: List[str]) -> pd.DataFrame:
+        result = self.session.connection().execution_options(
+            stream_results=True, yield_per=self.FETCH_CHUNK_SIZE
+        ).execute(stmt)
+        chunks = [pd.DataFrame.from_records(rows, columns=columns) for rows in result.partitions()]
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+
+    def _projection(self, columns: Optional[Sequence[str]]) -> List[str]:
+        columns = list(self.KEY_COLUMNS) + [
+            column for column in columns or self.UPDATABLE_COLUMNS if column not in self.KEY_COLUMNS
+        ]
+        unknown = set(columns) - set(Auction.__table__.columns.keys())
+        if unknown:
+            raise ValueError(f"Unknown auction columns: {', '.join(sorted(unknown))}")
+        return columns
+
+    def _select(
+        self, projection, start=None, end=None, regions=None, technologies=None,
+        after=None, limit=None, descending=False
+    ) -> Select:
+        key = [getattr(Auction, column) for column in self.KEY_COLUMNS]
+        stmt = _apply_filters(select(*projection), Auction, Auction.auction_date, start, end, regions, technologies)
+        if after is not None:
+            stmt = stmt.where(tuple_(*key) < tuple_(*after) if descending else tuple_(*key) > tuple_(*after))
+            # Implied by the row comparison, but usable as an index bound when
+            # the key columns come through the compact storage view
+            stmt = stmt.where(key[0] <= after[0] if descending else key[0] >= after[0])
+        stmt = stmt.order_by(*(column.desc() for column in key) if descending else key)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return stmt
 
+    def upsert_auctions(self, auctions: List[dict], update_existing: bool = False) -> UpsertResult:
+        rows = [auction_data for auction_data in auctions if self._validate_auction(auction_data)]
+        if not rows:
+            return UpsertResult(0)
+
+        self.session.execute(text(
+            "CREATE TEMP TABLE auction_stage ("
+            "ord integer, auction_date date, region varchar, technology varchar, "
+            "volume_offered_mwh numeric, volume_allocated_mwh numeric, weighted_avg_price_eur numeric, "
+            "source_file varchar"
+            ") ON COMMIT DROP"
+        ))
+        self._copy("auction_stage", self._record_buffer(rows))
+
+        return self._merge(
+            "auction_stage",
+            "auction_date, region, technology, volume_offered_mwh, volume_allocated_mwh, "
+            "weighted_avg_price_eur, source_file, :created_at",
+            {"created_at": datetime.utcnow()},
+            update_existing
+        )
+
+    def load_batch(self, batch: "AuctionBatch", update_existing: bool = False) -> UpsertResult:
+        if batch.num_rows == 0:
+            return UpsertResult(0)
+
+        self.session.execute(text(
+            "CREATE TEMP TABLE auction_load ("
+            "ord integer, auction_date date, region smallint, technology smallint, "
+            "volume_offered bigint, volume_allocated bigint, price bigint"
+            ") ON COMMIT DROP"
+        ))
+        self._copy("auction_load", self._copy_buffer(batch))
+
+        return self._merge(
+            "auction_load",
+            "auction_date, (CAST(:regions AS varchar[]))[region + 1], "
+            "(CAST(:technologies AS varchar[]))[technology + 1], "
+            "volume_offered::numeric / :volume_scale, volume_allocated::numeric / :volume_scale, "
+            "price::numeric / :price_scale, :source_file, :created_at",
+            {
+                "regions": list(batch.REGIONS),
+                "technologies": list(batch.TECHNOLOGIES),
+                "volume_scale": batch.VOLUME_SCALE,
+                "price_scale": batch.PRICE_SCALE,
+                "source_file": batch.source_file,
+                "created_at": datetime.utcnow(),
+            },
+            update_existing
+        )
+
+    def _copy(self, table: str, buffer: io.StringIO):
+        cursor = self.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table} FROM STDIN", buffer)
+        finally:
+            cursor.close()
+
+    def _merge(self, staging: str, select_columns: str, params: dict, update_existing: bool) -> UpsertResult:
+        if self._compact is None:
+            self._compact = compact.is_compact(self.session.connection())
+
+        if self._compact:
+            source = f"(SELECT {select_columns} FROM {staging}) AS source ({', '.join(self._source_columns())})"
+            for statement in compact.dimension_inserts(source):
+                self.session.execute(text(statement), params)
+            sql = self._compact_merge_sql(staging, select_columns, update_existing)
+        else:
+            sql = self._merge_sql(staging, select_columns, update_existing)
+
+        # Updates leave created_at alone, so only inserted rows carry this
+        # statement's timestamp (xmax would tell too, but not on partitioned tables)
+        inserted, updated, staged = self.session.execute(text(sql), params).one()
         self.session.commit()
-        return inserted_count
+        return UpsertResult(inserted, updated, staged - inserted - updated)
+
+    def _merge_sql(self, staging: str, select_columns: str, update_existing: bool) -> str:
+        return (
+            "WITH merged AS ("
+            f"INSERT INTO auctions ({', '.join(self._source_columns())}) "
+            f"{self._deduplicated(staging, select_columns, update_existing)} "
+            f"ON CONFLICT (auction_date, region, technology) "
+            f"{self._on_conflict('auctions', self.VALUE_COLUMNS, ('source_file',), update_existing)} "
+            "RETURNING created_at = :created_at AS inserted"
+            f") {self._counts_sql(staging)}"
+        )
 
-    def get_processed_files(self) -> set:
-        results = self.session.query(Auction.source_file).distinct().all()
-        return {r[0] for r in results if r[0]}
+    def _compact_merge_sql(self, staging: str, select_columns: str, update_existing: bool) -> str:
+        source = (
+            f"({self._deduplicated(staging, select_columns, update_existing)}) "
+            f"AS source ({', '.join(self._source_columns())})"
+        )
+        measures = tuple(measure.fact_column for measure in compact.MEASURES)
+        return (
+            "WITH merged AS ("
+            f"INSERT INTO {compact.FACT_TABLE} ({', '.join(compact.FACT_COLUMNS)}) "
+            f"{compact.fact_select(source)} "
+            f"ON CONFLICT ({', '.join(compact.FACT_KEY)}) "
+            f"{self._on_conflict(compact.FACT_TABLE, measures, ('source_file_id',), update_existing)} "
+            "RETURNING created_at = :created_at AS inserted"
+            f") {self._counts_sql(staging)}"
+        )
+
+    def _source_columns(self) -> Tuple[str, ...]:
+        return self.INSERT_COLUMNS + ('created_at',)
+
+    @staticmethod
+    def _deduplicated(staging: str, select_columns: str, update_existing: bool) -> str:
+        # One statement may not affect the same row twice: within a load the
+        # first row wins, like repeated inserts would; when updating, the last one does.
+        order = "DESC" if update_existing else "ASC"
+        return (
+            f"SELECT DISTINCT ON (auction_date, region, technology) {select_columns} FROM {staging} "
+            f"ORDER BY auction_date, region, technology, ord {order}"
+        )
+
+    @staticmethod
+    def _on_conflict(table: str, values: Sequence[str], extra: Sequence[str], update_existing: bool) -> str:
+        if not update_existing:
+            return "DO NOTHING"
+        updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in tuple(values) + tuple(extra))
+        current = ", ".join(f"{table}.{col}" for col in values)
+        proposed = ", ".join(f"EXCLUDED.{col}" for col in values)
+        # Rows whose values already match are left alone, so they cost no
+        # new tuple version, index entries or WAL
+        return f"DO UPDATE SET {updates} WHERE ({current}) IS DISTINCT FROM ({proposed})"
+
+    @staticmethod
+    def _counts_sql(staging: str) -> str:
+        return (
+            "SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted), "
+            f"(SELECT count(*) FROM (SELECT DISTINCT auction_date, region, technology FROM {staging}) AS staged_keys) "
+            "FROM merged"
+        )
+
+    @classmethod
+    def _record_buffer(cls, rows: List[dict]) -> io.StringIO:
+        buffer = io.StringIO()
+        for position, auction_data in enumerate(rows):
+            values = [auction_data.get(col) for col in cls.INSERT_COLUMNS]
+            buffer.write(f"{position}\t" + "\t".join(_copy_text(value) for value in values) + "\n")
+        buffer.seek(0)
+        return buffer
+
+    @staticmethod
+    def _copy_buffer(batch: "AuctionBatch") -> io.StringIO:
+        null = batch.NULL_FIXED
+
+        def fixed(value: int) -> str:
+            return "\\N" if value == null else str(value)
+
+        buffer = io.StringIO()
+        rows = zip(
+            batch.auction_date.astype(str).tolist(),
+            batch.region.tolist(),
+            batch.technology.tolist(),
+            batch.volume_offered_mwh.tolist(),
+            batch.volume_allocated_mwh.tolist(),
+            batch.weighted_avg_price_eur.tolist(),
+        )
+        for position, (auction_date, region, technology, offered, allocated, price) in enumerate(rows):
+            buffer.write(
+                f"{position}\t{auction_date}\t{region}\t{technology}\t"
+                f"{fixed(offered)}\t{fixed(allocated)}\t{fixed(price)}\n"
+            )
+        buffer.seek(0)
+        return buffer
 
     def _validate_auction(self, auction_data: dict) -> bool:
         required_fields = ['auction_date', 'region', 'technology']
@@ -52,6 +384,266 @@ class AuctionRepository:
         return True
 
 
+class IngestedFileRepository:
+
+    LOOKUP_CHUNK_SIZE = 1000
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def has_files(self) -> bool:
+        return self.session.query(IngestedFile.id).limit(1).first() is not None
+
+    def get_archived_files(self) -> List[Tuple[str, str]]:
+        results = (
+            self.session.query(IngestedFile.filename, IngestedFile.content_hash)
+            .order_by(IngestedFile.id)
+            .all()
+        )
+        return [(filename, content_hash) for filename, content_hash in results]
+
+    def set_row_count(self, filename: str, row_count: int, parse_seconds: Optional[float] = None):
+        values = {IngestedFile.row_count: row_count}
+        if parse_seconds is not None:
+            values[IngestedFile.parse_seconds] = parse_seconds
+        (
+            self.session.query(IngestedFile)
+            .filter(IngestedFile.filename == filename)
+            .update(values)
+        )
+        self.session.commit()
+
+    def get_file_hashes(self, filenames: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        query = self.session.query(IngestedFile.filename, IngestedFile.content_hash)
+        if filenames is None:
+            return {filename: content_hash for filename, content_hash in query.all()}
+
+        # Looked up through the unique filename index, a chunk per round-trip
+        filenames = sorted(set(filenames))
+        file_hashes = {}
+        for start in range(0, len(filenames), self.LOOKUP_CHUNK_SIZE):
+            chunk = filenames[start:start + self.LOOKUP_CHUNK_SIZE]
+            file_hashes.update(query.filter(IngestedFile.filename.in_(chunk)).all())
+        return file_hashes
+
+    def find_content_hashes(self, hashes: Iterable[str]) -> set:
+        """Return which of `hashes` belong to an ingested file, through the content_hash index."""
+        query = self.session.query(IngestedFile.content_hash).distinct()
+        hashes = sorted(set(hashes))
+        found = set()
+        for start in range(0, len(hashes), self.LOOKUP_CHUNK_SIZE):
+            chunk = hashes[start:start + self.LOOKUP_CHUNK_SIZE]
+            found.update(content_hash for content_hash, in query.filter(IngestedFile.content_hash.in_(chunk)))
+        return found
+
+    def record_file(
+        self,
+        filename: str,
+        content_hash: str,
+        size_bytes: int,
+        row_count: Optional[int] = 0,
+        parse_seconds: Optional[float] = None
+    ):
+        values = {
+            "filename": filename,
+            "content_hash": content_hash,
+            "size_bytes": size_bytes,
+            "parse_seconds": parse_seconds,
+            "fetched_at": datetime.utcnow(),
+        }
+        # None keeps the stored count, e.g. when only some sheets were reparsed
+        if row_count is not None:
+            values["row_count"] = row_count
+        stmt = insert(IngestedFile).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['filename'],
+            set_={k: stmt.excluded[k] for k in values if k != "filename"}
+        )
+        self.session.execute(stmt)
+        self.session.commit()
+
+    def get_sheet_hashes(
+        self,
+        filenames: Iterable[str],
+        archives: Iterable[str] = ()
+    ) -> Dict[str, Dict[str, str]]:
+        """Sheet hashes of `filenames` and of the members of `archives`, stored as "<archive>!<member>"."""
+        query = self.session.query(IngestedSheet.source_file, IngestedSheet.sheet_name, IngestedSheet.content_hash)
+
+        filenames = sorted(set(filenames))
+        results = []
+        for start in range(0, len(filenames), self.LOOKUP_CHUNK_SIZE):
+            chunk = filenames[start:start + self.LOOKUP_CHUNK_SIZE]
+            results += query.filter(IngestedSheet.source_file.in_(chunk)).all()
+        for archive in sorted(set(archives)):
+            # _ and % in the name match loosely, so the prefix is checked again
+            prefix = f"{archive}!"
+            results += [
+                row for row in query.filter(IngestedSheet.source_file.like(f"{prefix}%"))
+                if row.source_file.startswith(prefix)
+            ]
+
+        sheet_hashes: Dict[str, Dict[str, str]] = {}
+        for source_file, sheet_name, content_hash in results:
+            sheet_hashes.setdefault(source_file, {})[sheet_name] = content_hash
+        return sheet_hashes
+
+    def record_sheets(self, source_file: str, sheet_hashes: Dict[str, str]):
+        if not sheet_hashes:
+            return
+
+        now = datetime.utcnow()
+        stmt = insert(IngestedSheet).values([
+            {"source_file": source_file, "sheet_name": sheet_name, "content_hash": content_hash, "updated_at": now}
+            for sheet_name, content_hash in sheet_hashes.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['source_file', 'sheet_name'],
+            set_={"content_hash": stmt.excluded.content_hash, "updated_at": stmt.excluded.updated_at}
+        )
+        self.session.execute(stmt)
+        self.session.commit()
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+class RollupRepository:
+
+    GROUP_COLUMNS = ('month', 'region', 'technology')
+
+    _AGGREGATE_SQL = (
+        "INSERT INTO auction_monthly_rollups ("
+        "month, region, technology, record_count, volume_offered_mwh, volume_allocated_mwh, "
+        "price_sum, priced_count, price_volume_sum, refreshed_at) "
+        "SELECT {month}, region, technology, count(*), sum(volume_offered_mwh), sum(volume_allocated_mwh), "
+        "sum(weighted_avg_price_eur), count(weighted_avg_price_eur), "
+        "sum(weighted_avg_price_eur * volume_allocated_mwh), :refreshed_at "
+        "FROM {source} GROUP BY 1, region, technology"
+    )
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def refresh(self, months: Iterable[date]) -> int:
+        """Recompute the rollups of the given months from auctions, returning the rows written."""
+        months = sorted({month_start(month) for month in months})
+        if not months:
+            return 0
+
+        # Each month is joined as a date range so the auction_date indexes stay usable
+        params = {"months": months, "refreshed_at": datetime.utcnow()}
+        self.session.execute(text("DELETE FROM auction_monthly_rollups WHERE month = ANY(:months)"), params)
+        written = self.session.execute(text(self._AGGREGATE_SQL.format(
+            month="months.month",
+            source=(
+                "unnest(CAST(:months AS date[])) AS months(month) JOIN auctions "
+                "ON auction_date >= months.month AND auction_date < months.month + interval '1 month'"
+            )
+        )), params).rowcount
+        self.session.commit()
+        return written
+
+    def rebuild(self) -> int:
+        self.session.execute(text("DELETE FROM auction_monthly_rollups"))
+        written = self.session.execute(text(self._AGGREGATE_SQL.format(
+            month="date_trunc('month', auction_date)::date", source="auctions"
+        )), {"refreshed_at": datetime.utcnow()}).rowcount
+        self.session.commit()
+        return written
+
+    def get_rollups(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        regions: Optional[Sequence[str]] = None,
+        technologies: Optional[Sequence[str]] = None
+    ) -> List[AuctionMonthlyRollup]:
+        query = self._filtered(self.session.query(AuctionMonthlyRollup), start, end, regions, technologies)
+        return query.order_by(
+            AuctionMonthlyRollup.month, AuctionMonthlyRollup.region, AuctionMonthlyRollup.technology
+        ).all()
+
+    def get_totals(
+        self,
+        group_by: Sequence[str] = (),
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        regions: Optional[Sequence[str]] = None,
+        technologies: Optional[Sequence[str]] = None
+    ) -> List[dict]:
+        """Sum the rollups over the given month range, grouped by any of month, region and technology.
+
+        avg_price counts unpriced auctions as zero, weighted_avg_price weights by allocated volume.
+        """
+        unknown = set(group_by) - set(self.GROUP_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot group rollups by {', '.join(sorted(unknown))}")
+
+        rollup = AuctionMonthlyRollup
+        keys = [getattr(rollup, column) for column in group_by]
+        record_count = func.sum(rollup.record_count)
+        allocated = func.sum(rollup.volume_allocated_mwh)
+        price_sum = func.sum(rollup.price_sum)
+        price_volume_sum = func.sum(rollup.price_volume_sum)
+
+        query = self.session.query(
+            *keys,
+            record_count.label('record_count'),
+            func.sum(rollup.volume_offered_mwh).label('volume_offered_mwh'),
+            allocated.label('volume_allocated_mwh'),
+            price_sum.label('price_sum'),
+            func.sum(rollup.priced_count).label('priced_count'),
+            price_volume_sum.label('price_volume_sum'),
+        )
+        query = self._filtered(query, start, end, regions, technologies)
+        if keys:
+            query = query.group_by(*keys).order_by(*keys)
+
+        totals = []
+        for row in query.all():
+            total = row._asdict()
+            if not total['record_count']:
+                continue
+            total['avg_price'] = (total['price_sum'] or 0) / total['record_count']
+            total['weighted_avg_price'] = (
+                total['price_volume_sum'] / total['volume_allocated_mwh']
+                if total['volume_allocated_mwh'] else None
+            )
+            totals.append(total)
+        return totals
+
+    @staticmethod
+    def _filtered(query, start, end, regions, technologies):
+        if start is not None:
+            start = month_start(start)
+        return _apply_filters(
+            query, AuctionMonthlyRollup, AuctionMonthlyRollup.month, start, end, regions, technologies
+        )
+
+
+class StageMetric(NamedTuple):
+    stage: str
+    name: Optional[str] = None
+    source_file: Optional[str] = None
+    items: Optional[int] = None
+    size_bytes: Optional[int] = None
+    seconds: Optional[float] = None
+
+
+class StageTrend(NamedTuple):
+    scrape_log_id: int
+    run_at: datetime
+    status: str
+    # Metrics of the stage in that run
+    entries: int
+    items: Optional[int]
+    size_bytes: Optional[int]
+    seconds: Optional[float]
+    max_seconds: Optional[float]
+
+
 class ScrapeLogRepository:
 
     def __init__(self, session: Session):
@@ -61,7 +653,8 @@ class ScrapeLogRepository:
         self,
         status: str,
         records_added: int = 0,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        metrics: Iterable[StageMetric] = ()
     ) -> ScrapeLog:
         if status not in ('success', 'failure'):
             raise ValueError("Status must be 'success' or 'failure'")
@@ -73,5 +666,50 @@ class ScrapeLogRepository:
             error_message=error_message
         )
         self.session.add(log)
+        self.session.flush()
+        self.session.add_all([ScrapeMetric(scrape_log_id=log.id, **metric._asdict()) for metric in metrics])
         self.session.commit()
         return log
+
+    def get_run_metrics(self, scrape_log_id: int, stage: Optional[str] = None) -> List[ScrapeMetric]:
+        query = self.session.query(ScrapeMetric).filter(ScrapeMetric.scrape_log_id == scrape_log_id)
+        if stage is not None:
+            query = query.filter(ScrapeMetric.stage == stage)
+        return query.order_by(ScrapeMetric.id).all()
+
+    def get_stage_trend(
+        self,
+        stage: str,
+        name: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[StageTrend]:
+        """Totals of one stage's metrics per run, oldest run first.
+
+        With a limit, only the most recent runs are returned.
+        """
+        query = (
+            self.session.query(
+                ScrapeLog.id,
+                ScrapeLog.run_at,
+                ScrapeLog.status,
+                func.count(ScrapeMetric.id),
+                cast(func.sum(ScrapeMetric.items), BigInteger),
+                cast(func.sum(ScrapeMetric.size_bytes), BigInteger),
+                func.sum(ScrapeMetric.seconds),
+                func.max(ScrapeMetric.seconds),
+            )
+            .join(ScrapeMetric, ScrapeMetric.scrape_log_id == ScrapeLog.id)
+            .filter(ScrapeMetric.stage == stage)
+        )
+        if name is not None:
+            query = query.filter(ScrapeMetric.name == name)
+        if since is not None:
+            query = query.filter(ScrapeLog.run_at >= since)
+
+        query = query.group_by(ScrapeLog.id, ScrapeLog.run_at, ScrapeLog.status)
+        if limit is not None:
+            rows = query.order_by(ScrapeLog.run_at.desc(), ScrapeLog.id.desc()).limit(limit).all()[::-1]
+        else:
+            rows = query.order_by(ScrapeLog.run_at, ScrapeLog.id).all()
+        return [StageTrend(*row) for row in rows]
@@ -0,0 +1,100 @@
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from config.logging import logger
+from src.database.models import Base, SchemaVersion
+
+SCHEMA_VERSION = 6
+
+# Statements that bring a database from the previous version to the keyed
+# one. They also run after create_all on unversioned databases that already
+# hold tables, so each one must be idempotent (IF NOT EXISTS and friends).
+MIGRATIONS: Dict[int, List[str]] = {
+    2: [
+        "ALTER TABLE ingested_files ADD COLUMN IF NOT EXISTS parse_seconds double precision",
+    ],
+    3: [
+        "CREATE INDEX IF NOT EXISTS ix_auctions_technology_date ON auctions (technology, auction_date) "
+        "INCLUDE (volume_offered_mwh, volume_allocated_mwh, weighted_avg_price_eur)",
+        "CREATE INDEX IF NOT EXISTS ix_auctions_region_date ON auctions (region, auction_date)",
+        "CREATE INDEX IF NOT EXISTS ix_auctions_auction_date_brin ON auctions USING brin (auction_date)",
+    ],
+    4: [
+        "CREATE TABLE IF NOT EXISTS auction_monthly_rollups ("
+        "month date NOT NULL, region varchar(100) NOT NULL, technology varchar(50) NOT NULL, "
+        "record_count integer NOT NULL, volume_offered_mwh numeric(20, 2), volume_allocated_mwh numeric(20, 2), "
+        "price_sum numeric(20, 4), priced_count integer NOT NULL, price_volume_sum numeric(30, 6), "
+        "refreshed_at timestamp without time zone NOT NULL, "
+        "PRIMARY KEY (month, region, technology))",
+        "INSERT INTO auction_monthly_rollups "
+        "SELECT date_trunc('month', auction_date)::date, region, technology, count(*), "
+        "sum(volume_offered_mwh), sum(volume_allocated_mwh), sum(weighted_avg_price_eur), "
+        "count(weighted_avg_price_eur), sum(weighted_avg_price_eur * volume_allocated_mwh), now() "
+        "FROM auctions GROUP BY 1, 2, 3 ON CONFLICT DO NOTHING",
+    ],
+    5: [
+        "CREATE TABLE IF NOT EXISTS scrape_metrics ("
+        "id serial PRIMARY KEY, "
+        "scrape_log_id integer NOT NULL REFERENCES scrape_logs (id) ON DELETE CASCADE, "
+        "stage varchar(20) NOT NULL, name varchar(255), source_file varchar(255), "
+        "items bigint, size_bytes bigint, seconds double precision)",
+        "CREATE INDEX IF NOT EXISTS ix_scrape_metrics_scrape_log_id ON scrape_metrics (scrape_log_id)",
+    ],
+    6: [
+        "CREATE INDEX IF NOT EXISTS ix_ingested_sheets_source_file_pattern "
+        "ON ingested_sheets (source_file text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_ingested_files_content_hash ON ingested_files (content_hash)",
+    ],
+}
+
+# Arbitrary key serialising schema upgrades across processes
+_ADVISORY_LOCK_KEY = 0x45455801
+
+
+def advisory_lock(conn: Connection):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+
+def current_version(conn: Connection):
+    if not conn.dialect.has_table(conn, SchemaVersion.__tablename__):
+        return None
+    return conn.execute(text("SELECT max(version) FROM schema_version")).scalar()
+
+
+def ensure_schema(engine: Engine) -> int:
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version is not None and version >= SCHEMA_VERSION:
+        if version > SCHEMA_VERSION:
+            logger.warning(f"Database schema version {version} is newer than this code ({SCHEMA_VERSION})")
+        return version
+
+    with engine.begin() as conn:
+        advisory_lock(conn)
+        version = current_version(conn)
+        if version is not None and version >= SCHEMA_VERSION:
+            return version
+
+        if version is None:
+            # create_all builds current tables, so an empty database needs no migrations
+            empty = not conn.dialect.has_table(conn, "auctions")
+            logger.info("Creating database schema")
+            Base.metadata.create_all(conn)
+            start = SCHEMA_VERSION if empty else 1
+        else:
+            start = version
+
+        for target in range(start + 1, SCHEMA_VERSION + 1):
+            logger.info(f"Migrating database schema to version {target}")
+            for statement in MIGRATIONS.get(target, []):
+                conn.execute(text(statement))
+
+        conn.execute(text("DELETE FROM schema_version"))
+        conn.execute(
+            SchemaVersion.__table__.insert().values(version=SCHEMA_VERSION, applied_at=datetime.utcnow())
+        )
+    return SCHEMA_VERSION
@@ -1,11 +1,15 @@
 from src.scraping.scraper import EEXScraper, run_scrape
+from src.scraping.reparse import run_reparse
 from src.scraping.parser import AuctionParser
+from src.scraping.batch import AuctionBatch
 from src.scraping.enums import Technology, Region
 
 __all__ = [
     'EEXScraper',
     'run_scrape',
+    'run_reparse',
     'AuctionParser',
+    'AuctionBatch',
     'Technology',
     'Region',
 ]
\ No newline at end of file
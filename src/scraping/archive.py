@@ -0,0 +1,137 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import BinaryIO, Iterable, List, Optional, Tuple
+
+from config.settings import settings
+from config.logging import logger
+from src.scraping.layouts import LayoutRegistry, LayoutStats, worker_layouts
+from src.scraping.parser import AuctionParser
+from src.scraping.sheets import SheetTracker
+
+WORKBOOK_EXTENSIONS = (".xlsx", ".xls")
+
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(".zip")
+
+
+def member_source(archive_name: str, member: str) -> str:
+    return f"{archive_name}!{member}"
+
+
+def list_workbook_members(archive: zipfile.ZipFile) -> List[str]:
+    members = []
+    for info in archive.infolist():
+        name = info.filename
+        if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+            continue
+        if name.lower().endswith(WORKBOOK_EXTENSIONS):
+            members.append(name)
+    return members
+
+
+def _parse_member(
+    task: Tuple[str, str, str, bool, Optional[SheetTracker]]
+) -> Tuple[str, List[dict], Optional[LayoutStats], Optional[SheetTracker]]:
+    archive_path, archive_name, member, use_layouts, sheets = task
+    layouts = worker_layouts() if use_layouts else None
+    with zipfile.ZipFile(archive_path) as archive:
+        records = _parse_open_member(archive, archive_name, member, layouts, sheets)
+    return member, records, layouts.drain() if layouts is not None else None, sheets
+
+
+def _parse_open_member(
+    archive: zipfile.ZipFile,
+    archive_name: str,
+    member: str,
+    layouts: Optional[LayoutRegistry] = None,
+    sheets: Optional[SheetTracker] = None
+) -> List[dict]:
+    # openpyxl needs a seekable file, zip member streams are not
+    with archive.open(member) as source, \
+            tempfile.SpooledTemporaryFile(max_size=settings.SPOOL_MAX_MEMORY_BYTES) as spooled:
+        shutil.copyfileobj(source, spooled, 1024 * 1024)
+        spooled.seek(0)
+        parser = AuctionParser(source_file=member_source(archive_name, member), layouts=layouts, sheets=sheets)
+        return parser.parse_excel(spooled)
+
+
+def _member_tracker(sheets: Optional[SheetTracker], archive_name: str, member: str) -> Optional[SheetTracker]:
+    if sheets is None:
+        return None
+    source_file = member_source(archive_name, member)
+    return SheetTracker({source_file: sheets.known.get(source_file, {})})
+
+
+def _collect(
+    results: Iterable[Tuple[str, List[dict], Optional[LayoutStats], Optional[SheetTracker]]],
+    archive_name: str,
+    layouts: Optional[LayoutRegistry],
+    sheets: Optional[SheetTracker]
+) -> List[dict]:
+    records = []
+    for member, member_records, layout_stats, member_sheets in results:
+        if layouts is not None:
+            layouts.merge(layout_stats)
+        if sheets is not None:
+            sheets.merge(member_sheets)
+        logger.info(f"Parsed {len(member_records)} records from {member_source(archive_name, member)}")
+        records.extend(member_records)
+    return records
+
+
+def parse_archive(
+    fileobj: BinaryIO,
+    archive_name: str,
+    workers: Optional[int] = None,
+    layouts: Optional[LayoutRegistry] = None,
+    sheets: Optional[SheetTracker] = None,
+    executor: Optional[Executor] = None
+) -> List[dict]:
+    """Parse every workbook in a ZIP archive.
+
+    Members are parsed on `executor` when given, otherwise on a new pool of
+    `workers` processes.
+    """
+    workers = workers or settings.PARSE_WORKERS or os.cpu_count()
+
+    # Workers reopen the archive by path and only inflate their own member
+    with tempfile.NamedTemporaryFile(suffix=".zip") as archive_file:
+        fileobj.seek(0)
+        shutil.copyfileobj(fileobj, archive_file, 1024 * 1024)
+        archive_file.flush()
+        fileobj.seek(0)
+
+        try:
+            with zipfile.ZipFile(archive_file.name) as archive:
+                members = list_workbook_members(archive)
+                logger.info(f"Found {len(members)} workbooks in {archive_name}")
+
+                if (executor is None and workers <= 1) or len(members) <= 1:
+                    records = []
+                    for member in members:
+                        member_records = _parse_open_member(archive, archive_name, member, layouts, sheets)
+                        logger.info(f"Parsed {len(member_records)} records from {member_source(archive_name, member)}")
+                        records.extend(member_records)
+                    return records
+        except zipfile.BadZipFile as e:
+            logger.error(f"Error opening archive {archive_name}: {e}")
+            return []
+
+        tasks = [
+            (archive_file.name, archive_name, member, layouts is not None, _member_tracker(sheets, archive_name, member))
+            for member in members
+        ]
+        if executor is not None:
+            return _collect(executor.map(_parse_member, tasks), archive_name, layouts, sheets)
+
+        # Downloads may still be running on other threads, so don't fork
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)),
+            mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            return _collect(pool.map(_parse_member, tasks), archive_name, layouts, sheets)
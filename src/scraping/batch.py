@@ -0,0 +1,163 @@
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from src.scraping.enums import Region, Technology
+
+# Scales match the Numeric columns of the auctions table
+VOLUME_SCALE = 100
+PRICE_SCALE = 10_000
+
+NULL_FIXED = np.iinfo(np.int64).min
+
+REGIONS = tuple(region.value for region in Region) + ("All Regions",)
+TECHNOLOGIES = tuple(technology.value for technology in Technology) + ("All Technologies",)
+
+_REGION_CODES = {name: code for code, name in enumerate(REGIONS)}
+_TECHNOLOGY_CODES = {name: code for code, name in enumerate(TECHNOLOGIES)}
+_FIXED_COLUMNS = (
+    ("volume_offered_mwh", VOLUME_SCALE),
+    ("volume_allocated_mwh", VOLUME_SCALE),
+    ("weighted_avg_price_eur", PRICE_SCALE),
+)
+
+
+def to_fixed(value: Optional[Decimal], scale: int) -> int:
+    if value is None:
+        return NULL_FIXED
+    # Same rounding PostgreSQL applies when storing into a Numeric column
+    return int((value * scale).to_integral_value(ROUND_HALF_UP))
+
+
+def from_fixed(value: int, scale: int) -> Optional[Decimal]:
+    if value == NULL_FIXED:
+        return None
+    return Decimal(int(value)) / scale
+
+
+class AuctionBatch(NamedTuple):
+    """Parsed auction rows of one source file, stored column by column.
+
+    Region and technology are codes into REGIONS and TECHNOLOGIES, numbers
+    are fixed-point integers at the table's scale with NULL_FIXED for
+    missing values.
+    """
+
+    REGIONS = REGIONS
+    TECHNOLOGIES = TECHNOLOGIES
+    VOLUME_SCALE = VOLUME_SCALE
+    PRICE_SCALE = PRICE_SCALE
+    NULL_FIXED = NULL_FIXED
+
+    source_file: str
+    auction_date: np.ndarray
+    region: np.ndarray
+    technology: np.ndarray
+    volume_offered_mwh: np.ndarray
+    volume_allocated_mwh: np.ndarray
+    weighted_avg_price_eur: np.ndarray
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.auction_date)
+
+    def region_names(self) -> np.ndarray:
+        return np.asarray(REGIONS, dtype=object)[self.region]
+
+    def technology_names(self) -> np.ndarray:
+        return np.asarray(TECHNOLOGIES, dtype=object)[self.technology]
+
+    def to_records(self) -> List[dict]:
+        columns = {
+            name: [from_fixed(v, scale) for v in getattr(self, name).tolist()]
+            for name, scale in _FIXED_COLUMNS
+        }
+        return [
+            {
+                "auction_date": auction_date,
+                "region": region,
+                "technology": technology,
+                "volume_offered_mwh": offered,
+                "volume_allocated_mwh": allocated,
+                "weighted_avg_price_eur": price,
+                "source_file": self.source_file,
+            }
+            for auction_date, region, technology, offered, allocated, price in zip(
+                self.auction_date.tolist(),
+                self.region_names().tolist(),
+                self.technology_names().tolist(),
+                columns["volume_offered_mwh"],
+                columns["volume_allocated_mwh"],
+                columns["weighted_avg_price_eur"],
+            )
+        ]
+
+    @classmethod
+    def from_records(cls, records: List[dict], source_file: str) -> "AuctionBatch":
+        builder = BatchBuilder(source_file)
+        for record in records:
+            builder.append_codes(
+                record["auction_date"],
+                _REGION_CODES[record["region"]],
+                _TECHNOLOGY_CODES[record["technology"]],
+                record["volume_offered_mwh"],
+                record["volume_allocated_mwh"],
+                record["weighted_avg_price_eur"],
+            )
+        return builder.build()
+
+
+class BatchBuilder:
+
+    def __init__(self, source_file: str):
+        self.source_file = source_file
+        self._columns: Dict[str, list] = {name: [] for name in AuctionBatch._fields[1:]}
+
+    def append(
+        self,
+        auction_date: date,
+        region: Optional[Region],
+        technology: Optional[Technology],
+        volume_offered: Optional[Decimal],
+        volume_allocated: Optional[Decimal],
+        price: Optional[Decimal]
+    ):
+        self.append_codes(
+            auction_date,
+            _REGION_CODES[region.value if region else "All Regions"],
+            _TECHNOLOGY_CODES[technology.value if technology else "All Technologies"],
+            volume_offered,
+            volume_allocated,
+            price,
+        )
+
+    def append_codes(
+        self,
+        auction_date: date,
+        region: int,
+        technology: int,
+        volume_offered: Optional[Decimal],
+        volume_allocated: Optional[Decimal],
+        price: Optional[Decimal]
+    ):
+        columns = self._columns
+        columns["auction_date"].append(auction_date)
+        columns["region"].append(region)
+        columns["technology"].append(technology)
+        columns["volume_offered_mwh"].append(to_fixed(volume_offered, VOLUME_SCALE))
+        columns["volume_allocated_mwh"].append(to_fixed(volume_allocated, VOLUME_SCALE))
+        columns["weighted_avg_price_eur"].append(to_fixed(price, PRICE_SCALE))
+
+    def build(self) -> AuctionBatch:
+        columns = self._columns
+        return AuctionBatch(
+            source_file=self.source_file,
+            auction_date=np.array(columns["auction_date"], dtype="datetime64[D]"),
+            region=np.array(columns["region"], dtype=np.int8),
+            technology=np.array(columns["technology"], dtype=np.int8),
+            volume_offered_mwh=np.array(columns["volume_offered_mwh"], dtype=np.int64),
+            volume_allocated_mwh=np.array(columns["volume_allocated_mwh"], dtype=np.int64),
+            weighted_avg_price_eur=np.array(columns["weighted_avg_price_eur"], dtype=np.int64),
+        )
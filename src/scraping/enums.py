@@ -1,4 +1,30 @@
+import re
+import unicodedata
+from bisect import bisect_right
 from enum import Enum
+from functools import lru_cache
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+CLASSIFIER_CACHE_SIZE = 4096
+
+_SEPARATORS = re.compile(r"[\s\-\u2010\u2011\u2013\u2014_]+")
+
+
+def normalize_label(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower().strip())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _SEPARATORS.sub(" ", text.replace("\u2019", "'")).strip()
+
+
+def _classify_series(series: pd.Series, classify: Callable) -> pd.Series:
+    codes, uniques = pd.factorize(series)
+    classified = np.empty(len(uniques) + 1, dtype=object)
+    classified[:-1] = [classify(str(value)) for value in uniques]
+    # factorize marks missing values with -1, which picks the trailing None
+    return pd.Series(classified[codes], index=series.index, dtype=object)
 
 
 class Technology(Enum):
@@ -9,28 +35,11 @@ class Technology(Enum):
 
     @classmethod
     def from_string(cls, text: str) -> "Technology | None":
-        aliases = {
-            "wind": cls.WIND,
-            "eolien": cls.WIND,
-            "eolien onshore": cls.WIND,
-            "eolien offshore": cls.WIND,
-            "solar": cls.SOLAR,
-            "solaire": cls.SOLAR,
-            "hydro": cls.HYDRO,
-            "hydraulique": cls.HYDRO,
-            "thermal": cls.THERMAL,
-            "thermique": cls.THERMAL,
-        }
-        text_lower = text.lower().strip()
-
-        if text_lower in aliases:
-            return aliases[text_lower]
-
-        for key, tech in aliases.items():
-            if key in text_lower:
-                return tech
+        return _technology_from_string(text)
 
-        return None
+    @classmethod
+    def from_series(cls, series: pd.Series) -> pd.Series:
+        return _classify_series(series, _technology_from_string)
 
 
 class Region(Enum):
@@ -50,10 +59,80 @@ class Region(Enum):
 
     @classmethod
     def from_string(cls, text: str) -> "Region | None":
-        text_lower = text.lower().strip()
+        return _region_from_string(text)
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> pd.Series:
+        return _classify_series(series, _region_from_string)
+
 
-        for region in cls:
-            if region.value.lower() in text_lower or text_lower in region.value.lower():
-                return region
+# Aliases are listed in priority order: when a label mentions several
+# technologies, the first one listed here wins.
+TECHNOLOGY_ALIASES = {
+    "wind": Technology.WIND,
+    "eolien": Technology.WIND,
+    "eolien onshore": Technology.WIND,
+    "eolien offshore": Technology.WIND,
+    "solar": Technology.SOLAR,
+    "solaire": Technology.SOLAR,
+    "hydro": Technology.HYDRO,
+    "hydraulique": Technology.HYDRO,
+    "thermal": Technology.THERMAL,
+    "thermique": Technology.THERMAL,
+}
 
+_TECHNOLOGY_PRIORITY = {tech: i for i, tech in enumerate(Technology)}
+
+# The lookahead reports every alias occurrence, overlapping ones included
+_TECHNOLOGY_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(a) for a in sorted(TECHNOLOGY_ALIASES, key=len, reverse=True)) + "))"
+)
+
+_REGION_NAMES = [normalize_label(region.value) for region in Region]
+_REGIONS = list(Region)
+_REGION_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(name) for name in sorted(_REGION_NAMES, key=len, reverse=True)) + "))"
+)
+_REGION_INDEX = {name: i for i, name in enumerate(_REGION_NAMES)}
+
+# All region names joined in enum order, so one str.find answers "which is
+# the first region whose name contains this text"
+_REGION_HAYSTACK = "\0".join(_REGION_NAMES)
+_REGION_STARTS = [sum(len(name) + 1 for name in _REGION_NAMES[:i]) for i in range(len(_REGION_NAMES))]
+
+
+@lru_cache(maxsize=CLASSIFIER_CACHE_SIZE)
+def _technology_from_string(text: str) -> Optional[Technology]:
+    label = normalize_label(text)
+
+    if label in TECHNOLOGY_ALIASES:
+        return TECHNOLOGY_ALIASES[label]
+
+    best = None
+    for match in _TECHNOLOGY_PATTERN.finditer(label):
+        tech = TECHNOLOGY_ALIASES[match.group(1)]
+        if best is None or _TECHNOLOGY_PRIORITY[tech] < _TECHNOLOGY_PRIORITY[best]:
+            best = tech
+    return best
+
+
+@lru_cache(maxsize=CLASSIFIER_CACHE_SIZE)
+def _region_from_string(text: str) -> Optional[Region]:
+    label = normalize_label(text)
+    if not label:
         return None
+
+    best = None
+    for match in _REGION_PATTERN.finditer(label):
+        index = _REGION_INDEX[match.group(1)]
+        if best is None or index < best:
+            best = index
+
+    if "\0" not in label:
+        position = _REGION_HAYSTACK.find(label)
+        if position >= 0:
+            index = bisect_right(_REGION_STARTS, position) - 1
+            if best is None or index < best:
+                best = index
+
+    return _REGIONS[best] if best is not None else None
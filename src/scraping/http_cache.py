@@ -0,0 +1,58 @@
+from typing import Dict
+
+import requests
+
+from src.scraping.json_cache import JsonLruCache
+
+
+class NotModified:
+    """Type of NOT_MODIFIED, returned for a 304 response. Falsy, like a failed fetch."""
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "NOT_MODIFIED"
+
+
+NOT_MODIFIED = NotModified()
+
+
+class HttpCache(JsonLruCache):
+
+    description = "HTTP cache"
+
+    def __init__(self, path: str, max_entries: int = 1000):
+        super().__init__(path, max_entries)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        with self._lock:
+            entry = self._get(url)
+        if entry is None:
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def has_validators(self, url: str) -> bool:
+        with self._lock:
+            return url in self._entries
+
+    def update(self, url: str, response: requests.Response):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        with self._lock:
+            if not etag and not last_modified:
+                self._entries.pop(url, None)
+                return
+
+            self._store(url, {"etag": etag, "last_modified": last_modified})
+
+    def forget(self, url: str):
+        with self._lock:
+            self._entries.pop(url, None)
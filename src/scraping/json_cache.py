@@ -0,0 +1,62 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from config.logging import logger
+
+
+class JsonLruCache:
+    """Bounded least-recently-used map persisted as one JSON object.
+
+    Subclasses hold self._lock around _get and _store.
+    """
+
+    description = "cache"
+
+    def __init__(self, path: Optional[str], max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable {self.description} {self.path}: {e}")
+            return
+
+        # Entries are persisted least-recently-used first
+        self._entries = OrderedDict(entries)
+
+    def _get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, entry: dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        with self._lock:
+            entries = list(self._entries.items())
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(entries), f)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,108 @@
+import hashlib
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from config.settings import settings
+from src.scraping.json_cache import JsonLruCache
+from src.scraping.parser import MONTH_NAMES
+
+FINGERPRINT_CELLS = 12
+
+_DIGITS = re.compile(r"\d+")
+_MONTHS = re.compile(r"\b(?:" + "|".join(sorted(MONTH_NAMES, key=len, reverse=True)) + r")\b")
+
+
+class LayoutStats(NamedTuple):
+    learned: Dict[str, dict]
+    hits: int
+    misses: int
+
+
+def _mask(value) -> str:
+    # Numbers and month names change every publication, the layout doesn't
+    if not isinstance(value, str):
+        return "#"
+    return _MONTHS.sub("@", _DIGITS.sub("#", value.strip().lower()))
+
+
+def _digest(sheet_name: str, cells: List[str]) -> str:
+    return hashlib.sha1("\x1f".join([_mask(sheet_name)] + cells).encode("utf-8")).hexdigest()
+
+
+def layout_fingerprint(sheet_name: str, head: Sequence[Sequence]) -> Tuple[str, int]:
+    """Return the fingerprint of a sheet and how many leading rows it fully covers."""
+    cells = []
+    for row_idx, row in enumerate(head):
+        for col_idx, value in enumerate(row):
+            if value is None:
+                continue
+            if len(cells) == FINGERPRINT_CELLS:
+                return _digest(sheet_name, cells), row_idx
+            cells.append(f"{row_idx},{col_idx},{_mask(value)}")
+    return _digest(sheet_name, cells), len(head)
+
+
+class LayoutRegistry(JsonLruCache):
+
+    description = "layout registry"
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 500):
+        super().__init__(path, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._learned: Dict[str, dict] = {}
+
+    def resolve(
+        self,
+        sheet_name: str,
+        head: List[Sequence],
+        detect: Callable[[List[Sequence]], Optional[dict]]
+    ) -> Optional[dict]:
+        key, covered = layout_fingerprint(sheet_name, head)
+
+        with self._lock:
+            entry = self._get(key)
+            if entry is not None:
+                self.hits += 1
+                return dict(entry)
+            self.misses += 1
+
+        headers = detect(head)
+
+        # Only cells the fingerprint saw may decide the layout, otherwise a
+        # hit could hand back column positions that no longer hold
+        if headers is not None and headers["row"] < covered:
+            with self._lock:
+                self._store(key, dict(headers))
+                self._learned[key] = dict(headers)
+        return headers
+
+    def drain(self) -> LayoutStats:
+        with self._lock:
+            stats = LayoutStats(self._learned, self.hits, self.misses)
+            self._learned = {}
+            self.hits = 0
+            self.misses = 0
+        return stats
+
+    def merge(self, stats: LayoutStats):
+        with self._lock:
+            for key, headers in stats.learned.items():
+                self._store(key, headers)
+            self.hits += stats.hits
+            self.misses += stats.misses
+
+    def summary(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {len(self)} templates"
+
+
+_worker_layouts: Optional[LayoutRegistry] = None
+
+
+def worker_layouts() -> LayoutRegistry:
+    # Parser processes read the persisted templates once and report what
+    # they learn back to the parent, which owns the file.
+    global _worker_layouts
+    if _worker_layouts is None:
+        _worker_layouts = LayoutRegistry(settings.LAYOUT_CACHE_PATH, settings.LAYOUT_CACHE_MAX_ENTRIES)
+    return _worker_layouts
@@ -0,0 +1,114 @@
+from html.parser import HTMLParser
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _always(href: str) -> bool:
+    return True
+
+
+class _Anchor:
+
+    __slots__ = ("href", "text", "collect_text", "closed")
+
+    def __init__(self, href: str, collect_text: bool):
+        self.href = href
+        self.text: List[str] = []
+        self.collect_text = collect_text
+        self.closed = False
+
+
+class AnchorExtractor(HTMLParser):
+
+    def __init__(self, needs_text: Callable[[str], bool] = _always):
+        super().__init__(convert_charrefs=True)
+        self.needs_text = needs_text
+        self._anchors: List[_Anchor] = []
+        self._open: List[_Anchor] = []
+        self._collecting = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "a":
+            return
+
+        href = None
+        for name, value in attrs:
+            if name == "href":
+                href = value if value is not None else ""
+        if href is None:
+            return
+
+        anchor = _Anchor(href, self.needs_text(href))
+        self._anchors.append(anchor)
+        self._open.append(anchor)
+        if anchor.collect_text:
+            self._collecting += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag == "a" and self._open:
+            self._close(self._open.pop())
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._open:
+            self._close(self._open.pop())
+
+    def handle_data(self, data):
+        if not self._collecting:
+            return
+        stripped = data.strip()
+        if not stripped:
+            return
+        for anchor in self._open:
+            if anchor.collect_text:
+                anchor.text.append(stripped)
+
+    def close(self):
+        super().close()
+        while self._open:
+            self._close(self._open.pop())
+
+    def _close(self, anchor: _Anchor):
+        anchor.closed = True
+        if anchor.collect_text:
+            self._collecting -= 1
+
+    def pop_completed(self) -> Iterator[Tuple[str, str]]:
+        # Anchors are reported in document order, so a finished anchor has
+        # to wait for any enclosing one that is still open.
+        done = 0
+        for anchor in self._anchors:
+            if not anchor.closed:
+                break
+            done += 1
+            yield anchor.href, "".join(anchor.text)
+        del self._anchors[:done]
+
+
+def iter_anchors(
+    html: Union[str, Iterable[str]],
+    needs_text: Callable[[str], bool] = _always
+) -> Iterator[Tuple[str, str]]:
+    extractor = AnchorExtractor(needs_text)
+
+    if isinstance(html, str):
+        chunks = (html[i:i + CHUNK_SIZE] for i in range(0, len(html), CHUNK_SIZE))
+    else:
+        chunks = html
+
+    for chunk in chunks:
+        extractor.feed(chunk)
+        yield from extractor.pop_completed()
+
+    extractor.close()
+    yield from extractor.pop_completed()
+
+
+def classify_link(href: str, link_text: Optional[str]) -> bool:
+    if ".xls" in href.lower():
+        return True
+    if href.endswith(".zip") and link_text:
+        text_lower = link_text.lower()
+        return "download" in text_lower or "result" in text_lower
+    return False
@@ -0,0 +1,43 @@
+import threading
+from typing import Dict, List, Optional
+
+from src.database import StageMetric
+from src.scraping.sheets import SheetTracker
+
+
+class RunMetrics:
+    """Stage measurements and cache counters of one scrape run, safe to record from any thread."""
+
+    def __init__(self):
+        self.metrics: List[StageMetric] = []
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        stage: str,
+        name: Optional[str] = None,
+        source_file: Optional[str] = None,
+        items: Optional[int] = None,
+        size_bytes: Optional[int] = None,
+        seconds: Optional[float] = None
+    ):
+        metric = StageMetric(stage, name, source_file, items, size_bytes, seconds)
+        with self._lock:
+            self.metrics.append(metric)
+
+    def count(self, name: str, hits: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + hits
+
+    def add_sheets(self, sheets: SheetTracker):
+        for source_file, sheet_rows in sheets.rows.items():
+            for sheet_name, rows in sheet_rows.items():
+                self.add("sheet", sheet_name, source_file, items=rows)
+        if sheets.skipped:
+            self.count("sheets_unchanged", sheets.skipped)
+
+    def rows(self) -> List[StageMetric]:
+        with self._lock:
+            counters = [StageMetric("cache", name, items=hits) for name, hits in sorted(self.counters.items())]
+            return self.metrics + counters
@@ -2,12 +2,19 @@ import re
 from datetime import date
 from decimal import Decimal, InvalidOperation
 from io import BytesIO
-from typing import Optional
+from itertools import chain, islice
+from typing import BinaryIO, Iterable, Iterator, Optional, Sequence, Union
 
+import numpy as np
 import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
 
+from config.settings import settings
 from config.logging import logger
+from src.scraping.batch import AuctionBatch, BatchBuilder
 from src.scraping.enums import Technology, Region
+from src.scraping.sheets import sheet_digest, workbook_digest
 
 
 MONTH_NAMES = {
@@ -18,24 +25,182 @@ MONTH_NAMES = {
     "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
 }
 
+HEADER_SCAN_ROWS = 50
+DATE_SCAN_ROWS = 10
+DATE_SCAN_COLUMNS = 5
+BLANK_NUMBERS = ("", "-", "n/a", "N/A")
+
+# Cell strings pandas reads as missing, kept so both backends agree
+NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}) | frozenset(ERROR_CODES)
+
 
 class AuctionParser:
 
-    def __init__(self, source_file: str = ""):
+    def __init__(self, source_file: str = "", layouts=None, sheets=None):
         self.source_file = source_file
+        self.layouts = layouts
+        self.sheets = sheets
+
+    def parse_excel(self, file_content: Union[bytes, BinaryIO]) -> list[dict]:
+        return list(self.iter_records(file_content))
+
+    def iter_records(self, file_content: Union[bytes, BinaryIO]) -> Iterator[dict]:
+        if isinstance(file_content, (bytes, bytearray)):
+            file_content = BytesIO(file_content)
+
+        workbook = self._open_workbook(file_content)
+        if workbook is None:
+            yield from self._iter_dataframe_records(file_content)
+            return
+
+        try:
+            for row in self._iter_workbook_rows(workbook):
+                yield self._as_record(*row)
+        finally:
+            workbook.close()
+
+    def parse_excel_batch(self, file_content: Union[bytes, BinaryIO]) -> AuctionBatch:
+        if isinstance(file_content, (bytes, bytearray)):
+            file_content = BytesIO(file_content)
+
+        workbook = self._open_workbook(file_content)
+        if workbook is None:
+            return AuctionBatch.from_records(list(self._iter_dataframe_records(file_content)), self.source_file)
 
-    def parse_excel(self, file_content: bytes) -> list[dict]:
+        builder = BatchBuilder(self.source_file)
         try:
-            xlsx = pd.ExcelFile(BytesIO(file_content))
+            for row in self._iter_workbook_rows(workbook):
+                builder.append(*row)
+        finally:
+            workbook.close()
+        return builder.build()
+
+    def _iter_dataframe_records(self, file_content: BinaryIO) -> Iterator[dict]:
+        try:
+            xlsx = pd.ExcelFile(file_content)
         except Exception as e:
             logger.error(f"Error loading Excel file: {e}")
-            return []
+            return
 
-        records = []
         for sheet_name in xlsx.sheet_names:
-            records.extend(self._parse_sheet(xlsx, sheet_name))
+            records = self._parse_sheet(xlsx, sheet_name)
+            if self.sheets is not None:
+                self.sheets.count_rows(self.source_file, sheet_name, len(records))
+            yield from records
 
-        return records
+    @staticmethod
+    def _open_workbook(file_content: BinaryIO):
+        if settings.PARSER_BACKEND != "streaming":
+            return None
+        try:
+            return load_workbook(file_content, read_only=True, data_only=True, keep_links=False)
+        except Exception as e:
+            # Legacy .xls and other formats go through pandas instead
+            logger.debug(f"Not an OOXML workbook, falling back to pandas: {e}")
+            file_content.seek(0)
+            return None
+
+    def _iter_workbook_rows(self, workbook) -> Iterator[tuple]:
+        shared_digest = workbook_digest(workbook) if self.sheets is not None else None
+
+        for sheet in workbook.worksheets:
+            if self.sheets is not None:
+                digest = sheet_digest(workbook, sheet, shared_digest)
+                if not self.sheets.should_parse(self.source_file, sheet.title, digest):
+                    logger.debug(f"Skipping unchanged sheet {sheet.title} of {self.source_file}")
+                    continue
+
+            rows = 0
+            for row in self._iter_sheet_rows(sheet):
+                rows += 1
+                yield row
+            if self.sheets is not None:
+                self.sheets.count_rows(self.source_file, sheet.title, rows)
+
+    def _iter_sheet_rows(self, sheet) -> Iterator[tuple]:
+        # Sheets often carry a stale dimension tag, which would cut rows off
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+
+        head = [[self._cell(row, i) for i in range(len(row))] for row in islice(rows, HEADER_SCAN_ROWS)]
+        headers = self._resolve_headers(sheet.title, head)
+        if not headers:
+            return
+
+        body = chain(head[headers["row"] + 1:], rows)
+        preview = list(islice(body, DATE_SCAN_ROWS))
+        auction_date = self._date_from_text(
+            sheet.title,
+            (self._cell(row, i) for row in preview for i in range(min(DATE_SCAN_COLUMNS, len(row))))
+        )
+        record_date = auction_date or date.today()
+
+        for row in chain(preview, body):
+            parsed = self._parse_row(row, headers)
+            if parsed is not None:
+                yield (record_date, *parsed)
+
+    @staticmethod
+    def _cell(row: Sequence, index: Optional[int]):
+        if index is None or index >= len(row):
+            return None
+
+        value = row[index]
+        if isinstance(value, str):
+            return None if value in NA_STRINGS else value
+        if isinstance(value, float):
+            if value != value:
+                return None
+            if value.is_integer():
+                return int(value)
+        return value
+
+    def _parse_row(self, row: Sequence, headers: dict) -> Optional[tuple]:
+        label = self._cell(row, 0)
+        if label is None:
+            return None
+        text = str(label)
+        if not text.strip():
+            return None
+
+        region = Region.from_string(text)
+        technology = Technology.from_string(text)
+        if technology is None:
+            second = self._cell(row, 1)
+            if second is not None:
+                technology = Technology.from_string(str(second))
+        if region is None and technology is None:
+            return None
+
+        offered = self._parse_number(self._cell(row, headers.get("volume_offered_idx")))
+        allocated = self._parse_number(self._cell(row, headers.get("volume_allocated_idx")))
+        if offered is None and allocated is None:
+            return None
+
+        price = self._parse_number(self._cell(row, headers.get("price_idx")))
+        return region, technology, offered, allocated, price
+
+    def _as_record(
+        self,
+        auction_date: date,
+        region: Optional[Region],
+        technology: Optional[Technology],
+        offered: Optional[Decimal],
+        allocated: Optional[Decimal],
+        price: Optional[Decimal]
+    ) -> dict:
+        return {
+            "auction_date": auction_date,
+            "region": region.value if region else "All Regions",
+            "technology": technology.value if technology else "All Technologies",
+            "volume_offered_mwh": offered,
+            "volume_allocated_mwh": allocated,
+            "weighted_avg_price_eur": price,
+            "source_file": self.source_file,
+        }
 
     def _parse_sheet(self, xlsx: pd.ExcelFile, sheet_name: str) -> list[dict]:
         df = pd.read_excel(xlsx, sheet_name=sheet_name, header=None)
@@ -43,7 +208,7 @@ class AuctionParser:
         if df.empty:
             return []
 
-        header_info = self._find_headers(df)
+        header_info = self._find_headers(df, sheet_name)
         if not header_info:
             return []
 
@@ -52,90 +217,143 @@ class AuctionParser:
         df = df.iloc[header_row + 1:].reset_index(drop=True)
 
         auction_date = self._extract_date(df, sheet_name)
-        records = []
+        return self._parse_rows(df, header_info, auction_date)
+
+    def _find_headers(self, df: pd.DataFrame, sheet_name: str = "") -> Optional[dict]:
+        head = df.iloc[:HEADER_SCAN_ROWS].astype(object)
+        headers = self._resolve_headers(sheet_name, head.where(head.notna(), None).values.tolist())
+        if not headers:
+            return None
 
-        for _, row in df.iterrows():
-            record = self._parse_row(row, header_info, auction_date)
-            if record:
-                records.append(record)
+        for key in ("volume_offered", "volume_allocated", "price"):
+            col_idx = headers.get(f"{key}_idx")
+            if col_idx is not None:
+                headers[key] = df.columns[col_idx] if headers["row"] > 0 else col_idx
+        return headers
 
-        return records
+    def _resolve_headers(self, sheet_name: str, head: list) -> Optional[dict]:
+        if self.layouts is None:
+            return self._detect_headers(head)
+        return self.layouts.resolve(sheet_name, head, self._detect_headers)
 
-    def _find_headers(self, df: pd.DataFrame) -> Optional[dict]:
-        for row_idx in range(min(50, len(df))):
-            row_text = " ".join(str(v).lower() for v in df.iloc[row_idx] if pd.notna(v))
+    @staticmethod
+    def _detect_headers(rows: Iterable[Sequence]) -> Optional[dict]:
+        for row_idx, row in enumerate(rows):
+            row_text = " ".join(str(v).lower() for v in row if v is not None)
 
             if "volume" in row_text and any(kw in row_text for kw in {"offered", "allocated", "auctionned", "sold"}):
                 headers = {"row": row_idx}
 
-                for col_idx, val in enumerate(df.iloc[row_idx]):
-                    if pd.isna(val):
+                for col_idx, val in enumerate(row):
+                    if val is None:
                         continue
                     val_lower = str(val).lower()
 
                     if "offered" in val_lower or "auctionned" in val_lower:
-                        headers["volume_offered"] = df.columns[col_idx] if row_idx > 0 else col_idx
                         headers["volume_offered_idx"] = col_idx
                     elif "allocated" in val_lower or "sold" in val_lower:
-                        headers["volume_allocated"] = df.columns[col_idx] if row_idx > 0 else col_idx
                         headers["volume_allocated_idx"] = col_idx
                     elif "price" in val_lower or "average" in val_lower:
-                        headers["price"] = df.columns[col_idx] if row_idx > 0 else col_idx
                         headers["price_idx"] = col_idx
 
                 return headers
 
         return None
 
-    def _parse_row(self, row: pd.Series, headers: dict, auction_date: Optional[date]) -> Optional[dict]:
-        first_val = row.iloc[0] if len(row) > 0 else None
-        if pd.isna(first_val) or not str(first_val).strip():
-            return None
+    def _parse_rows(self, df: pd.DataFrame, headers: dict, auction_date: Optional[date]) -> list[dict]:
+        n_cols = len(df.columns)
+        if df.empty or n_cols == 0:
+            return []
 
-        first_cell = str(first_val)
-        region = Region.from_string(first_cell)
-        technology = Technology.from_string(first_cell)
+        first = df.iloc[:, 0].astype(object)
+        first_text = first[first.notna()].map(str)
+        labels = first_text[first_text.str.strip().ne("")]
+        if labels.empty:
+            return []
 
-        if not technology and len(row) > 1:
-            second_val = row.iloc[1]
-            if pd.notna(second_val):
-                technology = Technology.from_string(str(second_val))
+        regions = Region.from_series(labels)
+        technologies = Technology.from_series(labels)
 
-        if not region and not technology:
-            return None
+        if n_cols > 1:
+            second = df.iloc[:, 1].astype(object).loc[labels.index]
+            fallback = technologies.isna() & second.notna()
+            if fallback.any():
+                technologies[fallback] = Technology.from_series(second[fallback].map(str))
 
-        vol_offered = self._get_column_value(row, headers, "volume_offered_idx")
-        vol_allocated = self._get_column_value(row, headers, "volume_allocated_idx")
+        index = labels.index[(regions.notna() | technologies.notna()).to_numpy()]
+        if index.empty:
+            return []
 
-        if vol_offered is None and vol_allocated is None:
-            return None
+        vol_offered = self._parse_column(df, headers, "volume_offered_idx", index)
+        vol_allocated = self._parse_column(df, headers, "volume_allocated_idx", index)
 
-        return {
-            "auction_date": auction_date or date.today(),
-            "region": region.value if region else "All Regions",
-            "technology": technology.value if technology else "All Technologies",
-            "volume_offered_mwh": vol_offered,
-            "volume_allocated_mwh": vol_allocated,
-            "weighted_avg_price_eur": self._get_column_value(row, headers, "price_idx"),
-            "source_file": self.source_file,
-        }
+        has_volume = np.array(
+            [o is not None or a is not None for o, a in zip(vol_offered, vol_allocated)],
+            dtype=bool
+        )
+        if not has_volume.any():
+            return []
 
-    def _get_column_value(self, row: pd.Series, headers: dict, key: str) -> Optional[Decimal]:
-        if key not in headers:
-            return None
-        idx = headers[key]
-        if idx >= len(row):
-            return None
-        return self._parse_number(row.iloc[idx])
+        index = index[has_volume]
+        vol_offered = [v for v, keep in zip(vol_offered, has_volume) if keep]
+        vol_allocated = [v for v, keep in zip(vol_allocated, has_volume) if keep]
+        price = self._parse_column(df, headers, "price_idx", index)
+        record_date = auction_date or date.today()
+
+        return [
+            self._as_record(record_date, region, technology, offered, allocated, row_price)
+            for region, technology, offered, allocated, row_price in zip(
+                regions.loc[index].tolist(),
+                technologies.loc[index].tolist(),
+                vol_offered,
+                vol_allocated,
+                price,
+            )
+        ]
+
+    def _parse_column(self, df: pd.DataFrame, headers: dict, key: str, index: pd.Index) -> list:
+        col_idx = headers.get(key)
+        if col_idx is None or col_idx >= len(df.columns):
+            return [None] * len(index)
+        column = df.iloc[:, col_idx].loc[index]
+        kind = pd.api.types.infer_dtype(column, skipna=True)
+        if kind in ("integer", "floating", "mixed-integer-float"):
+            return [None if value is None or value != value else Decimal(str(value)) for value in column.tolist()]
+
+        result = [None] * len(index)
+        pending = np.flatnonzero(column.notna().to_numpy())
+        values = column.iloc[pending]
+        if kind != "string":
+            pending, values = self._fill_numbers(result, pending, values)
+        cleaned = values.astype(str).str.replace(",", "", regex=False).str.replace(" ", "", regex=False).str.strip()
+        pending, cleaned = self._fill_numbers(result, pending, cleaned)
+
+        # Whatever to_numeric could not read gets the per-cell parser
+        for pos in pending[~cleaned.isin(BLANK_NUMBERS).to_numpy()].tolist():
+            result[pos] = self._parse_number(column.iloc[pos])
+        return result
+
+    @staticmethod
+    def _fill_numbers(result: list, positions: np.ndarray, values: pd.Series) -> tuple[np.ndarray, pd.Series]:
+        parsed = np.isfinite(pd.to_numeric(values, errors="coerce").astype(float).to_numpy())
+        for pos, value in zip(positions[parsed].tolist(), values[parsed].tolist()):
+            result[pos] = Decimal(str(value))
+        return positions[~parsed], values[~parsed]
 
     def _extract_date(self, df: pd.DataFrame, sheet_name: str) -> Optional[date]:
-        text = sheet_name.lower() + " "
+        values = (
+            df.iloc[row_idx, col_idx]
+            for row_idx in range(min(DATE_SCAN_ROWS, len(df)))
+            for col_idx in range(min(DATE_SCAN_COLUMNS, len(df.columns)))
+        )
+        return self._date_from_text(sheet_name, (v for v in values if pd.notna(v)))
 
-        for row_idx in range(min(10, len(df))):
-            for col_idx in range(min(5, len(df.columns))):
-                val = df.iloc[row_idx, col_idx]
-                if pd.notna(val):
-                    text += str(val).lower() + " "
+    @staticmethod
+    def _date_from_text(sheet_name: str, values: Iterable) -> Optional[date]:
+        text = sheet_name.lower() + " "
+        for val in values:
+            if val is not None:
+                text += str(val).lower() + " "
 
         for month_name, month_num in MONTH_NAMES.items():
             if month_name in text:
@@ -147,15 +365,17 @@ class AuctionParser:
 
     @staticmethod
     def _parse_number(value) -> Optional[Decimal]:
-        if value is None or pd.isna(value):
-            return None
-
         if isinstance(value, (int, float)):
+            if value != value:
+                return None
             return Decimal(str(value))
 
+        if value is None or pd.isna(value):
+            return None
+
         try:
             cleaned = str(value).replace(",", "").replace(" ", "").strip()
-            if cleaned in ("", "-", "n/a", "N/A"):
+            if cleaned in BLANK_NUMBERS:
                 return None
             return Decimal(cleaned)
         except (InvalidOperation, ValueError):
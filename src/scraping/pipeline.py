@@ -0,0 +1,427 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import groupby
+from operator import itemgetter
+from queue import Empty, Full, Queue
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from config.settings import settings
+from config.logging import logger
+from src.database import AuctionRepository, IngestedFileRepository, UpsertResult
+from src.database.repository import month_start
+from src.scraping.archive import is_archive, parse_archive
+from src.scraping.batch import AuctionBatch
+from src.scraping.layouts import LayoutRegistry, LayoutStats, worker_layouts
+from src.scraping.metrics import RunMetrics
+from src.scraping.parser import AuctionParser
+from src.scraping.sheets import SheetTracker, known_sheets_for
+from src.storage import BlobStore
+
+_DONE = object()
+
+
+class FetchedFile(NamedTuple):
+    filename: str
+    content_hash: str
+    size: int
+    # Position on the page, which decides between files sharing auction keys
+    link_index: int
+
+
+class ParsedFile(NamedTuple):
+    filename: str
+    content_hash: str
+    size: int
+    link_index: int
+    records: Optional[List[dict]]
+    sheets: Optional[SheetTracker] = None
+    parse_seconds: Optional[float] = None
+
+
+class ParseResult(NamedTuple):
+    filename: str
+    # One batch per source file, they pickle back far cheaper than records
+    batches: List[AuctionBatch]
+    layout_stats: LayoutStats
+    sheets: SheetTracker
+    parse_seconds: float
+
+
+class _Aborted(Exception):
+    pass
+
+
+def parse_stored_workbook(task: Tuple[str, str, str, Dict[str, Dict[str, str]]]) -> ParseResult:
+    filename, content_hash, store_root, known_sheets = task
+    started = time.perf_counter()
+    layouts = worker_layouts()
+    sheets = SheetTracker(known_sheets)
+    with BlobStore(store_root, settings.SPOOL_MAX_MEMORY_BYTES).open(content_hash) as content:
+        if is_archive(filename):
+            records = parse_archive(content, filename, workers=1, layouts=layouts, sheets=sheets)
+            batches = [
+                AuctionBatch.from_records(list(rows), source_file)
+                for source_file, rows in groupby(records, key=itemgetter("source_file"))
+            ]
+        else:
+            batches = [AuctionParser(source_file=filename, layouts=layouts, sheets=sheets).parse_excel_batch(content)]
+    return ParseResult(filename, batches, layouts.drain(), sheets, time.perf_counter() - started)
+
+
+class StageStats:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.total_depth = 0
+        self.max_depth = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, queue_depth: int):
+        with self._lock:
+            self.items += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self.total_depth += queue_depth
+            self.max_depth = max(self.max_depth, queue_depth)
+
+    def summary(self) -> str:
+        items = self.items or 1
+        return (
+            f"{self.name}: {self.items} items, "
+            f"latency avg {self.total_seconds / items * 1000:.0f} ms / max {self.max_seconds * 1000:.0f} ms, "
+            f"queue depth avg {self.total_depth / items:.1f} / max {self.max_depth}"
+        )
+
+
+class ScrapePipeline:
+
+    def __init__(
+        self,
+        scraper,
+        blob_store: BlobStore,
+        auction_repo: AuctionRepository,
+        ingested_repo: IngestedFileRepository,
+        file_hashes: Dict[str, str],
+        download_workers: Optional[int] = None,
+        parse_workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        layouts: Optional[LayoutRegistry] = None,
+        sheet_hashes: Optional[Dict[str, Dict[str, str]]] = None,
+        known_hashes: Optional[set] = None,
+        metrics: Optional[RunMetrics] = None,
+        hash_lookup: Optional[Callable[[List[str]], set]] = None
+    ):
+        self.scraper = scraper
+        self.blob_store = blob_store
+        self.auction_repo = auction_repo
+        self.ingested_repo = ingested_repo
+        self.file_hashes = dict(file_hashes)
+        # Only files the database holds may be answered with a 304
+        self.ingested_names = frozenset(file_hashes)
+        # Hashes known to belong to ingested files; hash_lookup, called from
+        # the parse threads, answers for the rest
+        self.known_hashes = set(known_hashes) if known_hashes is not None else set(file_hashes.values())
+        self.known_hashes.update(file_hashes.values())
+        self.hash_lookup = hash_lookup
+        self.layouts = layouts if layouts is not None else LayoutRegistry()
+        self.sheet_hashes = sheet_hashes or {}
+        self.metrics = metrics if metrics is not None else RunMetrics()
+
+        self.download_workers = max(download_workers or settings.DOWNLOAD_WORKERS, 1)
+        self.parse_workers = max(parse_workers or settings.PARSE_WORKERS or os.cpu_count() or 1, 1)
+        self.batch_size = batch_size or settings.WRITE_BATCH_SIZE
+        queue_size = queue_size or settings.PIPELINE_QUEUE_SIZE
+
+        self.link_queue: Queue = Queue()
+        self.parse_queue: Queue = Queue(maxsize=queue_size)
+        self.write_queue: Queue = Queue(maxsize=queue_size)
+
+        self.stats = {name: StageStats(name) for name in ("download", "parse", "write")}
+        self.failed_downloads = 0
+        # Months whose auctions were inserted or updated, for refreshing the rollups
+        self.affected_months: Set[date] = set()
+        # Link index of the file that last wrote each auction key this run
+        self._key_owners: Dict[Tuple, int] = {}
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._abort = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def run(self, links: List[Tuple[str, str]]) -> int:
+        if not links:
+            return 0
+
+        for link_index, (url, filename) in enumerate(links):
+            self.link_queue.put((url, filename, link_index))
+        for _ in range(self.download_workers):
+            self.link_queue.put(_DONE)
+
+        # Downloads run on threads, so parser processes must not be forked
+        with ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            self._pool = pool
+            threads = self._start_stage(
+                "download", self._download, self.link_queue, self.parse_queue,
+                self.download_workers, self.parse_workers
+            )
+            threads += self._start_stage(
+                "parse", self._parse, self.parse_queue, self.write_queue,
+                self.parse_workers, 1
+            )
+
+            try:
+                total_inserted = self._write()
+            except _Aborted:
+                total_inserted = 0
+            except BaseException:
+                self._abort.set()
+                raise
+            finally:
+                for thread in threads:
+                    thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+        for stats in self.stats.values():
+            logger.info(f"Pipeline {stats.summary()}")
+
+        return total_inserted
+
+    def _start_stage(
+        self,
+        name: str,
+        func: Callable,
+        inbox: Queue,
+        outbox: Queue,
+        workers: int,
+        downstream_workers: int
+    ) -> List[threading.Thread]:
+        remaining = [workers]
+
+        def worker():
+            try:
+                while True:
+                    item = self._get(inbox)
+                    if item is _DONE:
+                        break
+
+                    depth = inbox.qsize()
+                    started = time.perf_counter()
+                    result = func(item)
+                    self.stats[name].observe(time.perf_counter() - started, depth)
+
+                    if result is not None:
+                        self._put(outbox, result)
+            except _Aborted:
+                return
+            except BaseException as e:
+                self._fail(e)
+                return
+
+            with self._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                try:
+                    for _ in range(downstream_workers):
+                        self._put(outbox, _DONE)
+                except _Aborted:
+                    pass
+
+        threads = [
+            threading.Thread(target=worker, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _download(self, link: Tuple[str, str, int]) -> Optional[FetchedFile]:
+        url, filename, link_index = link
+        logger.info(f"Downloading: {filename}")
+        started = time.perf_counter()
+        content = self.scraper.download_file(url, conditional=filename in self.ingested_names)
+
+        if content is None:
+            with self._lock:
+                self.failed_downloads += 1
+            self.metrics.add("download", "failed", filename, seconds=time.perf_counter() - started)
+            return None
+        if not content:
+            self.metrics.count("file_not_modified")
+            return None
+
+        with content:
+            content_hash, size = self.blob_store.put_file(content)
+        self.metrics.add("download", "stored", filename, size_bytes=size, seconds=time.perf_counter() - started)
+        return FetchedFile(filename, content_hash, size, link_index)
+
+    def _parse(self, fetched: FetchedFile) -> Optional[ParsedFile]:
+        filename, content_hash = fetched.filename, fetched.content_hash
+
+        with self._lock:
+            previous_hash = self.file_hashes.get(filename)
+            known = content_hash in self.known_hashes
+            self.file_hashes[filename] = content_hash
+            self.known_hashes.add(content_hash)
+
+        if previous_hash == content_hash:
+            logger.debug(f"Skipping unchanged: {filename}")
+            self.metrics.count("files_unchanged")
+            return None
+
+        # Only the first file of this run with a given hash gets looked up
+        duplicate = known or (self.hash_lookup is not None and content_hash in self.hash_lookup([content_hash]))
+
+        if duplicate:
+            logger.info(f"Skipping {filename}: same content as an already ingested file")
+            self.metrics.count("files_duplicate")
+            return ParsedFile(*fetched, None)
+
+        if previous_hash is not None:
+            logger.info(f"Content of {filename} changed, reprocessing")
+
+        # Sheets are only compared against what this file held before
+        known_sheets = known_sheets_for(self.sheet_hashes, filename) if previous_hash is not None else {}
+
+        if is_archive(filename):
+            started = time.perf_counter()
+            sheets = SheetTracker(known_sheets)
+            with self.blob_store.open(content_hash) as content:
+                # Members share the pipeline's pool rather than starting one per archive
+                records = parse_archive(
+                    content, filename, layouts=self.layouts, sheets=sheets, executor=self._pool
+                )
+            parse_seconds = time.perf_counter() - started
+        else:
+            task = (filename, content_hash, self.blob_store.root, known_sheets)
+            result = self._pool.submit(parse_stored_workbook, task).result()
+            records = [record for batch in result.batches for record in batch.to_records()]
+            sheets, parse_seconds = result.sheets, result.parse_seconds
+            self.layouts.merge(result.layout_stats)
+
+        self.metrics.add("parse", None, filename, items=len(records), seconds=parse_seconds)
+        self.metrics.add_sheets(sheets)
+        if sheets.skipped:
+            logger.info(f"Parsed {len(records)} records from {filename}, {sheets.skipped} sheets unchanged")
+        else:
+            logger.info(f"Parsed {len(records)} records from {filename}")
+        return ParsedFile(*fetched, records, sheets, parse_seconds)
+
+    def _write(self) -> int:
+        total_inserted = 0
+        done = False
+
+        while not done:
+            item = self._get(self.write_queue)
+            depth = self.write_queue.qsize()
+            batch = []
+            batch_rows = 0
+
+            while True:
+                if item is _DONE:
+                    done = True
+                    break
+
+                batch.append(item)
+                batch_rows += len(item.records or [])
+                if batch_rows >= self.batch_size:
+                    break
+
+                try:
+                    item = self.write_queue.get_nowait()
+                except Empty:
+                    break
+
+            if batch:
+                started = time.perf_counter()
+                total_inserted += self._flush(batch)
+                self.stats["write"].observe(time.perf_counter() - started, depth)
+
+        return total_inserted
+
+    def _flush(self, batch: List[ParsedFile]) -> int:
+        # Files republished under a new name carry corrections too, so every
+        # file's rows replace stored values that differ. Files finish parsing
+        # in any order; where they share a key the later link wins, also over
+        # a batch already written.
+        batch = sorted(batch, key=lambda parsed: parsed.link_index)
+        records = []
+        for parsed in batch:
+            for record in parsed.records or []:
+                key = (record["auction_date"], record["region"], record["technology"])
+                if self._key_owners.get(key, -1) > parsed.link_index:
+                    continue
+                self._key_owners[key] = parsed.link_index
+                records.append(record)
+
+        inserted = 0
+        if records:
+            started = time.perf_counter()
+            result = self.auction_repo.upsert_auctions(records, update_existing=True)
+            self.metrics.add("write", "upsert", items=result.written, seconds=time.perf_counter() - started)
+            logger.info(
+                f"Wrote records from {len(batch)} files: {result.inserted} inserted, "
+                f"{result.updated} updated, {result.unchanged} unchanged"
+            )
+            inserted = result.inserted
+            self._touch(records, result)
+
+        for parsed in batch:
+            if parsed.records is None:
+                row_count = 0
+            elif parsed.sheets is not None and parsed.sheets.skipped:
+                row_count = None
+            else:
+                row_count = len(parsed.records)
+            self.ingested_repo.record_file(
+                parsed.filename, parsed.content_hash, parsed.size, row_count, parsed.parse_seconds
+            )
+
+            if parsed.sheets is not None:
+                for source_file, sheet_hashes in parsed.sheets.changed.items():
+                    self.ingested_repo.record_sheets(source_file, sheet_hashes)
+                    self.sheet_hashes.setdefault(source_file, {}).update(sheet_hashes)
+
+        return inserted
+
+    def _touch(self, records: List[dict], result: UpsertResult):
+        if result.written:
+            self.affected_months.update(month_start(record["auction_date"]) for record in records)
+
+    def _get(self, queue: Queue):
+        while True:
+            if self._abort.is_set():
+                raise _Aborted()
+            try:
+                return queue.get(timeout=0.2)
+            except Empty:
+                if self._abort.is_set():
+                    raise _Aborted()
+
+    def _put(self, queue: Queue, item):
+        while True:
+            try:
+                queue.put(item, timeout=0.2)
+                return
+            except Full:
+                if self._abort.is_set():
+                    raise _Aborted()
+
+    def _fail(self, error: BaseException):
+        with self._lock:
+            if self._error is None:
+                self._error = error
+        self._abort.set()
@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from config.settings import settings
+from config.logging import logger
+from src.database import DatabaseConnection, AuctionRepository, IngestedFileRepository, RollupRepository
+from src.database.repository import month_start
+from src.scraping.layouts import LayoutRegistry
+from src.scraping.pipeline import parse_stored_workbook
+from src.storage import BlobStore
+
+
+def run_reparse(workers: Optional[int] = None):
+    started = time.perf_counter()
+    workers = workers or settings.PARSE_WORKERS or os.cpu_count()
+    logger.info(f"Starting reparse of archived workbooks with {workers} workers")
+
+    db = DatabaseConnection()
+    blob_store = BlobStore(settings.RAW_STORE_DIR)
+    layouts = LayoutRegistry(settings.LAYOUT_CACHE_PATH, settings.LAYOUT_CACHE_MAX_ENTRIES)
+
+    with db.session_scope() as session:
+        auction_repo = AuctionRepository(session)
+        ingested_repo = IngestedFileRepository(session)
+
+        # Files that duplicate earlier content were never parsed on their own,
+        # so only the first filename per hash keeps ownership of the rows.
+        tasks = []
+        seen_hashes = set()
+        for filename, content_hash in ingested_repo.get_archived_files():
+            if content_hash in seen_hashes:
+                continue
+            seen_hashes.add(content_hash)
+
+            if not blob_store.exists(content_hash):
+                logger.warning(f"No archived copy of {filename}, skipping")
+                continue
+            tasks.append((filename, content_hash, blob_store.root, {}))
+
+        total_records = 0
+        inserted = updated = unchanged = 0
+        affected_months = set()
+
+        # A forked worker would inherit the session's open database connection
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            for filename, batches, layout_stats, sheets, parse_seconds in executor.map(
+                parse_stored_workbook, tasks, chunksize=1
+            ):
+                layouts.merge(layout_stats)
+                row_count = sum(batch.num_rows for batch in batches)
+                logger.info(f"Parsed {row_count} records from {filename}")
+                total_records += row_count
+                for batch in batches:
+                    result = auction_repo.load_batch(batch, update_existing=True)
+                    inserted += result.inserted
+                    updated += result.updated
+                    unchanged += result.unchanged
+                    if result.written:
+                        affected_months.update(month_start(day) for day in np.unique(batch.auction_date).tolist())
+                ingested_repo.set_row_count(filename, row_count, parse_seconds)
+                for source_file, sheet_hashes in sheets.changed.items():
+                    ingested_repo.record_sheets(source_file, sheet_hashes)
+
+        layouts.save()
+        rollups = RollupRepository(session).refresh(affected_months)
+        logger.info(
+            f"Reparse completed: {len(tasks)} files, {total_records} records parsed, "
+            f"{inserted} inserted, {updated} updated, {unchanged} unchanged, "
+            f"{rollups} rollups refreshed "
+            f"in {time.perf_counter() - started:.1f}s, "
+            f"layout templates: {layouts.summary()}"
+        )
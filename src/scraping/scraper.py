@@ -1,126 +1,253 @@
+import tempfile
 import time
-from typing import List, Tuple, Optional
+from functools import partial
+from typing import BinaryIO, List, Tuple, Optional, Union
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 from config.settings import settings
 from config.logging import logger
-from src.database import DatabaseConnection, AuctionRepository, ScrapeLogRepository
-from src.scraping.parser import AuctionParser
+from src.database import (
+    DatabaseConnection, AuctionRepository, IngestedFileRepository, RollupRepository, ScrapeLogRepository
+)
+from src.scraping.archive import is_archive
+from src.scraping.http_cache import HttpCache, NOT_MODIFIED, NotModified
+from src.scraping.layouts import LayoutRegistry
+from src.scraping.links import classify_link, iter_anchors
+from src.scraping.metrics import RunMetrics
+from src.scraping.pipeline import ScrapePipeline
+from src.scraping.rate_limiter import HostRateLimiter
+from src.storage import BlobStore
 
 
 class EEXScraper:
 
-    def __init__(self):
+    def __init__(
+        self,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        http_cache: Optional[HttpCache] = None
+    ):
         self.base_url = settings.EEX_BASE_URL
+        self.http_cache = http_cache
+        self.rate_limiter = rate_limiter or HostRateLimiter(
+            settings.REQUEST_RATE, settings.REQUEST_BURST
+        )
         self.session = requests.Session()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (compatible; EEXAuctionBot/1.0)"
         })
 
-    def fetch_page(self) -> Optional[str]:
+        adapter = HTTPAdapter(pool_maxsize=max(settings.DOWNLOAD_WORKERS, 1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _get(self, url: str, stream: bool = False, conditional: bool = True) -> requests.Response:
+        headers = self.http_cache.conditional_headers(url) if conditional and self.http_cache is not None else {}
+        self.rate_limiter.acquire(url)
+        return self.session.get(url, headers=headers, stream=stream, timeout=settings.REQUEST_TIMEOUT)
+
+    def fetch_page(self, conditional: bool = True) -> Union[str, NotModified, None]:
+        """Return the page HTML, NOT_MODIFIED if the cached copy is current, or None on failure.
+
+        Pass conditional=False when the database holds nothing the cached validators vouch for.
+        """
         try:
-            response = self.session.get(
-                self.base_url,
-                timeout=settings.REQUEST_TIMEOUT
-            )
+            response = self._get(self.base_url, conditional=conditional)
+            if response.status_code == 304:
+                return NOT_MODIFIED
             response.raise_for_status()
+            if self.http_cache is not None:
+                self.http_cache.update(self.base_url, response)
             return response.text
         except requests.RequestException as e:
             logger.error(f"Error fetching page: {e}")
             return None
 
     def find_excel_links(self, html: str) -> List[Tuple[str, str]]:
-        soup = BeautifulSoup(html, "html.parser")
         excel_links = []
 
-        for link in soup.find_all("a", href=True):
-            href = link["href"]
-            link_text = link.get_text(strip=True)
-
-            if any(ext in href.lower() for ext in [".xlsx", ".xls"]):
+        # Link text only matters for .zip links, so skip collecting it otherwise
+        for href, link_text in iter_anchors(html, needs_text=lambda href: href.endswith(".zip")):
+            if classify_link(href, link_text):
                 full_url = urljoin(self.base_url, href)
                 filename = href.split("/")[-1]
                 excel_links.append((full_url, filename))
 
-            elif "download" in link_text.lower() or "result" in link_text.lower():
-                if href.endswith((".xlsx", ".xls", ".zip")):
-                    full_url = urljoin(self.base_url, href)
-                    filename = href.split("/")[-1]
-                    excel_links.append((full_url, filename))
-
         return excel_links
 
-    def download_file(self, url: str) -> Optional[bytes]:
+    def download_file(self, url: str, conditional: bool = True) -> Union[BinaryIO, NotModified, None]:
+        """Return the file spooled to memory or disk, NOT_MODIFIED on a 304, or None on failure."""
         try:
-            time.sleep(settings.REQUEST_DELAY)
-            response = self.session.get(url, timeout=settings.REQUEST_TIMEOUT)
-            response.raise_for_status()
-            return response.content
+            response = self._get(url, stream=True, conditional=conditional)
         except requests.RequestException as e:
             logger.error(f"Error downloading {url}: {e}")
             return None
 
+        spooled = None
+        try:
+            if response.status_code == 304:
+                logger.debug(f"Not modified: {url}")
+                return NOT_MODIFIED
+            response.raise_for_status()
 
-def run_scrape():
-    logger.info(f"Starting scrape at {time.strftime('%Y-%m-%d %H:%M:%S')}")
-
-    db = DatabaseConnection()
-    scraper = EEXScraper()
-
-    try:
-        session = db.connect()
-        auction_repo = AuctionRepository(session)
-        log_repo = ScrapeLogRepository(session)
+            content_length = response.headers.get("Content-Length")
+            if content_length and int(content_length) > settings.MAX_DOWNLOAD_BYTES:
+                logger.error(f"Refusing to download {url}: {content_length} bytes exceeds size limit")
+                return None
+
+            spooled = tempfile.SpooledTemporaryFile(max_size=settings.SPOOL_MAX_MEMORY_BYTES)
+            size = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                size += len(chunk)
+                if size > settings.MAX_DOWNLOAD_BYTES:
+                    logger.error(f"Aborting download of {url}: exceeds {settings.MAX_DOWNLOAD_BYTES} bytes")
+                    spooled.close()
+                    return None
+                spooled.write(chunk)
+
+            if self.http_cache is not None:
+                self.http_cache.update(url, response)
+            spooled.seek(0)
+            return spooled
+        except requests.RequestException as e:
+            logger.error(f"Error downloading {url}: {e}")
+            if spooled is not None:
+                spooled.close()
+            return None
+        finally:
+            response.close()
 
-        processed_files = auction_repo.get_processed_files()
 
-        html = scraper.fetch_page()
-        if not html:
-            log_repo.log_scrape(status="failure", error_message="Failed to fetch main page")
-            return
+def _add_run_total(metrics: RunMetrics, started: float, records: int):
+    metrics.add("run", items=records, seconds=time.perf_counter() - started)
 
-        excel_links = scraper.find_excel_links(html)
-        logger.info(f"Found {len(excel_links)} Excel file links")
 
-        total_records = 0
+def _refresh_rollups(session, months, metrics: RunMetrics):
+    started = time.perf_counter()
+    refreshed = RollupRepository(session).refresh(months)
+    metrics.add("rollup", items=refreshed, seconds=time.perf_counter() - started)
+    logger.info(f"Refreshed {refreshed} rollups for {len(months)} months")
 
-        for url, filename in excel_links:
-            if filename in processed_files:
-                logger.debug(f"Skipping already processed: {filename}")
-                continue
 
-            logger.info(f"Downloading: {filename}")
-            content = scraper.download_file(url)
+def _ingested_hashes(db: DatabaseConnection, hashes: List[str]) -> set:
+    # Called from the pipeline's parse threads, so each lookup gets its own session
+    with db.session_scope() as session:
+        return IngestedFileRepository(session).find_content_hashes(hashes)
 
-            if not content:
-                continue
 
-            parser = AuctionParser(source_file=filename)
-            records = parser.parse_excel(content)
-            logger.info(f"Parsed {len(records)} records from {filename}")
+def run_scrape():
+    logger.info(f"Starting scrape at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    started = time.perf_counter()
+    metrics = RunMetrics()
 
-            if records:
-                inserted = auction_repo.upsert_auctions(records)
-                total_records += inserted
-                logger.info(f"Inserted {inserted} new records")
+    db = DatabaseConnection()
+    http_cache = HttpCache(settings.HTTP_CACHE_PATH, settings.HTTP_CACHE_MAX_ENTRIES)
+    scraper = EEXScraper(http_cache=http_cache)
+    blob_store = BlobStore(settings.RAW_STORE_DIR, settings.SPOOL_MAX_MEMORY_BYTES)
+    layouts = LayoutRegistry(settings.LAYOUT_CACHE_PATH, settings.LAYOUT_CACHE_MAX_ENTRIES)
+    pipeline = None
 
-        log_repo.log_scrape(status="success", records_added=total_records)
-        logger.info(f"Scrape completed. Total new records: {total_records}")
+    try:
+        # The scheduler keeps one process running across years
+        db.ensure_partitions()
+        with db.session_scope() as session:
+            auction_repo = AuctionRepository(session)
+            ingested_repo = IngestedFileRepository(session)
+            log_repo = ScrapeLogRepository(session)
+
+            page_started = time.perf_counter()
+            # Validators in the HTTP cache outlive a reset database, and a 304
+            # would then keep it empty
+            html = scraper.fetch_page(conditional=ingested_repo.has_files())
+            page_seconds = time.perf_counter() - page_started
+
+            if html is NOT_MODIFIED:
+                logger.info("Page not modified since last run, nothing to do")
+                metrics.add("page", "not_modified", seconds=page_seconds)
+                metrics.count("page_not_modified")
+                _add_run_total(metrics, started, 0)
+                log_repo.log_scrape(status="success", records_added=0, metrics=metrics.rows())
+                return
+
+            if not html:
+                metrics.add("page", "failed", seconds=page_seconds)
+                _add_run_total(metrics, started, 0)
+                log_repo.log_scrape(
+                    status="failure", error_message="Failed to fetch main page", metrics=metrics.rows()
+                )
+                return
+
+            metrics.add("page", "fetched", size_bytes=len(html.encode("utf-8")), seconds=page_seconds)
+
+            excel_links = scraper.find_excel_links(html)
+            logger.info(f"Found {len(excel_links)} Excel file links")
+
+            file_hashes = ingested_repo.get_file_hashes(filename for _, filename in excel_links)
+
+            new_links = []
+            for url, filename in excel_links:
+                # A conditional request settles a processed file cheaply, a full download does not
+                revalidate = settings.REVALIDATE_PROCESSED_FILES or http_cache.has_validators(url)
+                if filename in file_hashes and not revalidate:
+                    logger.debug(f"Skipping already processed: {filename}")
+                    continue
+                new_links.append((url, filename))
+            if len(new_links) < len(excel_links):
+                metrics.count("files_known", len(excel_links) - len(new_links))
+
+            # Sheets are only compared for files parsed before under the same name
+            revalidated = [filename for _, filename in new_links if filename in file_hashes]
+            pipeline = ScrapePipeline(
+                scraper, blob_store, auction_repo, ingested_repo,
+                file_hashes, layouts=layouts,
+                sheet_hashes=ingested_repo.get_sheet_hashes(revalidated, filter(is_archive, revalidated)),
+                metrics=metrics,
+                hash_lookup=partial(_ingested_hashes, db)
+            )
+            total_records = pipeline.run(new_links)
+            layouts.save()
+            metrics.count("layout_hits", layouts.hits)
+            metrics.count("layout_misses", layouts.misses)
+
+            if pipeline.affected_months:
+                _refresh_rollups(session, pipeline.affected_months, metrics)
+
+            # Keep retrying the page until every file on it has been fetched
+            if pipeline.failed_downloads:
+                http_cache.forget(scraper.base_url)
+            http_cache.save()
+
+            _add_run_total(metrics, started, total_records)
+            log_repo.log_scrape(status="success", records_added=total_records, metrics=metrics.rows())
+            logger.info(
+                f"Scrape completed. Total new records: {total_records}, "
+                f"layout templates: {layouts.summary()}"
+            )
 
     except Exception as e:
         logger.exception(f"Scrape failed with error: {e}")
+        # Each written batch was committed, so its months need fresh rollups
+        # even though the run failed
+        if pipeline is not None and pipeline.affected_months:
+            try:
+                with db.session_scope() as session:
+                    _refresh_rollups(session, pipeline.affected_months, metrics)
+            except Exception:
+                logger.exception("Could not refresh rollups after the failed scrape")
+
+        # The failed unit of work is rolled back, so the failure gets its own
         try:
-            log_repo.log_scrape(status="failure", error_message=str(e))
+            with db.session_scope() as session:
+                _add_run_total(metrics, started, 0)
+                ScrapeLogRepository(session).log_scrape(
+                    status="failure", error_message=str(e), metrics=metrics.rows()
+                )
         except Exception:
             pass
         raise
 
-    finally:
-        db.close()
-
 
 if __name__ == "__main__":
     run_scrape()
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import zipfile
+from typing import Dict, Optional, Set
+from xml.etree import ElementTree
+
+CHUNK_SIZE = 1024 * 1024
+
+# Number formats decide which numbers are dates, so every sheet's values
+# depend on the styles part as well
+WORKBOOK_PARTS = ("styles.xml",)
+
+# These helpers rely on openpyxl internals of read-only workbooks: the open
+# zip in `_archive`, and each sheet's part name in `_worksheet_path` and
+# parsed string table in `_shared_strings`. When any of them is missing the
+# digests are None and every sheet gets parsed.
+
+
+def _hash_member(digest, archive: zipfile.ZipFile, name: str):
+    with archive.open(name) as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+
+class _DigestReader:
+
+    def __init__(self, source, digest):
+        self.source = source
+        self.digest = digest
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.source.read(size)
+        self.digest.update(data)
+        return data
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _shared_string_refs(source) -> Set[int]:
+    refs = set()
+    for _, element in ElementTree.iterparse(source):
+        name = _local_name(element.tag)
+        if name == "c" and element.get("t") == "s":
+            for child in element:
+                if _local_name(child.tag) == "v" and child.text and child.text.strip().isdigit():
+                    refs.add(int(child.text))
+        elif name == "row":
+            element.clear()
+    return refs
+
+
+def workbook_digest(workbook) -> Optional[str]:
+    archive = getattr(workbook, "_archive", None)
+    if archive is None:
+        return None
+
+    digest = hashlib.sha256()
+    for name in sorted(archive.namelist()):
+        if os.path.basename(name).lower() in WORKBOOK_PARTS:
+            digest.update(name.encode("utf-8"))
+            _hash_member(digest, archive, name)
+    return digest.hexdigest()
+
+
+def sheet_digest(workbook, sheet, shared_digest: Optional[str]) -> Optional[str]:
+    """Hash the raw XML of a read-only worksheet and the shared strings it references.
+
+    Any change to the sheet's values changes the digest; the reverse is
+    not guaranteed, which only costs a needless reparse. Strings added for
+    other sheets leave the digest alone.
+    """
+    archive = getattr(workbook, "_archive", None)
+    path = getattr(sheet, "_worksheet_path", None)
+    strings = getattr(sheet, "_shared_strings", None)
+    if shared_digest is None or archive is None or path is None or strings is None:
+        return None
+
+    digest = hashlib.sha256(f"{shared_digest}\x1f{sheet.title}\x1f".encode("utf-8"))
+    try:
+        with archive.open(path) as source:
+            reader = _DigestReader(source, digest)
+            refs = _shared_string_refs(reader)
+            for _ in iter(lambda: reader.read(CHUNK_SIZE), b""):
+                pass
+    except (ElementTree.ParseError, KeyError):
+        return None
+
+    for index in sorted(refs):
+        if index < len(strings):
+            digest.update(f"{index}\x1f{strings[index]}\x1e".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SheetTracker:
+
+    def __init__(self, known: Optional[Dict[str, Dict[str, str]]] = None):
+        self.known = known or {}
+        self.changed: Dict[str, Dict[str, str]] = {}
+        self.skipped = 0
+        # Records parsed per sheet of each source file
+        self.rows: Dict[str, Dict[str, int]] = {}
+
+    def should_parse(self, source_file: str, sheet_name: str, digest: Optional[str]) -> bool:
+        if digest is None:
+            return True
+        if self.known.get(source_file, {}).get(sheet_name) == digest:
+            self.skipped += 1
+            return False
+        self.changed.setdefault(source_file, {})[sheet_name] = digest
+        return True
+
+    def count_rows(self, source_file: str, sheet_name: str, rows: int):
+        sheets = self.rows.setdefault(source_file, {})
+        sheets[sheet_name] = sheets.get(sheet_name, 0) + rows
+
+    def merge(self, other: "SheetTracker"):
+        for source_file, sheets in other.changed.items():
+            self.changed.setdefault(source_file, {}).update(sheets)
+        self.skipped += other.skipped
+        for source_file, sheets in other.rows.items():
+            for sheet_name, rows in sheets.items():
+                self.count_rows(source_file, sheet_name, rows)
+
+
+def known_sheets_for(sheet_hashes: Dict[str, Dict[str, str]], filename: str) -> Dict[str, Dict[str, str]]:
+    # Archive members are tracked as "<archive>!<member>"
+    prefix = f"{filename}!"
+    return {
+        source_file: sheets
+        for source_file, sheets in sheet_hashes.items()
+        if source_file == filename or source_file.startswith(prefix)
+    }
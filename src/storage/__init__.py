@@ -0,0 +1,5 @@
+from src.storage.blob_store import BlobStore
+
+__all__ = [
+    'BlobStore',
+]
@@ -0,0 +1,73 @@
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from typing import BinaryIO, Tuple
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+
+    def __init__(self, root: str, spool_max_size: int = 8 * 1024 * 1024):
+        self.root = root
+        self.spool_max_size = spool_max_size
+
+    @staticmethod
+    def digest(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.gz")
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path_for(digest))
+
+    def put(self, content: bytes) -> str:
+        digest, _ = self.put_file(BytesIO(content))
+        return digest
+
+    def put_file(self, fileobj: BinaryIO) -> Tuple[str, int]:
+        # The digest is only known once the whole stream has been read, so
+        # compress into a temporary file and move it into place afterwards.
+        os.makedirs(self.root, exist_ok=True)
+        fileobj.seek(0)
+        sha = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+                while chunk := fileobj.read(CHUNK_SIZE):
+                    sha.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+
+            digest = sha.hexdigest()
+            path = self.path_for(digest)
+            if os.path.exists(path):
+                os.unlink(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        finally:
+            fileobj.seek(0)
+
+        return digest, size
+
+    def get(self, digest: str) -> bytes:
+        with gzip.open(self.path_for(digest), "rb") as f:
+            return f.read()
+
+    def open(self, digest: str) -> BinaryIO:
+        spooled = tempfile.SpooledTemporaryFile(max_size=self.spool_max_size)
+        with gzip.open(self.path_for(digest), "rb") as f:
+            shutil.copyfileobj(f, spooled, CHUNK_SIZE)
+        spooled.seek(0)
+        return spooled
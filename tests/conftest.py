@@ -0,0 +1,27 @@
+from io import BytesIO
+from typing import Dict, Sequence
+
+import openpyxl
+
+HEADER = ["Region", "Volume Offered", "Volume Allocated", "Price"]
+
+
+def workbook_bytes(sheets: Dict[str, Sequence[Sequence]]) -> bytes:
+    """Save a workbook with one sheet per title, holding the given rows."""
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for title, rows in sheets.items():
+        ws = wb.create_sheet(title)
+        for row in rows:
+            ws.append(list(row))
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def auction_workbook(sheet_name: str) -> bytes:
+    return workbook_bytes({sheet_name: [HEADER, ["Bretagne", 100, 80, 50.5], ["Normandie", 200, 150, 51.25]]})
+
+
+def priced_workbook(prices: Dict[str, float]) -> bytes:
+    return workbook_bytes({title: [HEADER, ["Bretagne", 100, 80, price]] for title, price in prices.items()})
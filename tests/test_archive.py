@@ -0,0 +1,72 @@
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+
+from src.scraping.archive import is_archive, list_workbook_members, parse_archive
+from src.scraping.layouts import LayoutRegistry
+from src.scraping.sheets import SheetTracker
+from tests.conftest import auction_workbook
+
+
+def _archive(members: dict) -> BytesIO:
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    buf.seek(0)
+    return buf
+
+
+class TestArchive:
+
+    def test_is_archive(self):
+        assert is_archive("history.zip")
+        assert is_archive("HISTORY.ZIP")
+        assert not is_archive("results.xlsx")
+
+    def test_list_workbook_members_skips_non_workbooks(self):
+        buf = _archive({
+            "2023/jan.xlsx": b"x",
+            "old.XLS": b"x",
+            "readme.txt": b"x",
+            "__MACOSX/._jan.xlsx": b"x",
+            "2023/.hidden.xlsx": b"x",
+        })
+        with zipfile.ZipFile(buf) as archive:
+            assert list_workbook_members(archive) == ["2023/jan.xlsx", "old.XLS"]
+
+    def test_parse_archive_records_member_provenance(self):
+        buf = _archive({
+            "jan.xlsx": auction_workbook("January 2024"),
+            "feb.xlsx": auction_workbook("February 2024"),
+        })
+        records = parse_archive(buf, "history.zip", workers=1)
+
+        assert len(records) == 4
+        assert {r["source_file"] for r in records} == {"history.zip!jan.xlsx", "history.zip!feb.xlsx"}
+        assert buf.tell() == 0
+
+    def test_parse_archive_bad_zip(self):
+        assert parse_archive(BytesIO(b"not a zip"), "broken.zip", workers=1) == []
+
+    @pytest.mark.parametrize("parallel", ["processes", "executor"])
+    def test_parse_archive_in_parallel_merges_member_state(self, parallel):
+        members = {"jan.xlsx": auction_workbook("January 2024"), "feb.xlsx": auction_workbook("February 2024")}
+        layouts, sheets = LayoutRegistry(), SheetTracker()
+
+        if parallel == "processes":
+            records = parse_archive(_archive(members), "history.zip", workers=2, layouts=layouts, sheets=sheets)
+        else:
+            with ThreadPoolExecutor(max_workers=2) as executor, \
+                    patch("src.scraping.archive.ProcessPoolExecutor", side_effect=AssertionError("new pool")):
+                records = parse_archive(
+                    _archive(members), "history.zip", workers=8, layouts=layouts, sheets=sheets, executor=executor
+                )
+
+        assert sorted(r["source_file"] for r in records) == ["history.zip!feb.xlsx"] * 2 + ["history.zip!jan.xlsx"] * 2
+        assert sheets.rows == {"history.zip!jan.xlsx": {"January 2024": 2}, "history.zip!feb.xlsx": {"February 2024": 2}}
+        assert sorted(sheets.changed) == ["history.zip!feb.xlsx", "history.zip!jan.xlsx"]
+        assert layouts.hits + layouts.misses == 2
@@ -0,0 +1,103 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+from config.settings import settings
+from src.database.repository import AuctionRepository
+from src.scraping.batch import NULL_FIXED, AuctionBatch, BatchBuilder, from_fixed, to_fixed
+from src.scraping.enums import Region
+from src.scraping.parser import AuctionParser
+from tests.conftest import workbook_bytes
+
+
+def _record(region="Bretagne", technology="Solar", offered=Decimal("100"), allocated=None, price=Decimal("50.5")):
+    return {
+        "auction_date": date(2024, 1, 1),
+        "region": region,
+        "technology": technology,
+        "volume_offered_mwh": offered,
+        "volume_allocated_mwh": allocated,
+        "weighted_avg_price_eur": price,
+        "source_file": "test.xlsx",
+    }
+
+
+class TestFixedPoint:
+
+    def test_round_trip(self):
+        assert from_fixed(to_fixed(Decimal("80.5"), 100), 100) == Decimal("80.5")
+        assert from_fixed(to_fixed(Decimal("0.5555"), 10_000), 10_000) == Decimal("0.5555")
+
+    def test_rounds_half_away_from_zero(self):
+        assert to_fixed(Decimal("1.005"), 100) == 101
+        assert to_fixed(Decimal("-2.125"), 100) == -213
+
+    def test_null(self):
+        assert to_fixed(None, 100) == NULL_FIXED
+        assert from_fixed(NULL_FIXED, 100) is None
+
+
+class TestAuctionBatch:
+
+    def test_builder_encodes_columns(self):
+        builder = BatchBuilder("test.xlsx")
+        builder.append(date(2024, 1, 1), Region.CORSE, None, Decimal("1.5"), None, Decimal("2"))
+        batch = builder.build()
+
+        assert batch.num_rows == 1
+        assert batch.region.dtype == np.int8
+        assert batch.volume_offered_mwh.tolist() == [150]
+        assert batch.volume_allocated_mwh.tolist() == [NULL_FIXED]
+        assert batch.weighted_avg_price_eur.tolist() == [20_000]
+        assert batch.region_names().tolist() == ["Corse"]
+        assert batch.technology_names().tolist() == ["All Technologies"]
+
+    def test_records_round_trip(self):
+        records = [_record(), _record("All Regions", "Hydro", None, Decimal("3.25"), None)]
+        assert AuctionBatch.from_records(records, "test.xlsx").to_records() == records
+
+    def test_empty(self):
+        batch = AuctionBatch.from_records([], "test.xlsx")
+        assert batch.num_rows == 0
+        assert batch.to_records() == []
+
+
+class TestParseExcelBatch:
+
+    def _workbook(self) -> bytes:
+        return workbook_bytes({"March 2024": [
+            ["Region", "Technology", "Volume Offered", "Volume Allocated", "Weighted average price"],
+            ["Bretagne", "Solaire", 100, 80.5, "1,234.5"],
+            ["Hydraulique", None, 10, None, 0.12345],
+            ["Total", None, 110, 80.5, None],
+        ]})
+
+    def test_matches_record_output(self, monkeypatch):
+        for backend in ("streaming", "pandas"):
+            monkeypatch.setattr(settings, "PARSER_BACKEND", backend)
+            parser = AuctionParser(source_file="test.xlsx")
+            content = self._workbook()
+
+            batch = parser.parse_excel_batch(content)
+
+            assert batch.source_file == "test.xlsx"
+            assert batch.num_rows == 2
+            records = parser.parse_excel(content)
+            records[1]["weighted_avg_price_eur"] = Decimal("0.1235")
+            assert batch.to_records() == records
+
+    def test_unreadable_content(self):
+        assert AuctionParser().parse_excel_batch(b"not a workbook").num_rows == 0
+
+
+class TestCopyBuffer:
+
+    def test_writes_tab_separated_rows_with_nulls(self):
+        batch = AuctionBatch.from_records([_record(), _record(technology="Wind")], "test.xlsx")
+        lines = AuctionRepository._copy_buffer(batch).read().splitlines()
+
+        assert lines == [
+            "0\t2024-01-01\t2\t1\t10000\t\\N\t505000",
+            "1\t2024-01-01\t2\t0\t10000\t\\N\t505000",
+        ]
@@ -0,0 +1,55 @@
+import gzip
+import hashlib
+from io import BytesIO
+
+from src.storage import BlobStore
+
+
+class TestBlobStore:
+
+    def test_put_returns_sha256(self, tmp_path):
+        store = BlobStore(str(tmp_path))
+        digest = store.put(b"workbook bytes")
+        assert digest == hashlib.sha256(b"workbook bytes").hexdigest()
+
+    def test_round_trip(self, tmp_path):
+        store = BlobStore(str(tmp_path))
+        digest = store.put(b"workbook bytes")
+        assert store.exists(digest)
+        assert store.get(digest) == b"workbook bytes"
+
+    def test_blobs_are_compressed_and_sharded(self, tmp_path):
+        store = BlobStore(str(tmp_path))
+        content = b"a" * 10000
+        digest = store.put(content)
+        path = tmp_path / digest[:2] / f"{digest}.gz"
+        assert path.exists()
+        assert path.stat().st_size < len(content)
+        assert gzip.decompress(path.read_bytes()) == content
+
+    def test_put_file_streams_and_rewinds(self, tmp_path):
+        store = BlobStore(str(tmp_path))
+        source = BytesIO(b"x" * 3_000_000)
+        digest, size = store.put_file(source)
+        assert size == 3_000_000
+        assert source.tell() == 0
+        assert digest == hashlib.sha256(b"x" * 3_000_000).hexdigest()
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_open_returns_seekable_copy(self, tmp_path):
+        store = BlobStore(str(tmp_path))
+        digest = store.put(b"workbook bytes")
+        with store.open(digest) as f:
+            f.seek(9)
+            assert f.read() == b"bytes"
+
+    def test_put_is_idempotent(self, tmp_path):
+        store = BlobStore(str(tmp_path))
+        first = store.put(b"same")
+        second = store.put(b"same")
+        assert first == second
+        assert len(list((tmp_path / first[:2]).iterdir())) == 1
+
+    def test_unknown_digest_does_not_exist(self, tmp_path):
+        store = BlobStore(str(tmp_path))
+        assert not store.exists("0" * 64)
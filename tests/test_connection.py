@@ -0,0 +1,205 @@
+import re
+from contextlib import contextmanager
+from datetime import date
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import inspect, text
+
+from config.settings import settings
+from src.database import compact, connection, partitioning, schema
+from src.database.connection import DatabaseConnection, get_engine
+from src.database.models import Auction, Base, ScrapeLog
+from src.database.partitioning import ensure_partitions, partition_name
+
+
+def _url(tmp_path, name="db.sqlite"):
+    return f"sqlite:///{tmp_path / name}"
+
+
+class TestGetEngine:
+
+    def test_one_engine_per_url(self, tmp_path):
+        assert get_engine(_url(tmp_path)) is get_engine(_url(tmp_path))
+        assert get_engine(_url(tmp_path)) is not get_engine(_url(tmp_path, "other.sqlite"))
+
+    def test_connections_share_the_engine(self, tmp_path):
+        assert DatabaseConnection(_url(tmp_path)).engine is DatabaseConnection(_url(tmp_path)).engine
+
+
+class TestSessionScope:
+
+    def test_commits_on_success(self, tmp_path):
+        db = DatabaseConnection(_url(tmp_path))
+        with db.session_scope() as session:
+            session.add(ScrapeLog(status="success"))
+
+        with db.session_scope() as session:
+            assert session.query(ScrapeLog).count() == 1
+
+    def test_rolls_back_on_error(self, tmp_path):
+        db = DatabaseConnection(_url(tmp_path))
+        with pytest.raises(RuntimeError):
+            with db.session_scope() as session:
+                session.add(ScrapeLog(status="success"))
+                session.flush()
+                raise RuntimeError("boom")
+
+        with db.session_scope() as session:
+            assert session.query(ScrapeLog).count() == 0
+
+
+class TestEnsureSchema:
+
+    def test_creates_schema_once(self, tmp_path, monkeypatch):
+        engine = get_engine(_url(tmp_path))
+        assert schema.ensure_schema(engine) == schema.SCHEMA_VERSION
+        assert "auctions" in inspect(engine).get_table_names()
+        assert {index["name"] for index in inspect(engine).get_indexes("auctions")} >= {
+            "ix_auctions_technology_date", "ix_auctions_region_date", "ix_auctions_auction_date_brin"
+        }
+
+        def fail(*args, **kwargs):
+            raise AssertionError("schema created twice")
+
+        monkeypatch.setattr(Base.metadata, "create_all", fail)
+        assert schema.ensure_schema(engine) == schema.SCHEMA_VERSION
+
+    def test_applies_pending_migrations(self, tmp_path, monkeypatch):
+        engine = get_engine(_url(tmp_path))
+        schema.ensure_schema(engine)
+
+        target = schema.SCHEMA_VERSION + 1
+        monkeypatch.setattr(schema, "SCHEMA_VERSION", target)
+        monkeypatch.setattr(schema, "MIGRATIONS", {target: ["CREATE TABLE IF NOT EXISTS extra (id integer)"]})
+
+        assert schema.ensure_schema(engine) == target
+        with engine.connect() as conn:
+            assert schema.current_version(conn) == target
+            assert conn.execute(text("SELECT count(*) FROM extra")).scalar() == 0
+
+
+class TestPartitioning:
+
+    def test_partition_name(self):
+        assert partition_name(2024) == "auctions_y2024"
+
+    def test_needs_postgres(self, tmp_path):
+        engine = get_engine(_url(tmp_path))
+        schema.ensure_schema(engine)
+        ensure_partitions(engine)
+        assert "auctions_default" not in inspect(engine).get_table_names()
+
+    @staticmethod
+    def _statements(conn):
+        return [" ".join(str(c.args[0]).split()) for c in conn.execute.call_args_list]
+
+    def test_convert_renames_before_recreating(self):
+        conn = MagicMock()
+        partitioning._convert(conn)
+        statements = self._statements(conn)
+
+        assert statements[0] == "LOCK TABLE auctions IN ACCESS EXCLUSIVE MODE"
+        assert statements[1:1 + len(Auction.__table__.indexes)] == [
+            f"DROP INDEX IF EXISTS {name}" for name in sorted(index.name for index in Auction.__table__.indexes)
+        ]
+        renames = [statement for statement in statements if "RENAME" in statement]
+        assert renames == [
+            "ALTER TABLE auctions RENAME TO auctions_unpartitioned",
+            "ALTER TABLE auctions_unpartitioned RENAME CONSTRAINT auctions_pkey TO auctions_unpartitioned_pkey",
+            "ALTER TABLE auctions_unpartitioned RENAME CONSTRAINT uq_auction_date_region_technology "
+            "TO uq_auction_unpartitioned",
+        ]
+        # The old names are free before the partitioned table claims them
+        create = statements.index(
+            "CREATE TABLE auctions (LIKE auctions_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (auction_date)"
+        )
+        assert max(statements.index(rename) for rename in renames) < create
+        assert statements[create + 1:create + 5] == [
+            "ALTER SEQUENCE auctions_id_seq OWNED BY auctions.id",
+            "ALTER TABLE auctions ADD CONSTRAINT auctions_pkey PRIMARY KEY (id, auction_date)",
+            "ALTER TABLE auctions ADD CONSTRAINT uq_auction_date_region_technology "
+            "UNIQUE (auction_date, region, technology)",
+            "CREATE TABLE auctions_default PARTITION OF auctions DEFAULT",
+        ]
+        assert statements[-2:] == [
+            "INSERT INTO auctions SELECT * FROM auctions_unpartitioned", "DROP TABLE auctions_unpartitioned"
+        ]
+        # Dropping the table that owns the sequence would drop the sequence too
+        assert statements.index("ALTER SEQUENCE auctions_id_seq OWNED BY auctions.id") < len(statements) - 1
+
+    def test_year_partition_moves_rows_out_of_default(self):
+        conn = MagicMock()
+        partitioning._create_year_partition(conn, 2025)
+
+        assert self._statements(conn) == [
+            "CREATE TEMP TABLE auction_moved (LIKE auctions) ON COMMIT DROP",
+            "WITH moved AS (DELETE FROM auctions_default WHERE auction_date >= :lower AND auction_date < :upper "
+            "RETURNING *) INSERT INTO auction_moved SELECT * FROM moved",
+            "CREATE TABLE auctions_y2025 PARTITION OF auctions FOR VALUES FROM ('2025-01-01') TO ('2026-01-01')",
+            "INSERT INTO auctions SELECT * FROM auction_moved",
+            "DROP TABLE auction_moved",
+        ]
+        assert conn.execute.call_args_list[1].args[1] == {"lower": date(2025, 1, 1), "upper": date(2026, 1, 1)}
+
+    @staticmethod
+    def _engine(conn):
+        @contextmanager
+        def scope():
+            yield conn
+
+        return MagicMock(dialect=MagicMock(), connect=scope, begin=scope)
+
+    def test_creates_missing_years_through_next_year(self, monkeypatch):
+        conn = MagicMock()
+        conn.execute.return_value.scalar.return_value = 2023
+        engine = self._engine(conn)
+        engine.dialect.name = "postgresql"
+        created = []
+        monkeypatch.setattr(partitioning, "is_compact", lambda conn: False)
+        monkeypatch.setattr(partitioning, "is_partitioned", lambda conn: True)
+        monkeypatch.setattr(partitioning, "year_partitions", lambda conn: {2023, 2024})
+        monkeypatch.setattr(partitioning, "advisory_lock", lambda conn: None)
+        monkeypatch.setattr(partitioning, "_create_year_partition", lambda conn, year: created.append(year))
+
+        ensure_partitions(engine, through_year=2026)
+        assert created == [2025, 2026]
+
+        created.clear()
+        ensure_partitions(engine, through_year=2024)
+        assert created == []
+
+    def test_connection_checks_partitions_on_every_call(self, tmp_path, monkeypatch):
+        calls = []
+        monkeypatch.setattr(settings, "AUCTIONS_PARTITION_BY_YEAR", True)
+        monkeypatch.setattr(settings, "AUCTIONS_COMPACT_STORAGE", False)
+        monkeypatch.setattr(connection, "ensure_partitions", calls.append)
+
+        db = DatabaseConnection(_url(tmp_path))
+        db.ensure_partitions()
+        db.ensure_partitions()
+        # Once with the schema check, then on each explicit call
+        assert calls == [db.engine] * 3
+
+
+class TestCompactStorage:
+
+    def test_needs_postgres(self, tmp_path):
+        engine = get_engine(_url(tmp_path))
+        schema.ensure_schema(engine)
+        compact.ensure_compact(engine)
+        assert "auction_facts" not in inspect(engine).get_table_names()
+
+    def test_view_keeps_auction_columns(self):
+        sql = compact.create_view_sql()
+        assert re.findall(r" AS (\w+)(?=, | FROM )", sql) == [column.name for column in Auction.__table__.columns]
+        assert "CAST(facts.price_eur_x10000 / 10000.0 AS numeric(10, 4)) AS weighted_avg_price_eur" in sql
+
+    def test_measures_are_rounded_to_wide_decimals(self):
+        price = compact.MEASURES[2]
+        assert compact.scaled("x", price) == "(round(x, 4) * 10000)::bigint"
+
+    def test_dimension_inserts_skip_known_names(self):
+        regions, technologies, source_files = compact.dimension_inserts("src AS source")
+        assert regions.startswith("INSERT INTO regions (name) SELECT DISTINCT source.region FROM src AS source")
+        assert "NOT EXISTS (SELECT 1 FROM source_files WHERE source_files.name = source.source_file)" in source_files
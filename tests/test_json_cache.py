@@ -0,0 +1,25 @@
+from src.scraping.json_cache import JsonLruCache
+
+
+class TestJsonLruCache:
+
+    def test_keeps_most_recently_used_across_save(self, tmp_path):
+        path = str(tmp_path / "cache.json")
+        cache = JsonLruCache(path, max_entries=2)
+        cache._store("a", {"n": 1})
+        cache._store("b", {"n": 2})
+        assert cache._get("a") == {"n": 1}
+        cache._store("c", {"n": 3})
+        cache.save()
+
+        reloaded = JsonLruCache(path, max_entries=2)
+        assert list(reloaded._entries) == ["a", "c"]
+        assert not (tmp_path / "cache.json.tmp").exists()
+
+    def test_ignores_unreadable_file(self, tmp_path):
+        path = tmp_path / "cache.json"
+        path.write_text("{not json")
+        assert len(JsonLruCache(str(path), max_entries=2)) == 0
+
+    def test_without_path_starts_empty(self):
+        assert len(JsonLruCache(None, max_entries=2)) == 0
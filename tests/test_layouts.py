@@ -0,0 +1,104 @@
+from unittest.mock import MagicMock
+
+from src.scraping.layouts import FINGERPRINT_CELLS, LayoutRegistry, LayoutStats, layout_fingerprint
+from src.scraping.parser import AuctionParser
+
+
+HEADER = ["Region", "Technology", "Volume Offered", "Volume Allocated", "Price"]
+
+
+def _head(title: str, volume: int) -> list:
+    return [
+        [title],
+        [None],
+        HEADER,
+        ["Bretagne", "Solaire", volume, volume / 2, 50.5],
+    ]
+
+
+class TestLayoutFingerprint:
+
+    def test_ignores_numbers_and_months(self):
+        first, _ = layout_fingerprint("January 2024", _head("Results January 2024", 100))
+        second, _ = layout_fingerprint("Mar 2023", _head("Results Mar 2023", 250))
+        assert first == second
+
+    def test_depends_on_column_positions(self):
+        head = _head("Results", 100)
+        moved = [row[:] for row in head]
+        moved[2] = [None] + HEADER
+        assert layout_fingerprint("Sheet1", head)[0] != layout_fingerprint("Sheet1", moved)[0]
+
+    def test_reports_covered_rows(self):
+        head = [["x"] * (FINGERPRINT_CELLS - 1), ["y", "z"], ["w"]]
+        assert layout_fingerprint("Sheet1", head)[1] == 1
+        assert layout_fingerprint("Sheet1", head[:1])[1] == 1
+
+
+class TestLayoutRegistry:
+
+    def test_miss_then_hit(self):
+        registry = LayoutRegistry()
+        detect = MagicMock(side_effect=AuctionParser._detect_headers)
+
+        first = registry.resolve("January 2024", _head("Results January 2024", 100), detect)
+        second = registry.resolve("February 2024", _head("Results February 2024", 7), detect)
+
+        assert first == second == {"row": 2, "volume_offered_idx": 2, "volume_allocated_idx": 3, "price_idx": 4}
+        assert detect.call_count == 1
+        assert (registry.hits, registry.misses) == (1, 1)
+
+    def test_hit_returns_a_copy(self):
+        registry = LayoutRegistry()
+        registry.resolve("Sheet1", _head("Results", 1), AuctionParser._detect_headers)
+        registry.resolve("Sheet1", _head("Results", 1), AuctionParser._detect_headers)["row"] = 99
+        assert registry.resolve("Sheet1", _head("Results", 1), AuctionParser._detect_headers)["row"] == 2
+
+    def test_header_outside_fingerprint_is_not_stored(self):
+        registry = LayoutRegistry()
+        head = [[f"note {i}"] for i in range(FINGERPRINT_CELLS)] + [HEADER]
+        assert registry.resolve("Sheet1", head, AuctionParser._detect_headers)["row"] == FINGERPRINT_CELLS
+        assert len(registry) == 0
+
+    def test_drain_and_merge(self):
+        worker = LayoutRegistry()
+        worker.resolve("Sheet1", _head("Results", 1), AuctionParser._detect_headers)
+        worker.resolve("Sheet1", _head("Results", 2), AuctionParser._detect_headers)
+        stats = worker.drain()
+
+        assert (stats.hits, stats.misses, len(stats.learned)) == (1, 1, 1)
+        assert worker.drain() == LayoutStats({}, 0, 0)
+
+        parent = LayoutRegistry()
+        parent.merge(stats)
+        assert len(parent) == 1
+        assert parent.summary() == "1 hits, 1 misses, 1 templates"
+
+    def test_evicts_least_recently_used(self):
+        registry = LayoutRegistry(max_entries=1)
+        registry.merge(LayoutStats({"a": {"row": 0}, "b": {"row": 1}}, 0, 0))
+        assert len(registry) == 1
+
+    def test_save_and_reload(self, tmp_path):
+        path = str(tmp_path / "nested" / "layouts.json")
+        registry = LayoutRegistry(path)
+        registry.resolve("Sheet1", _head("Results", 1), AuctionParser._detect_headers)
+        registry.save()
+
+        reloaded = LayoutRegistry(path)
+        detect = MagicMock()
+        assert reloaded.resolve("Sheet1", _head("Results", 1), detect)["row"] == 2
+        detect.assert_not_called()
+
+    def test_corrupt_file_is_ignored(self, tmp_path):
+        path = tmp_path / "layouts.json"
+        path.write_text("{not json")
+        assert len(LayoutRegistry(str(path))) == 0
+
+    def test_parser_uses_registry(self):
+        registry = LayoutRegistry()
+        parser = AuctionParser(layouts=registry)
+        head = _head("Results", 1)
+
+        assert parser._resolve_headers("Sheet1", head) == AuctionParser._detect_headers(head)
+        assert registry.misses == 1
@@ -4,8 +4,10 @@ from datetime import date
 from unittest.mock import MagicMock
 import pandas as pd
 
+from config.settings import settings
 from src.scraping.parser import AuctionParser, MONTH_NAMES
 from src.scraping.enums import Technology, Region
+from tests.conftest import workbook_bytes
 
 
 class TestParseNumber:
@@ -54,6 +56,22 @@ class TestParseNumber:
         result = AuctionParser._parse_number("invalid")
         assert result is None
 
+    def test_parse_column_matches_parse_number(self):
+        values = [12, 100.5, "1,234.5", " 1 000 ", "-", "n/a", "", None, float("nan"), "invalid", "1e3", "inf", 0.1]
+        df = pd.DataFrame({"label": ["x"] * len(values), "volume": pd.Series(values, dtype=object)})
+        index = df.index[1:]
+
+        parsed = AuctionParser()._parse_column(df, {"volume_idx": 1}, "volume_idx", index)
+        assert parsed == [AuctionParser._parse_number(value) for value in values[1:]]
+        assert parsed[:3] == [Decimal("100.5"), Decimal("1234.5"), Decimal("1000")]
+        assert parsed[-2:] == [Decimal("Infinity"), Decimal("0.1")]
+
+    @pytest.mark.parametrize("values", [[1.5, float("nan"), 3.0], [1, 2, 3], ["1,5", "-", "2 000"]])
+    def test_parse_column_single_type(self, values):
+        df = pd.DataFrame({"volume": values})
+        parsed = AuctionParser()._parse_column(df, {"volume_idx": 0}, "volume_idx", df.index)
+        assert parsed == [AuctionParser._parse_number(value) for value in values]
+
 
 class TestTechnology:
 
@@ -94,6 +112,20 @@ class TestTechnology:
     def test_technology_partial_match(self):
         assert Technology.from_string("Solar Power Plant") == Technology.SOLAR
 
+    def test_technology_accented(self):
+        assert Technology.from_string("Éolien") == Technology.WIND
+        assert Technology.from_string("ÉOLIEN OFFSHORE") == Technology.WIND
+
+    def test_technology_first_alias_wins(self):
+        assert Technology.from_string("Solar and Wind") == Technology.WIND
+
+    def test_technology_from_series(self):
+        series = pd.Series(["Solaire", None, "Hydraulique", "Solaire"], index=[3, 5, 7, 9])
+        result = Technology.from_series(series)
+
+        assert list(result.index) == [3, 5, 7, 9]
+        assert list(result) == [Technology.SOLAR, None, Technology.HYDRO, Technology.SOLAR]
+
 
 class TestRegion:
 
@@ -115,9 +147,26 @@ class TestRegion:
     def test_region_unknown(self):
         assert Region.from_string("Unknown Region") is None
 
+    @pytest.mark.parametrize("label", ["", "\u2014", "\u2013", "_", " - "])
+    def test_region_punctuation_only(self, label):
+        assert Region.from_string(label) is None
+        assert Technology.from_string(label) is None
+
     def test_region_partial_match(self):
         assert Region.from_string("Region Bretagne Area") == Region.BRETAGNE
 
+    def test_region_without_accents_or_hyphens(self):
+        assert Region.from_string("Ile-de-France") == Region.ILE_DE_FRANCE
+        assert Region.from_string("Ile de France") == Region.ILE_DE_FRANCE
+        assert Region.from_string("Auvergne-Rhone-Alpes") == Region.AUVERGNE_RHONE_ALPES
+
+    def test_region_typographic_apostrophe(self):
+        assert Region.from_string("Provence-Alpes-Côte d\u2019Azur") == Region.PROVENCE_ALPES_COTE_DAZUR
+
+    def test_region_from_series(self):
+        series = pd.Series(["Bretagne", float("nan"), "Corse"])
+        assert list(Region.from_series(series)) == [Region.BRETAGNE, None, Region.CORSE]
+
 
 class TestAuctionParser:
 
@@ -225,3 +274,114 @@ class TestFindHeaders:
         result = parser._find_headers(df)
         assert result is not None
         assert result["row"] == 2
+
+
+class TestParseRows:
+
+    def _rows(self, rows):
+        parser = AuctionParser(source_file="test.xlsx")
+        df = pd.DataFrame(rows)
+        headers = parser._find_headers(df)
+        df.columns = df.iloc[headers["row"]]
+        df = df.iloc[headers["row"] + 1:].reset_index(drop=True)
+        return parser._parse_rows(df, headers, date(2024, 1, 1))
+
+    def test_parse_rows_builds_records(self):
+        records = self._rows([
+            ["Region", "Technology", "Volume Offered", "Volume Allocated", "Price"],
+            ["Bretagne", "Solaire", 100, 80.5, "1,234.5"],
+        ])
+        assert records == [{
+            "auction_date": date(2024, 1, 1),
+            "region": "Bretagne",
+            "technology": "Solar",
+            "volume_offered_mwh": Decimal("100"),
+            "volume_allocated_mwh": Decimal("80.5"),
+            "weighted_avg_price_eur": Decimal("1234.5"),
+            "source_file": "test.xlsx",
+        }]
+
+    def test_parse_rows_technology_only_label(self):
+        records = self._rows([
+            ["Label", "Volume Offered", "Volume Allocated"],
+            ["Hydraulique", 10, 5],
+        ])
+        assert records[0]["region"] == "All Regions"
+        assert records[0]["technology"] == "Hydro"
+
+    def test_parse_rows_region_without_technology(self):
+        records = self._rows([
+            ["Region", "Volume Offered", "Volume Allocated"],
+            ["Normandie", 10, 5],
+        ])
+        assert records[0]["technology"] == "All Technologies"
+
+    def test_parse_rows_skips_unlabelled_and_empty_rows(self):
+        records = self._rows([
+            ["Region", "Technology", "Volume Offered", "Volume Allocated"],
+            [None, "Solaire", 1, 1],
+            ["   ", "Solaire", 1, 1],
+            ["Total", None, 99, 99],
+            ["Bretagne", "Solaire", "-", "n/a"],
+            ["Occitanie", "Eolien onshore", 3, None],
+        ])
+        assert [(r["region"], r["technology"]) for r in records] == [("Occitanie", "Wind")]
+
+    def test_parse_rows_matches_repeated_labels(self):
+        records = self._rows(
+            [["Region", "Technology", "Volume Offered", "Volume Allocated"]]
+            + [["Bretagne", "Solaire", i, i] for i in range(5)]
+        )
+        assert len(records) == 5
+        assert [r["volume_offered_mwh"] for r in records] == [Decimal(i) for i in range(5)]
+
+
+class TestStreamingBackend:
+
+    def _parse(self, monkeypatch, backend: str, content: bytes) -> list[dict]:
+        monkeypatch.setattr(settings, "PARSER_BACKEND", backend)
+        return AuctionParser(source_file="test.xlsx").parse_excel(content)
+
+    def test_streaming_matches_pandas_backend(self, monkeypatch):
+        content = workbook_bytes({
+            "June 2023": [
+                ["Auction results"],
+                [],
+                ["Region", "Technology", "Volume Offered", "Volume Allocated", "Weighted average price"],
+                ["Bretagne", "Solaire", 100, 80.5, "1,234.5"],
+                [None, "Solaire", 1, 1],
+                ["Normandie", "Eolien onshore", "NA", 12, None],
+                ["Total", None, 112, 92.5, 50],
+                ["Corse", "Hydraulique", "-", "n/a"],
+            ],
+            "Notes": [["No data here"]],
+        })
+
+        streamed = self._parse(monkeypatch, "streaming", content)
+        assert streamed == self._parse(monkeypatch, "pandas", content)
+        assert [(r["region"], r["technology"]) for r in streamed] == [("Bretagne", "Solar"), ("Normandie", "Wind")]
+        assert streamed[0]["auction_date"] == date(2023, 6, 1)
+        assert streamed[1]["volume_offered_mwh"] is None
+
+    def test_streaming_reads_date_below_header(self, monkeypatch):
+        content = workbook_bytes({
+            "Sheet1": [
+                ["Region", "Volume Offered", "Volume Allocated"],
+                ["Results for March 2022"],
+                ["Occitanie", 10, 5],
+            ],
+        })
+        records = self._parse(monkeypatch, "streaming", content)
+        assert [r["auction_date"] for r in records] == [date(2022, 3, 1)]
+
+    def test_iter_records_is_lazy(self, monkeypatch):
+        monkeypatch.setattr(settings, "PARSER_BACKEND", "streaming")
+        content = workbook_bytes({
+            "Sheet1": [["Region", "Volume Offered"]] + [["Bretagne", i] for i in range(3)],
+        })
+        records = AuctionParser().iter_records(content)
+        assert next(records)["volume_offered_mwh"] == Decimal(0)
+        assert len(list(records)) == 2
+
+    def test_non_ooxml_content_falls_back_to_pandas(self, monkeypatch):
+        assert self._parse(monkeypatch, "streaming", b"not a workbook") == []
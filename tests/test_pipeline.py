@@ -0,0 +1,253 @@
+import threading
+from datetime import date
+from io import BytesIO
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.database.repository import UpsertResult
+from src.scraping.pipeline import ScrapePipeline, StageStats, parse_stored_workbook
+from src.storage import BlobStore
+from tests.conftest import auction_workbook, priced_workbook
+
+
+def _two_sheet_workbook(feb_price: float) -> bytes:
+    return priced_workbook({"January 2024": 50.5, "February 2024": feb_price})
+
+
+def _upsert(stored: dict):
+    def upsert_auctions(records, update_existing=False):
+        result = [0, 0, 0]
+        for record in records:
+            key = (record["auction_date"], record["region"], record["technology"])
+            value = record["weighted_avg_price_eur"]
+            if key not in stored:
+                result[0] += 1
+            elif update_existing and stored[key] != value:
+                result[1] += 1
+            else:
+                result[2] += 1
+                continue
+            stored[key] = value
+        return UpsertResult(*result)
+    return upsert_auctions
+
+
+def _pipeline(tmp_path, files, file_hashes=None, stored=None, **kwargs):
+    scraper = MagicMock()
+    scraper.download_file.side_effect = lambda url, conditional=True: (
+        BytesIO(files[url]) if files.get(url) is not None else None
+    )
+    auction_repo = MagicMock()
+    auction_repo.upsert_auctions.side_effect = _upsert({} if stored is None else stored)
+    ingested_repo = MagicMock()
+    pipeline = ScrapePipeline(
+        scraper, BlobStore(str(tmp_path)), auction_repo, ingested_repo,
+        file_hashes or {}, download_workers=2, parse_workers=1, **kwargs
+    )
+    return pipeline, auction_repo, ingested_repo
+
+
+class TestScrapePipeline:
+
+    def test_empty_links(self, tmp_path):
+        pipeline, auction_repo, _ = _pipeline(tmp_path, {})
+        assert pipeline.run([]) == 0
+        auction_repo.upsert_auctions.assert_not_called()
+
+    def test_downloads_parses_and_writes(self, tmp_path):
+        jan = auction_workbook("January 2024")
+        files = {"u/jan.xlsx": jan, "u/copy.xlsx": jan, "u/feb.xlsx": auction_workbook("February 2024"), "u/bad.xlsx": None}
+        pipeline, auction_repo, ingested_repo = _pipeline(tmp_path, files)
+        links = [("u/jan.xlsx", "jan.xlsx"), ("u/copy.xlsx", "copy.xlsx"), ("u/feb.xlsx", "feb.xlsx"), ("u/bad.xlsx", "bad.xlsx")]
+
+        assert pipeline.run(links) == 4
+        assert pipeline.failed_downloads == 1
+
+        recorded = {c.args[0]: c.args[3] for c in ingested_repo.record_file.call_args_list}
+        assert sorted(recorded) == ["copy.xlsx", "feb.xlsx", "jan.xlsx"]
+        assert sorted(recorded.values()) == [0, 2, 2]
+        parse_seconds = [c.args[4] for c in ingested_repo.record_file.call_args_list]
+        assert parse_seconds.count(None) == 1
+        assert all(seconds > 0 for seconds in parse_seconds if seconds is not None)
+        assert pipeline.stats["download"].items == 4
+        assert pipeline.stats["parse"].items == 3
+        assert pipeline.affected_months == {date(2024, 1, 1), date(2024, 2, 1)}
+
+    def test_records_stage_metrics(self, tmp_path):
+        jan = auction_workbook("January 2024")
+        files = {"u/jan.xlsx": jan, "u/copy.xlsx": jan, "u/bad.xlsx": None}
+        pipeline, _, _ = _pipeline(tmp_path, files)
+        pipeline.run([("u/jan.xlsx", "jan.xlsx"), ("u/copy.xlsx", "copy.xlsx"), ("u/bad.xlsx", "bad.xlsx")])
+
+        metrics = {}
+        for metric in pipeline.metrics.rows():
+            metrics.setdefault(metric.stage, []).append(metric)
+
+        downloads = {m.source_file: m for m in metrics["download"]}
+        assert downloads["jan.xlsx"].name == "stored"
+        assert downloads["jan.xlsx"].size_bytes == len(jan)
+        assert downloads["bad.xlsx"].name == "failed"
+        assert all(m.seconds >= 0 for m in metrics["download"])
+
+        (parse,) = metrics["parse"]
+        assert parse.source_file in ("jan.xlsx", "copy.xlsx")
+        assert (parse.items, parse.seconds > 0) == (2, True)
+        assert [(m.source_file, m.name, m.items) for m in metrics["sheet"]] == [
+            (parse.source_file, "January 2024", 2)
+        ]
+        assert [(m.name, m.items) for m in metrics["write"]] == [("upsert", 2)]
+        assert [(m.name, m.items) for m in metrics["cache"]] == [("files_duplicate", 1)]
+
+    def test_unchanged_files_are_skipped(self, tmp_path):
+        jan = auction_workbook("January 2024")
+        known = {"jan.xlsx": BlobStore.digest(jan)}
+        pipeline, auction_repo, ingested_repo = _pipeline(tmp_path, {"u/jan.xlsx": jan}, known)
+
+        assert pipeline.run([("u/jan.xlsx", "jan.xlsx")]) == 0
+        ingested_repo.record_file.assert_not_called()
+
+    def test_only_ingested_files_are_downloaded_conditionally(self, tmp_path):
+        files = {"u/jan.xlsx": auction_workbook("January 2024"), "u/feb.xlsx": auction_workbook("February 2024")}
+        pipeline, _, _ = _pipeline(tmp_path, files, {"jan.xlsx": "old"})
+        pipeline.run([("u/jan.xlsx", "jan.xlsx"), ("u/feb.xlsx", "feb.xlsx")])
+
+        conditional = {c.args[0]: c.kwargs["conditional"] for c in pipeline.scraper.download_file.call_args_list}
+        assert conditional == {"u/jan.xlsx": True, "u/feb.xlsx": False}
+
+    def test_changed_file_reparses_only_changed_sheets(self, tmp_path):
+        stored = {}
+        first, _, ingested = _pipeline(tmp_path / "first", {"u/jan.xlsx": _two_sheet_workbook(51.0)}, stored=stored)
+        first.run([("u/jan.xlsx", "jan.xlsx")])
+        sheet_hashes = {c.args[0]: c.args[1] for c in ingested.record_sheets.call_args_list}
+        assert sorted(sheet_hashes["jan.xlsx"]) == ["February 2024", "January 2024"]
+
+        corrected = _two_sheet_workbook(52.0)
+        pipeline, auction_repo, ingested_repo = _pipeline(
+            tmp_path / "second", {"u/jan.xlsx": corrected}, {"jan.xlsx": "old"},
+            stored=stored, sheet_hashes=sheet_hashes
+        )
+
+        assert pipeline.run([("u/jan.xlsx", "jan.xlsx")]) == 0
+        (records,), kwargs = auction_repo.upsert_auctions.call_args
+        assert kwargs == {"update_existing": True}
+        assert [r["weighted_avg_price_eur"] for r in records] == [52]
+        assert ingested_repo.record_file.call_args.args[3] is None
+        ingested_repo.record_sheets.assert_called_once()
+        assert list(ingested_repo.record_sheets.call_args.args[1]) == ["February 2024"]
+
+    def test_renamed_workbook_corrects_stored_values(self, tmp_path):
+        stored = {}
+        first, _, _ = _pipeline(tmp_path / "first", {"u/jan.xlsx": _two_sheet_workbook(51.0)}, stored=stored)
+        first.run([("u/jan.xlsx", "jan.xlsx")])
+
+        pipeline, auction_repo, _ = _pipeline(
+            tmp_path / "second", {"u/jan-v2.xlsx": _two_sheet_workbook(52.0)},
+            {"jan.xlsx": "old"}, stored=stored
+        )
+
+        assert pipeline.run([("u/jan-v2.xlsx", "jan-v2.xlsx")]) == 0
+        assert auction_repo.upsert_auctions.call_args.kwargs == {"update_existing": True}
+        assert stored[(date(2024, 2, 1), "Bretagne", "All Technologies")] == 52
+
+    def test_later_link_wins_whatever_finishes_first(self, tmp_path):
+        files = {"u/v1.xlsx": _two_sheet_workbook(51.0), "u/v2.xlsx": _two_sheet_workbook(52.0)}
+        stored = {}
+        pipeline, auction_repo, ingested_repo = _pipeline(tmp_path, files, stored=stored)
+        written = threading.Event()
+        upsert = _upsert(stored)
+
+        def download_file(url, conditional=True):
+            # The first link only arrives once the second has been written
+            if url == "u/v1.xlsx":
+                written.wait(5)
+            return BytesIO(files[url])
+
+        def upsert_auctions(records, update_existing=False):
+            result = upsert(records, update_existing)
+            written.set()
+            return result
+
+        pipeline.scraper.download_file.side_effect = download_file
+        auction_repo.upsert_auctions.side_effect = upsert_auctions
+
+        pipeline.run([("u/v1.xlsx", "v1.xlsx"), ("u/v2.xlsx", "v2.xlsx")])
+        # Every key of v1 was already written from v2
+        assert auction_repo.upsert_auctions.call_count == 1
+        assert [c.args[0] for c in ingested_repo.record_file.call_args_list] == ["v2.xlsx", "v1.xlsx"]
+        assert stored[(date(2024, 2, 1), "Bretagne", "All Technologies")] == 52
+
+    def test_content_of_files_off_the_page_counts_as_duplicate(self, tmp_path):
+        jan = auction_workbook("January 2024")
+        pipeline, auction_repo, ingested_repo = _pipeline(
+            tmp_path, {"u/jan.xlsx": jan}, known_hashes={BlobStore.digest(jan)}
+        )
+
+        assert pipeline.run([("u/jan.xlsx", "jan.xlsx")]) == 0
+        auction_repo.upsert_auctions.assert_not_called()
+        assert ingested_repo.record_file.call_args.args[3] == 0
+        assert pipeline.affected_months == set()
+
+    def test_downloaded_hashes_are_looked_up_once(self, tmp_path):
+        jan = auction_workbook("January 2024")
+        lookups = []
+
+        def hash_lookup(hashes):
+            lookups.append(hashes)
+            return {BlobStore.digest(jan)}
+
+        pipeline, auction_repo, _ = _pipeline(
+            tmp_path, {"u/a.xlsx": jan, "u/b.xlsx": jan}, hash_lookup=hash_lookup
+        )
+
+        assert pipeline.run([("u/a.xlsx", "a.xlsx"), ("u/b.xlsx", "b.xlsx")]) == 0
+        assert lookups == [[BlobStore.digest(jan)]]
+        auction_repo.upsert_auctions.assert_not_called()
+
+    def test_archive_members_use_the_pipeline_pool(self, tmp_path):
+        buf = BytesIO()
+        with zipfile.ZipFile(buf, "w") as archive:
+            archive.writestr("jan.xlsx", auction_workbook("January 2024"))
+            archive.writestr("feb.xlsx", auction_workbook("February 2024"))
+        pipeline, auction_repo, _ = _pipeline(tmp_path, {"u/h.zip": buf.getvalue()})
+
+        with patch("src.scraping.archive.ProcessPoolExecutor", side_effect=AssertionError("pool per archive")):
+            assert pipeline.run([("u/h.zip", "h.zip")]) == 4
+
+    def test_writer_error_propagates(self, tmp_path):
+        pipeline, auction_repo, _ = _pipeline(tmp_path, {"u/jan.xlsx": auction_workbook("January 2024")})
+        auction_repo.upsert_auctions.side_effect = RuntimeError("db down")
+
+        with pytest.raises(RuntimeError, match="db down"):
+            pipeline.run([("u/jan.xlsx", "jan.xlsx")])
+
+
+class TestParseStoredWorkbook:
+
+    def test_returns_one_batch_per_source_file(self, tmp_path):
+        store = BlobStore(str(tmp_path))
+        buf = BytesIO()
+        with zipfile.ZipFile(buf, "w") as archive:
+            archive.writestr("jan.xlsx", auction_workbook("January 2024"))
+            archive.writestr("feb.xlsx", auction_workbook("February 2024"))
+        workbook, zipped = store.put(auction_workbook("March 2024")), store.put(buf.getvalue())
+
+        (batch,) = parse_stored_workbook(("mar.xlsx", workbook, store.root, {})).batches
+        assert (batch.source_file, batch.num_rows) == ("mar.xlsx", 2)
+        assert batch.to_records()[0]["weighted_avg_price_eur"] == 50.5
+
+        batches = parse_stored_workbook(("h.zip", zipped, store.root, {})).batches
+        assert [(batch.source_file, batch.num_rows) for batch in batches] == [("h.zip!jan.xlsx", 2), ("h.zip!feb.xlsx", 2)]
+
+
+class TestStageStats:
+
+    def test_summary(self):
+        stats = StageStats("parse")
+        stats.observe(0.1, 2)
+        stats.observe(0.3, 0)
+        assert stats.items == 2
+        assert stats.max_depth == 2
+        assert "avg 200 ms / max 300 ms" in stats.summary()
+        assert "queue depth avg 1.0 / max 2" in stats.summary()
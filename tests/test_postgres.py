@@ -0,0 +1,177 @@
+import os
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.database import compact, schema
+from src.database.connection import get_engine
+from src.database.partitioning import ensure_partitions, is_partitioned, year_partitions
+from src.database.models import Auction
+from src.database.repository import AuctionRepository, UpsertResult
+from src.scraping.batch import AuctionBatch
+
+# The database is wiped before every test, so point this at a disposable one
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+def _record(region="Bretagne", day=date(2024, 1, 1), allocated="80", price="50.5", source_file="a.xlsx"):
+    return {
+        "auction_date": day,
+        "region": region,
+        "technology": "Solar",
+        "volume_offered_mwh": Decimal("100"),
+        "volume_allocated_mwh": Decimal(allocated) if allocated is not None else None,
+        "weighted_avg_price_eur": Decimal(price) if price is not None else None,
+        "source_file": source_file,
+    }
+
+
+@pytest.fixture
+def engine():
+    engine = get_engine(TEST_DATABASE_URL)
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+    schema.ensure_schema(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+def _stored(session, columns="region, volume_allocated_mwh, weighted_avg_price_eur, source_file"):
+    return session.execute(text(f"SELECT {columns} FROM auctions ORDER BY auction_date, region")).all()
+
+
+class TestMerge:
+
+    def test_counts_inserted_updated_and_unchanged(self, session):
+        repo = AuctionRepository(session)
+        assert repo.upsert_auctions([_record("Bretagne"), _record("Normandie")]) == UpsertResult(2, 0, 0)
+        created = dict(session.execute(text("SELECT region, created_at FROM auctions")).all())
+
+        changed = [_record("Bretagne", price="52", source_file="b.xlsx"), _record("Normandie"), _record("Corse")]
+        assert repo.upsert_auctions(changed) == UpsertResult(1, 0, 2)
+        assert _stored(session)[0] == ("Bretagne", Decimal("80.00"), Decimal("50.5000"), "a.xlsx")
+
+        assert repo.upsert_auctions(changed, update_existing=True) == UpsertResult(0, 1, 2)
+        assert _stored(session)[0] == ("Bretagne", Decimal("80.00"), Decimal("52.0000"), "b.xlsx")
+        # Updated rows keep the timestamp of their insert
+        assert dict(session.execute(text("SELECT region, created_at FROM auctions")).all())["Bretagne"] == (
+            created["Bretagne"]
+        )
+
+    @pytest.mark.parametrize("update_existing, price", [(False, Decimal("51.0000")), (True, Decimal("53.0000"))])
+    def test_duplicate_keys_in_one_load(self, session, update_existing, price):
+        repo = AuctionRepository(session)
+        rows = [_record(price="51"), _record(price="52"), _record(price="53")]
+
+        # Counts are per key, not per staged row
+        assert repo.upsert_auctions(rows, update_existing=update_existing) == UpsertResult(1, 0, 0)
+        assert [row[2] for row in _stored(session)] == [price]
+
+    def test_batch_load_matches_record_upsert(self, session):
+        repo = AuctionRepository(session)
+        rows = [_record("Bretagne", allocated=None), _record("Normandie", price=None)]
+        assert repo.load_batch(AuctionBatch.from_records(rows, "a.xlsx")) == UpsertResult(2, 0, 0)
+        assert _stored(session) == [
+            ("Bretagne", None, Decimal("50.5000"), "a.xlsx"),
+            ("Normandie", Decimal("80.00"), None, "a.xlsx"),
+        ]
+
+        corrected = AuctionBatch.from_records([_record("Bretagne", allocated="81")], "b.xlsx")
+        assert repo.load_batch(corrected, update_existing=True) == UpsertResult(0, 1, 0)
+        assert _stored(session)[0] == ("Bretagne", Decimal("81.00"), Decimal("50.5000"), "b.xlsx")
+
+
+class TestPartitioning:
+
+    def _partition_of(self, session):
+        return dict(session.execute(text(
+            "SELECT auction_date, tableoid::regclass::text FROM auctions ORDER BY auction_date"
+        )).all())
+
+    def test_rows_survive_conversion(self, engine, session):
+        repo = AuctionRepository(session)
+        days = [date(2023, 5, 1), date(2024, 1, 1), date(2024, 12, 1)]
+        repo.upsert_auctions([_record(day=day) for day in days])
+        columns = "id, auction_date, region, volume_allocated_mwh, weighted_avg_price_eur, created_at"
+        before = _stored(session, columns)
+        session.close()
+
+        ensure_partitions(engine, through_year=2025)
+
+        with engine.connect() as conn:
+            assert is_partitioned(conn)
+            assert year_partitions(conn) == {2023, 2024, 2025}
+        assert _stored(session, columns) == before
+        assert self._partition_of(session) == {
+            date(2023, 5, 1): "auctions_y2023", date(2024, 1, 1): "auctions_y2024", date(2024, 12, 1): "auctions_y2024"
+        }
+
+        # The id sequence moved with the table and still counts on from the old rows
+        repo.upsert_auctions([_record(day=date(2025, 3, 1))])
+        (new_id,) = session.execute(text("SELECT id FROM auctions WHERE auction_date = '2025-03-01'")).one()
+        assert new_id > max(row[0] for row in before)
+        assert session.execute(text("SELECT pg_get_serial_sequence('auctions', 'id')")).scalar() is not None
+        assert repo.upsert_auctions([_record(day=date(2025, 3, 1), price="60")], update_existing=True) == (
+            UpsertResult(0, 1, 0)
+        )
+
+    def test_new_year_moves_rows_out_of_default(self, engine, session):
+        ensure_partitions(engine, through_year=2024)
+        repo = AuctionRepository(session)
+        repo.upsert_auctions([_record(day=date(2024, 6, 1)), _record(day=date(2025, 2, 1))])
+        assert self._partition_of(session)[date(2025, 2, 1)] == "auctions_default"
+        session.close()
+
+        ensure_partitions(engine, through_year=2025)
+
+        assert self._partition_of(session) == {date(2024, 6, 1): "auctions_y2024", date(2025, 2, 1): "auctions_y2025"}
+        assert session.execute(text("SELECT count(*) FROM auctions_default")).scalar() == 0
+
+
+class TestCompactStorage:
+
+    @staticmethod
+    def _column_types(session, table):
+        return session.execute(text(
+            "SELECT column_name, data_type, character_maximum_length, numeric_precision, numeric_scale "
+            "FROM information_schema.columns WHERE table_name = :table ORDER BY ordinal_position"
+        ), {"table": table}).all()
+
+    def test_view_round_trips_the_wide_table(self, engine, session):
+        repo = AuctionRepository(session)
+        repo.upsert_auctions([
+            # Widest values the Numeric columns hold
+            _record("Bretagne", allocated="9999999999999.99", price="999999.9999"),
+            _record("Normandie", allocated="0.01", price="0.0001", source_file=None),
+            _record("Corse", allocated=None, price=None),
+        ])
+        wide_types = self._column_types(session, "auctions")
+        columns = ", ".join(column.name for column in Auction.__table__.columns)
+        before = _stored(session, columns)
+        session.close()
+
+        compact.ensure_compact(engine)
+
+        with engine.connect() as conn:
+            assert compact.is_compact(conn)
+        assert self._column_types(session, "auctions") == wide_types
+        assert _stored(session, columns) == before
+
+        # Writes go to the fact table and read back through the view
+        repo = AuctionRepository(session)
+        changed = [_record("Bretagne", allocated="1.25", source_file="b.xlsx"), _record("Occitanie")]
+        assert repo.upsert_auctions(changed, update_existing=True) == UpsertResult(1, 1, 0)
+        assert _stored(session)[0] == ("Bretagne", Decimal("1.25"), Decimal("50.5000"), "b.xlsx")
+        assert session.execute(text("SELECT count(*) FROM auction_facts")).scalar() == 4
@@ -0,0 +1,62 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from config.settings import settings
+from src.database.repository import UpsertResult
+from src.scraping import reparse
+from src.storage import BlobStore
+from tests.conftest import auction_workbook
+
+
+class TestRunReparse:
+
+    @pytest.fixture
+    def repos(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "RAW_STORE_DIR", str(tmp_path / "raw"))
+        monkeypatch.setattr(settings, "LAYOUT_CACHE_PATH", str(tmp_path / "layouts.json"))
+
+        @contextmanager
+        def session_scope():
+            yield MagicMock()
+
+        monkeypatch.setattr(reparse, "DatabaseConnection", lambda: MagicMock(session_scope=session_scope))
+        repos = {}
+        for name in ("AuctionRepository", "IngestedFileRepository", "RollupRepository"):
+            repos[name] = MagicMock()
+            monkeypatch.setattr(reparse, name, repos[name])
+        return repos
+
+    def test_reparses_each_archived_content_once(self, repos):
+        store = BlobStore(settings.RAW_STORE_DIR)
+        jan = store.put(auction_workbook("January 2024"))
+        feb = store.put(auction_workbook("February 2024"))
+
+        ingested = repos["IngestedFileRepository"].return_value
+        ingested.get_archived_files.return_value = [
+            ("jan.xlsx", jan), ("jan-copy.xlsx", jan), ("feb.xlsx", feb), ("lost.xlsx", "0" * 64),
+        ]
+        load = repos["AuctionRepository"].return_value.load_batch
+        load.side_effect = [UpsertResult(0, 2), UpsertResult(0, 0, 2)]
+
+        pools = []
+
+        def executor(**kwargs):
+            pools.append(kwargs["mp_context"].get_start_method())
+            return ProcessPoolExecutor(**kwargs)
+
+        with patch.object(reparse, "ProcessPoolExecutor", side_effect=executor):
+            reparse.run_reparse(workers=1)
+
+        assert pools == ["spawn"]
+        assert [c.kwargs for c in load.call_args_list] == [{"update_existing": True}] * 2
+        assert [(c.args[0].source_file, c.args[0].num_rows) for c in load.call_args_list] == [
+            ("jan.xlsx", 2), ("feb.xlsx", 2)
+        ]
+        assert [c.args[:2] for c in ingested.set_row_count.call_args_list] == [("jan.xlsx", 2), ("feb.xlsx", 2)]
+        assert [c.args[0] for c in ingested.record_sheets.call_args_list] == ["jan.xlsx", "feb.xlsx"]
+        # Only January's rows changed
+        repos["RollupRepository"].return_value.refresh.assert_called_once_with({date(2024, 1, 1)})
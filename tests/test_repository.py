@@ -0,0 +1,333 @@
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.database.connection import DatabaseConnection
+from src.database.models import Auction, AuctionMonthlyRollup, IngestedFile, IngestedSheet
+from src.database.repository import (
+    AuctionRepository, IngestedFileRepository, RollupRepository, ScrapeLogRepository, StageMetric, UpsertResult
+)
+
+
+def _record(region="Bretagne", source_file="a.xlsx"):
+    return {
+        "auction_date": date(2024, 1, 1),
+        "region": region,
+        "technology": "Solar",
+        "volume_offered_mwh": Decimal("100"),
+        "volume_allocated_mwh": None,
+        "weighted_avg_price_eur": Decimal("50.5"),
+        "source_file": source_file,
+    }
+
+
+class TestUpsertResult:
+
+    def test_written_counts_inserts_and_updates(self):
+        assert UpsertResult(2, 3, 4).written == 5
+        assert UpsertResult(1) == (1, 0, 0)
+
+
+class TestUpsertAuctions:
+
+    def test_record_buffer_escapes_text_and_writes_nulls(self):
+        rows = [_record(), _record(source_file="dir\\a\tb\nc.xlsx"), _record(source_file="")]
+        lines = AuctionRepository._record_buffer(rows).read().split("\n")
+
+        assert lines == [
+            "0\t2024-01-01\tBretagne\tSolar\t100\t\\N\t50.5\ta.xlsx",
+            "1\t2024-01-01\tBretagne\tSolar\t100\t\\N\t50.5\tdir\\\\a\\tb\\nc.xlsx",
+            "2\t2024-01-01\tBretagne\tSolar\t100\t\\N\t50.5\t",
+            "",
+        ]
+
+    def test_merge_keeps_first_row_or_last_when_updating(self):
+        repo = AuctionRepository(MagicMock())
+
+        insert_sql = repo._merge_sql("stage", "*", update_existing=False)
+        assert "ord ASC ON CONFLICT (auction_date, region, technology) DO NOTHING" in insert_sql
+
+        update_sql = repo._merge_sql("stage", "*", update_existing=True)
+        assert "ord DESC" in update_sql
+        assert "source_file = EXCLUDED.source_file" in update_sql
+        assert (
+            "WHERE (auctions.volume_offered_mwh, auctions.volume_allocated_mwh, auctions.weighted_avg_price_eur) "
+            "IS DISTINCT FROM (EXCLUDED.volume_offered_mwh, EXCLUDED.volume_allocated_mwh, "
+            "EXCLUDED.weighted_avg_price_eur)"
+        ) in update_sql
+
+    def test_update_existing_stages_rows_and_merges_with_update(self):
+        session = MagicMock()
+        # One new key, one stored key with the same values
+        session.execute.return_value.one.return_value = (1, 0, 2)
+        repo = AuctionRepository(session)
+
+        result = repo.upsert_auctions([_record(), _record(region="Corse"), _record()], update_existing=True)
+
+        assert result == UpsertResult(1, 0, 1)
+        (create,), (merge, merge_args) = [call.args for call in session.execute.call_args_list]
+        assert str(create).startswith("CREATE TEMP TABLE auction_stage (ord integer, auction_date date")
+        assert str(create).endswith("ON COMMIT DROP")
+
+        cursor = session.connection.return_value.connection.cursor.return_value
+        (copy_sql, buffer), _ = cursor.copy_expert.call_args
+        assert copy_sql == "COPY auction_stage FROM STDIN"
+        assert buffer.getvalue().count("\n") == 3
+
+        merge = str(merge)
+        assert merge.startswith("WITH merged AS (INSERT INTO auctions (auction_date, region, technology,")
+        assert "FROM auction_stage ORDER BY auction_date, region, technology, ord DESC" in merge
+        assert "DO UPDATE SET volume_offered_mwh = EXCLUDED.volume_offered_mwh" in merge
+        assert "RETURNING created_at = :created_at AS inserted" in merge
+        assert set(merge_args) == {"created_at"}
+        session.commit.assert_called_once()
+
+    def test_compact_merge_targets_fact_table(self):
+        sql = AuctionRepository(MagicMock())._compact_merge_sql("stage", "*", update_existing=True)
+
+        assert sql.startswith(
+            "WITH merged AS (INSERT INTO auction_facts (auction_date, region_id, technology_id, "
+            "volume_offered_cmwh, volume_allocated_cmwh, price_eur_x10000, source_file_id, created_at)"
+        )
+        assert "ord DESC) AS source (auction_date, region, technology," in sql
+        assert "ON CONFLICT (auction_date, region_id, technology_id) DO UPDATE SET" in sql
+        assert "source_file_id = EXCLUDED.source_file_id WHERE (auction_facts.volume_offered_cmwh" in sql
+
+    def test_nothing_valid_to_write(self):
+        session = MagicMock()
+        repo = AuctionRepository(session)
+
+        assert repo.upsert_auctions([]) == (0, 0, 0)
+        assert repo.upsert_auctions([_record(region=None)]) == (0, 0, 0)
+        session.execute.assert_not_called()
+
+
+class TestQueryAuctions:
+
+    @pytest.fixture
+    def repo(self, tmp_path):
+        with DatabaseConnection(f"sqlite:///{tmp_path / 'db.sqlite'}").session_scope() as session:
+            session.add_all([
+                Auction(
+                    auction_date=date(2024, month, 1), region=region, technology=technology,
+                    volume_allocated_mwh=Decimal(month), source_file="a.xlsx"
+                )
+                for month in (1, 2, 3)
+                for region in ("Bretagne", "Corse")
+                for technology in ("Solar", "Wind")
+            ])
+            session.flush()
+            yield AuctionRepository(session)
+
+    def test_pages_follow_the_key(self, repo):
+        keys, after = [], None
+        while True:
+            page = repo.query_auctions(after=after, limit=5)
+            keys += [(r["auction_date"], r["region"], r["technology"]) for r in page.rows]
+            if page.next_key is None:
+                break
+            assert page.next_key == keys[-1]
+            after = page.next_key
+
+        assert len(keys) == 12
+        assert keys == sorted(keys)
+        assert repo.query_auctions(limit=12).next_key is None
+
+    def test_filters_and_projection(self, repo):
+        page = repo.query_auctions(
+            start=date(2024, 2, 1), regions=["Corse"], technologies=["Wind"],
+            columns=["volume_allocated_mwh"], descending=True
+        )
+        assert page.rows == [
+            {"auction_date": date(2024, 3, 1), "region": "Corse", "technology": "Wind",
+             "volume_allocated_mwh": Decimal(3)},
+            {"auction_date": date(2024, 2, 1), "region": "Corse", "technology": "Wind",
+             "volume_allocated_mwh": Decimal(2)},
+        ]
+
+        (previous,) = repo.query_auctions(
+            after=(date(2024, 2, 1), "Bretagne", "Wind"), descending=True, limit=1
+        ).rows
+        assert (previous["auction_date"], previous["region"], previous["technology"]) == (
+            date(2024, 2, 1), "Bretagne", "Solar"
+        )
+
+    def test_frame_matches_rows(self, repo):
+        frame = repo.fetch_frame(end=date(2024, 2, 1), technologies=["Solar"], columns=["id", "volume_allocated_mwh"])
+
+        assert str(frame["region"].dtype) == "category"
+        assert str(frame["volume_allocated_mwh"].dtype) == "float64"
+        assert str(frame["id"].dtype) == "Int64"
+        assert list(frame["auction_date"].dt.date) == [
+            row["auction_date"] for row in repo.query_auctions(end=date(2024, 2, 1), technologies=["Solar"]).rows
+        ]
+        assert frame["volume_allocated_mwh"].tolist() == [1.0, 1.0, 2.0, 2.0]
+        assert repo.fetch_frame(regions=[]).empty
+
+    def test_date_range_covers_days_past_the_first(self, repo):
+        repo.session.add(Auction(
+            auction_date=date(2024, 3, 17), region="Corse", technology="Solar", source_file="b.xlsx"
+        ))
+        assert repo.get_date_range() == (date(2024, 1, 1), date(2024, 3, 17))
+
+    def test_unknown_column(self, repo):
+        with pytest.raises(ValueError, match="password"):
+            repo.query_auctions(columns=["password"])
+
+
+class TestIngestedFileLookup:
+
+    def test_file_hashes_for_link_set(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(IngestedFileRepository, "LOOKUP_CHUNK_SIZE", 2)
+        with DatabaseConnection(f"sqlite:///{tmp_path / 'db.sqlite'}").session_scope() as session:
+            session.add_all([
+                IngestedFile(filename=f"{name}.xlsx", content_hash=f"h{i % 2}", size_bytes=1)
+                for i, name in enumerate(("a", "b", "c", "d"))
+            ])
+            session.flush()
+            repo = IngestedFileRepository(session)
+
+            names = iter(["a.xlsx", "c.xlsx", "d.xlsx", "new.xlsx", "a.xlsx"])
+            assert repo.get_file_hashes(names) == {"a.xlsx": "h0", "c.xlsx": "h0", "d.xlsx": "h1"}
+            assert repo.get_file_hashes([]) == {}
+            assert len(repo.get_file_hashes()) == 4
+            assert repo.find_content_hashes(["h1", "h2", "h0", "h1"]) == {"h0", "h1"}
+            assert repo.find_content_hashes([]) == set()
+            assert repo.has_files()
+
+    def test_no_files(self, tmp_path):
+        with DatabaseConnection(f"sqlite:///{tmp_path / 'db.sqlite'}").session_scope() as session:
+            assert not IngestedFileRepository(session).has_files()
+
+    def test_sheet_hashes_for_files_and_archive_members(self, tmp_path):
+        with DatabaseConnection(f"sqlite:///{tmp_path / 'db.sqlite'}").session_scope() as session:
+            session.add_all([
+                IngestedSheet(source_file=source_file, sheet_name="Jan", content_hash=source_file)
+                for source_file in ("a.xlsx", "b.xlsx", "h_1.zip!x.xlsx", "hx1.zip!y.xlsx", "h_1.zip")
+            ])
+            session.flush()
+            repo = IngestedFileRepository(session)
+
+            assert repo.get_sheet_hashes(["a.xlsx", "h_1.zip"], ["h_1.zip"]) == {
+                "a.xlsx": {"Jan": "a.xlsx"},
+                "h_1.zip": {"Jan": "h_1.zip"},
+                "h_1.zip!x.xlsx": {"Jan": "h_1.zip!x.xlsx"},
+            }
+            assert repo.get_sheet_hashes([]) == {}
+
+
+class TestRollupTotals:
+
+    @staticmethod
+    def _rollup(month, region, technology, count, allocated, price_sum, priced, price_volume):
+        return AuctionMonthlyRollup(
+            month=month, region=region, technology=technology, record_count=count,
+            volume_offered_mwh=Decimal(allocated), volume_allocated_mwh=Decimal(allocated),
+            price_sum=Decimal(price_sum), priced_count=priced, price_volume_sum=Decimal(price_volume)
+        )
+
+    def test_totals_by_group(self, tmp_path):
+        with DatabaseConnection(f"sqlite:///{tmp_path / 'db.sqlite'}").session_scope() as session:
+            session.add_all([
+                self._rollup(date(2024, 1, 1), "Bretagne", "Solar", 2, 100, 60, 2, 3500),
+                self._rollup(date(2024, 2, 1), "Bretagne", "Solar", 2, 300, 40, 1, 12000),
+                self._rollup(date(2024, 2, 1), "Corse", "Wind", 1, 0, 0, 0, 0),
+            ])
+            session.flush()
+            repo = RollupRepository(session)
+
+            (solar, wind) = repo.get_totals(["technology"])
+            assert solar["technology"] == "Solar"
+            assert solar["record_count"] == 4
+            assert solar["volume_allocated_mwh"] == 400
+            assert solar["avg_price"] == 25
+            assert solar["weighted_avg_price"] == Decimal("38.75")
+            assert wind["weighted_avg_price"] is None
+
+            (february,) = repo.get_totals(start=date(2024, 2, 15), regions=["Bretagne"])
+            assert february["record_count"] == 2
+            assert february["priced_count"] == 1
+            assert repo.get_totals(end=date(2023, 12, 31)) == []
+            assert len(repo.get_rollups(technologies=["Solar"])) == 2
+
+            with pytest.raises(ValueError, match="source_file"):
+                repo.get_totals(["source_file"])
+
+
+class TestScrapeMetrics:
+
+    def test_stage_trend_per_run(self, tmp_path):
+        with DatabaseConnection(f"sqlite:///{tmp_path / 'db.sqlite'}").session_scope() as session:
+            repo = ScrapeLogRepository(session)
+            runs = []
+            for seconds in (1.0, 2.0, 4.0):
+                runs.append(repo.log_scrape("success", 3, metrics=[
+                    StageMetric("download", "stored", "a.xlsx", size_bytes=100, seconds=seconds),
+                    StageMetric("download", "stored", "b.xlsx", size_bytes=50, seconds=seconds / 2),
+                    StageMetric("download", "failed", "c.xlsx", seconds=0.5),
+                    StageMetric("cache", "files_unchanged", items=4),
+                ]))
+            repo.log_scrape("failure", error_message="boom")
+
+            trend = repo.get_stage_trend("download", name="stored")
+            assert [t.scrape_log_id for t in trend] == [run.id for run in runs]
+            assert [(t.entries, t.size_bytes, t.seconds, t.max_seconds) for t in trend] == [
+                (2, 150, 1.5, 1.0), (2, 150, 3.0, 2.0), (2, 150, 6.0, 4.0)
+            ]
+            assert [t.seconds for t in repo.get_stage_trend("download", name="stored", limit=2)] == [3.0, 6.0]
+            assert repo.get_stage_trend("download", since=datetime(2100, 1, 1)) == []
+            assert repo.get_stage_trend("cache")[0].items == 4
+
+            metrics = repo.get_run_metrics(runs[0].id, stage="download")
+            assert [(m.source_file, m.name) for m in metrics] == [
+                ("a.xlsx", "stored"), ("b.xlsx", "stored"), ("c.xlsx", "failed")
+            ]
+            assert len(repo.get_run_metrics(runs[0].id)) == 4
+
+
+class TestRollupRefresh:
+
+    @staticmethod
+    def _statements(session):
+        return [(str(c.args[0]), c.args[1] if len(c.args) > 1 else None) for c in session.execute.call_args_list]
+
+    def test_refresh_recomputes_touched_months(self):
+        session = MagicMock()
+        session.execute.return_value.rowcount = 3
+
+        assert RollupRepository(session).refresh([date(2024, 2, 9), date(2024, 1, 31), date(2024, 2, 1)]) == 3
+        (delete, delete_params), (insert, insert_params) = self._statements(session)
+
+        assert delete == "DELETE FROM auction_monthly_rollups WHERE month = ANY(:months)"
+        assert delete_params["months"] == [date(2024, 1, 1), date(2024, 2, 1)]
+        assert insert.startswith("INSERT INTO auction_monthly_rollups (month, region, technology, record_count")
+        assert (
+            "SELECT months.month, region, technology, count(*), sum(volume_offered_mwh)" in insert
+        )
+        assert (
+            "FROM unnest(CAST(:months AS date[])) AS months(month) JOIN auctions "
+            "ON auction_date >= months.month AND auction_date < months.month + interval '1 month' "
+            "GROUP BY 1, region, technology"
+        ) in insert
+        assert insert_params is delete_params
+        session.commit.assert_called_once()
+
+    def test_refresh_without_months(self):
+        session = MagicMock()
+        assert RollupRepository(session).refresh([]) == 0
+        session.execute.assert_not_called()
+
+    def test_rebuild_replaces_every_month(self):
+        session = MagicMock()
+        session.execute.return_value.rowcount = 7
+
+        assert RollupRepository(session).rebuild() == 7
+        (delete, _), (insert, params) = self._statements(session)
+
+        assert delete == "DELETE FROM auction_monthly_rollups"
+        assert "SELECT date_trunc('month', auction_date)::date, region, technology" in insert
+        assert insert.endswith("FROM auctions GROUP BY 1, region, technology")
+        assert set(params) == {"refreshed_at"}
+        session.commit.assert_called_once()
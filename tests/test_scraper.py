@@ -1,6 +1,18 @@
+import json
 import pytest
+from contextlib import contextmanager
+from datetime import date
+from io import BytesIO
 from unittest.mock import patch, MagicMock
-from src.scraping.scraper import EEXScraper
+from config.settings import settings
+from src.database.repository import UpsertResult
+from src.scraping import scraper as scraper_module
+from src.scraping.scraper import EEXScraper, run_scrape
+from src.scraping.rate_limiter import TokenBucket, HostRateLimiter
+from src.scraping.http_cache import HttpCache, NOT_MODIFIED
+from src.scraping.links import iter_anchors
+from src.storage import BlobStore
+from tests.conftest import auction_workbook
 
 
 class TestEEXScraper:
@@ -71,6 +83,27 @@ class TestEEXScraper:
         links = scraper.find_excel_links(html)
         assert len(links) == 1
 
+    def test_find_excel_links_zip_needs_download_text(self):
+        scraper = EEXScraper()
+        html = '''
+        <a href="/files/history.zip"><span>Download</span> archive</a>
+        <a href="/files/other.zip">Archive</a>
+        <a href="/files/UPPER.ZIP">Download</a>
+        '''
+        links = scraper.find_excel_links(html)
+        assert [l[1] for l in links] == ["history.zip"]
+
+    def test_find_excel_links_ignores_anchor_without_href(self):
+        scraper = EEXScraper()
+        html = '<a name="data.xlsx">Download data.xlsx</a>'
+        assert scraper.find_excel_links(html) == []
+
+    def test_find_excel_links_unescapes_entities(self):
+        scraper = EEXScraper()
+        html = '<a href="/get?id=1&amp;file=data.xlsx">Data</a>'
+        links = scraper.find_excel_links(html)
+        assert links[0][0].endswith("/get?id=1&file=data.xlsx")
+
     @patch("src.scraping.scraper.requests.Session.get")
     def test_fetch_page_success(self, mock_get):
         mock_response = MagicMock()
@@ -94,26 +127,283 @@ class TestEEXScraper:
         assert result is None
 
     @patch("src.scraping.scraper.requests.Session.get")
-    @patch("src.scraping.scraper.time.sleep")
-    def test_download_file_success(self, mock_sleep, mock_get):
-        mock_response = MagicMock()
-        mock_response.content = b"file content"
-        mock_response.raise_for_status = MagicMock()
+    def test_fetch_page_not_modified(self, mock_get, tmp_path):
+        cache = HttpCache(str(tmp_path / "cache.json"))
+        first = MagicMock(status_code=200, text="<html></html>", headers={"ETag": '"v1"'})
+        second = MagicMock(status_code=304)
+        mock_get.side_effect = [first, second]
+
+        scraper = EEXScraper(rate_limiter=MagicMock(), http_cache=cache)
+        assert scraper.fetch_page() == "<html></html>"
+        assert scraper.fetch_page() is NOT_MODIFIED
+        assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+        mock_get.side_effect = [first]
+        assert scraper.fetch_page(conditional=False) == "<html></html>"
+        assert mock_get.call_args.kwargs["headers"] == {}
+
+    @patch("src.scraping.scraper.requests.Session.get")
+    def test_download_file_success(self, mock_get):
+        mock_response = MagicMock(status_code=200, headers={})
+        mock_response.iter_content.return_value = [b"file ", b"content"]
         mock_get.return_value = mock_response
 
-        scraper = EEXScraper()
+        limiter = MagicMock()
+        scraper = EEXScraper(rate_limiter=limiter)
         result = scraper.download_file("https://example.com/file.xlsx")
 
-        assert result == b"file content"
-        mock_sleep.assert_called_once()
+        assert result.read() == b"file content"
+        assert mock_get.call_args.kwargs["stream"] is True
+        limiter.acquire.assert_called_once_with("https://example.com/file.xlsx")
+        mock_response.close.assert_called_once()
 
+    @patch("src.scraping.scraper.settings.MAX_DOWNLOAD_BYTES", 8)
     @patch("src.scraping.scraper.requests.Session.get")
-    @patch("src.scraping.scraper.time.sleep")
-    def test_download_file_failure(self, mock_sleep, mock_get):
+    def test_download_file_rejects_large_content_length(self, mock_get):
+        mock_response = MagicMock(status_code=200, headers={"Content-Length": "100"})
+        mock_get.return_value = mock_response
+
+        scraper = EEXScraper(rate_limiter=MagicMock())
+        assert scraper.download_file("https://example.com/file.xlsx") is None
+        mock_response.iter_content.assert_not_called()
+
+    @patch("src.scraping.scraper.settings.MAX_DOWNLOAD_BYTES", 8)
+    @patch("src.scraping.scraper.requests.Session.get")
+    def test_download_file_aborts_oversized_stream(self, mock_get):
+        mock_response = MagicMock(status_code=200, headers={})
+        mock_response.iter_content.return_value = [b"12345", b"67890"]
+        mock_get.return_value = mock_response
+
+        scraper = EEXScraper(rate_limiter=MagicMock())
+        assert scraper.download_file("https://example.com/file.xlsx") is None
+
+    @patch("src.scraping.scraper.requests.Session.get")
+    def test_download_file_failure(self, mock_get):
         import requests
         mock_get.side_effect = requests.RequestException("Download failed")
 
-        scraper = EEXScraper()
+        scraper = EEXScraper(rate_limiter=MagicMock())
         result = scraper.download_file("https://example.com/file.xlsx")
 
-        assert result is None
\ No newline at end of file
+        assert result is None
+
+
+class TestRunScrape:
+
+    @pytest.fixture
+    def repos(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "HTTP_CACHE_PATH", str(tmp_path / "http_cache.json"))
+        monkeypatch.setattr(settings, "LAYOUT_CACHE_PATH", str(tmp_path / "layouts.json"))
+        monkeypatch.setattr(settings, "RAW_STORE_DIR", str(tmp_path / "raw"))
+
+        @contextmanager
+        def session_scope():
+            yield MagicMock()
+
+        db = MagicMock(session_scope=session_scope)
+        monkeypatch.setattr(scraper_module, "DatabaseConnection", lambda: db)
+        repos = {"db": db}
+        for name in ("AuctionRepository", "IngestedFileRepository", "RollupRepository", "ScrapeLogRepository"):
+            repos[name] = MagicMock()
+            monkeypatch.setattr(scraper_module, name, repos[name])
+        repos["IngestedFileRepository"].return_value.get_file_hashes.return_value = {}
+        repos["IngestedFileRepository"].return_value.find_content_hashes.return_value = set()
+        repos["IngestedFileRepository"].return_value.get_sheet_hashes.return_value = {}
+        repos["AuctionRepository"].return_value.upsert_auctions.side_effect = (
+            lambda records, update_existing=False: UpsertResult(len(records))
+        )
+
+        page = MagicMock()
+        page.return_value.fetch_page.return_value = '<a href="/files/jan.xlsx">jan</a>'
+        page.return_value.find_excel_links.return_value = [("http://x/files/jan.xlsx", "jan.xlsx")]
+        page.return_value.base_url = "http://x/page"
+        monkeypatch.setattr(scraper_module, "EEXScraper", page)
+        repos["scraper"] = page.return_value
+        return repos
+
+    @staticmethod
+    def _serve(repos, content: bytes, filename="jan.xlsx"):
+        repos["scraper"].find_excel_links.return_value = [(f"http://x/files/{filename}", filename)]
+        repos["scraper"].download_file.side_effect = lambda url, conditional=True: BytesIO(content)
+
+    @staticmethod
+    def _known(repos, hashes):
+        repos["IngestedFileRepository"].return_value.get_file_hashes.return_value = hashes
+
+    def test_partitions_are_checked_on_every_run(self, repos):
+        self._serve(repos, auction_workbook("January 2024"))
+        self._known(repos, {"jan.xlsx": "h"})
+
+        run_scrape()
+        run_scrape()
+
+        assert repos["db"].ensure_partitions.call_count == 2
+
+    def test_empty_database_fetches_the_page_unconditionally(self, repos):
+        repos["IngestedFileRepository"].return_value.has_files.return_value = False
+        self._serve(repos, auction_workbook("January 2024"))
+        run_scrape()
+        assert repos["scraper"].fetch_page.call_args.kwargs == {"conditional": False}
+
+    def test_processed_file_without_validators_is_not_downloaded(self, repos):
+        self._serve(repos, auction_workbook("January 2024"))
+        self._known(repos, {"jan.xlsx": "h"})
+
+        run_scrape()
+
+        repos["scraper"].download_file.assert_not_called()
+        repos["AuctionRepository"].return_value.upsert_auctions.assert_not_called()
+
+    def test_same_name_with_new_content_is_reprocessed(self, repos):
+        with open(settings.HTTP_CACHE_PATH, "w") as f:
+            json.dump({"http://x/files/jan.xlsx": {"etag": '"v1"', "last_modified": None}}, f)
+        content = auction_workbook("January 2024")
+        self._serve(repos, content)
+        self._known(repos, {"jan.xlsx": "old"})
+
+        run_scrape()
+
+        get_sheet_hashes = repos["IngestedFileRepository"].return_value.get_sheet_hashes
+        assert [list(arg) for arg in get_sheet_hashes.call_args.args] == [["jan.xlsx"], []]
+        (records,), kwargs = repos["AuctionRepository"].return_value.upsert_auctions.call_args
+        assert len(records) == 2
+        assert kwargs == {"update_existing": True}
+        record_file = repos["IngestedFileRepository"].return_value.record_file
+        assert record_file.call_args.args[:4] == ("jan.xlsx", BlobStore.digest(content), len(content), 2)
+
+    def test_new_name_with_known_content_is_not_parsed(self, repos):
+        content = auction_workbook("January 2024")
+        self._serve(repos, content, "jan-copy.xlsx")
+        repos["IngestedFileRepository"].return_value.find_content_hashes.return_value = {BlobStore.digest(content)}
+
+        run_scrape()
+
+        repos["AuctionRepository"].return_value.upsert_auctions.assert_not_called()
+        record_file = repos["IngestedFileRepository"].return_value.record_file
+        assert record_file.call_args.args[:4] == ("jan-copy.xlsx", BlobStore.digest(content), len(content), 0)
+        log = repos["ScrapeLogRepository"].return_value.log_scrape.call_args.kwargs
+        assert ("cache", "files_duplicate", 1) in [(m.stage, m.name, m.items) for m in log["metrics"]]
+
+    def test_failed_run_refreshes_rollups_of_written_batches(self, repos, monkeypatch):
+        class FailingPipeline:
+            def __init__(self, *args, **kwargs):
+                self.affected_months = set()
+
+            def run(self, links):
+                self.affected_months.add(date(2024, 1, 1))
+                raise RuntimeError("parser crashed")
+
+        monkeypatch.setattr(scraper_module, "ScrapePipeline", FailingPipeline)
+
+        with pytest.raises(RuntimeError, match="parser crashed"):
+            run_scrape()
+
+        repos["RollupRepository"].return_value.refresh.assert_called_once_with({date(2024, 1, 1)})
+        log = repos["ScrapeLogRepository"].return_value.log_scrape
+        assert log.call_args.kwargs["status"] == "failure"
+        assert [m.stage for m in log.call_args.kwargs["metrics"]] == ["page", "rollup", "run"]
+
+
+class TestIterAnchors:
+
+    def test_text_spans_nested_elements(self):
+        html = '<a href="/x.zip">Down<b>load</b> <i> pack </i></a>'
+        assert list(iter_anchors(html)) == [("/x.zip", "Downloadpack")]
+
+    def test_chunked_input(self):
+        html = '<p><a href="/a.xlsx">A</a></p><a href="/b.zip">B</a>'
+        chunks = [html[i:i + 5] for i in range(0, len(html), 5)]
+        assert list(iter_anchors(chunks)) == [("/a.xlsx", "A"), ("/b.zip", "B")]
+
+    def test_document_order_with_nested_anchors(self):
+        html = '<a href="/outer">x<a href="/inner">y</a>z</a>'
+        assert [href for href, _ in iter_anchors(html)] == ["/outer", "/inner"]
+
+    def test_unclosed_anchor_is_flushed(self):
+        assert list(iter_anchors('<a href="/a.xlsx">tail')) == [("/a.xlsx", "tail")]
+
+    def test_text_skipped_when_not_needed(self):
+        html = '<a href="/a.xlsx">A</a><a href="/b.zip">B</a>'
+        anchors = list(iter_anchors(html, needs_text=lambda href: href.endswith(".zip")))
+        assert anchors == [("/a.xlsx", ""), ("/b.zip", "B")]
+
+
+class TestRateLimiter:
+
+    def test_bucket_allows_burst_without_waiting(self):
+        bucket = TokenBucket(rate=1.0, capacity=3)
+        with patch("src.scraping.rate_limiter.time.sleep") as mock_sleep:
+            for _ in range(3):
+                bucket.acquire()
+        mock_sleep.assert_not_called()
+
+    def test_bucket_waits_when_empty(self):
+        bucket = TokenBucket(rate=1000.0, capacity=1)
+        bucket.acquire()
+        with patch("src.scraping.rate_limiter.time.sleep") as mock_sleep:
+            with patch("src.scraping.rate_limiter.time.monotonic", side_effect=[bucket._updated, bucket._updated + 1]):
+                bucket.acquire()
+        mock_sleep.assert_called_once()
+
+    def test_bucket_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0, capacity=1)
+        with patch("src.scraping.rate_limiter.time.sleep") as mock_sleep:
+            for _ in range(10):
+                bucket.acquire()
+        mock_sleep.assert_not_called()
+
+    def test_limiter_keeps_one_bucket_per_host(self):
+        limiter = HostRateLimiter(rate=1.0, burst=1)
+        limiter.acquire("https://a.example.com/x.xlsx")
+        limiter.acquire("https://b.example.com/y.xlsx")
+        assert set(limiter._buckets) == {"a.example.com", "b.example.com"}
+
+
+class TestHttpCache:
+
+    def _response(self, etag=None, last_modified=None):
+        headers = {}
+        if etag:
+            headers["ETag"] = etag
+        if last_modified:
+            headers["Last-Modified"] = last_modified
+        return MagicMock(headers=headers)
+
+    def test_conditional_headers_unknown_url(self, tmp_path):
+        cache = HttpCache(str(tmp_path / "cache.json"))
+        assert cache.conditional_headers("https://example.com/a") == {}
+
+    def test_conditional_headers_from_validators(self, tmp_path):
+        cache = HttpCache(str(tmp_path / "cache.json"))
+        cache.update("https://example.com/a", self._response('"abc"', "Mon, 01 Jan 2024 00:00:00 GMT"))
+        assert cache.conditional_headers("https://example.com/a") == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+        }
+
+    def test_response_without_validators_drops_entry(self, tmp_path):
+        cache = HttpCache(str(tmp_path / "cache.json"))
+        cache.update("https://example.com/a", self._response('"abc"'))
+        cache.update("https://example.com/a", self._response())
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = HttpCache(str(tmp_path / "cache.json"), max_entries=2)
+        cache.update("a", self._response('"1"'))
+        cache.update("b", self._response('"2"'))
+        cache.conditional_headers("a")
+        cache.update("c", self._response('"3"'))
+        assert cache.conditional_headers("b") == {}
+        assert cache.conditional_headers("a") != {}
+
+    def test_save_and_reload(self, tmp_path):
+        path = str(tmp_path / "nested" / "cache.json")
+        cache = HttpCache(path)
+        cache.update("https://example.com/a", self._response('"abc"'))
+        cache.save()
+        assert HttpCache(path).conditional_headers("https://example.com/a") == {"If-None-Match": '"abc"'}
+
+    def test_corrupt_file_is_ignored(self, tmp_path):
+        path = tmp_path / "cache.json"
+        path.write_text("not json")
+        assert len(HttpCache(str(path))) == 0
@@ -0,0 +1,159 @@
+import zipfile
+from io import BytesIO
+
+import openpyxl
+
+from src.scraping.parser import AuctionParser
+from src.scraping.sheets import SheetTracker, known_sheets_for, sheet_digest, workbook_digest
+from tests.conftest import HEADER, priced_workbook
+
+
+def _shared_string_workbook(sheets) -> bytes:
+    """Build an xlsx whose text cells use the shared string table, as Excel writes them."""
+    strings = []
+    parts = {}
+    for number, (title, rows) in enumerate(sheets.items(), 1):
+        cells = []
+        for r, row in enumerate(rows, 1):
+            row_cells = []
+            for c, value in enumerate(row):
+                ref = f"{'ABCD'[c]}{r}"
+                if isinstance(value, str):
+                    if value not in strings:
+                        strings.append(value)
+                    row_cells.append(f'<c r="{ref}" t="s"><v>{strings.index(value)}</v></c>')
+                else:
+                    row_cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+            cells.append(f'<row r="{r}">{"".join(row_cells)}</row>')
+        parts[f"xl/worksheets/sheet{number}.xml"] = f'<worksheet xmlns="{MAIN}"><sheetData>{"".join(cells)}</sheetData></worksheet>'
+
+    names = list(sheets)
+    parts["xl/sharedStrings.xml"] = f'<sst xmlns="{MAIN}">' + "".join(f"<si><t>{s}</t></si>" for s in strings) + "</sst>"
+    parts["xl/workbook.xml"] = (
+        f'<workbook xmlns="{MAIN}" xmlns:r="{REL}"><sheets>'
+        + "".join(f'<sheet name="{n}" sheetId="{i}" r:id="rId{i}"/>' for i, n in enumerate(names, 1))
+        + "</sheets></workbook>"
+    )
+    parts["xl/_rels/workbook.xml.rels"] = (
+        f'<Relationships xmlns="{PKG_REL}">'
+        + "".join(f'<Relationship Id="rId{i}" Type="{REL}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                  for i in range(1, len(names) + 1))
+        + f'<Relationship Id="rIdS" Type="{REL}/sharedStrings" Target="sharedStrings.xml"/></Relationships>'
+    )
+    parts["_rels/.rels"] = (
+        f'<Relationships xmlns="{PKG_REL}"><Relationship Id="rId1" Type="{REL}/officeDocument" '
+        'Target="xl/workbook.xml"/></Relationships>'
+    )
+    parts["[Content_Types].xml"] = (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        + "".join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                  'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                  for i in range(1, len(names) + 1))
+        + '<Override PartName="/xl/sharedStrings.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>'
+    )
+
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        for name, xml in parts.items():
+            archive.writestr(name, xml)
+    return buf.getvalue()
+
+
+MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+
+def _digests(content: bytes) -> dict:
+    wb = openpyxl.load_workbook(BytesIO(content), read_only=True)
+    try:
+        shared = workbook_digest(wb)
+        return {sheet.title: sheet_digest(wb, sheet, shared) for sheet in wb.worksheets}
+    finally:
+        wb.close()
+
+
+class TestSheetDigest:
+
+    def test_only_edited_sheet_changes(self):
+        before = _digests(priced_workbook({"January 2024": 50.5, "February 2024": 51}))
+        after = _digests(priced_workbook({"January 2024": 50.5, "February 2024": 52}))
+
+        assert before["January 2024"] == after["January 2024"]
+        assert before["February 2024"] != after["February 2024"]
+
+    def test_same_content_under_another_title_differs(self):
+        jan = _digests(priced_workbook({"January 2024": 50.5}))
+        feb = _digests(priced_workbook({"February 2024": 50.5}))
+        assert jan["January 2024"] != feb["February 2024"]
+
+    def test_strings_added_to_another_sheet_keep_the_digest(self):
+        jan = [HEADER, ["Bretagne", 100, 80, 50.5]]
+        before = _digests(_shared_string_workbook({"January 2024": jan, "February 2024": [HEADER]}))
+        after = _digests(_shared_string_workbook({
+            "January 2024": jan, "February 2024": [HEADER, ["Normandie", 1, 1, 1]]
+        }))
+
+        assert before["January 2024"] is not None
+        assert before["January 2024"] == after["January 2024"]
+        assert before["February 2024"] != after["February 2024"]
+
+    def test_referenced_shared_string_change_changes_the_digest(self):
+        before = _digests(_shared_string_workbook({"January 2024": [HEADER, ["Bretagne", 100, 80, 50.5]]}))
+        after = _digests(_shared_string_workbook({"January 2024": [HEADER, ["Normandie", 100, 80, 50.5]]}))
+        assert before["January 2024"] != after["January 2024"]
+
+    def test_unavailable_without_archive(self):
+        wb = openpyxl.Workbook()
+        assert workbook_digest(wb) is None
+        assert sheet_digest(wb, wb.active, None) is None
+
+
+class TestSheetTracker:
+
+    def test_skips_known_and_records_changed(self):
+        tracker = SheetTracker({"a.xlsx": {"Jan": "h1", "Feb": "h2"}})
+
+        assert not tracker.should_parse("a.xlsx", "Jan", "h1")
+        assert tracker.should_parse("a.xlsx", "Feb", "h3")
+        assert tracker.should_parse("a.xlsx", "Mar", None)
+        assert tracker.skipped == 1
+        assert tracker.changed == {"a.xlsx": {"Feb": "h3"}}
+
+    def test_merge(self):
+        tracker, other = SheetTracker(), SheetTracker()
+        other.should_parse("a.zip!b.xlsx", "Jan", "h1")
+        other.skipped = 2
+        other.count_rows("a.zip!b.xlsx", "Jan", 3)
+        tracker.count_rows("a.zip!b.xlsx", "Jan", 1)
+        tracker.merge(other)
+        assert tracker.changed == {"a.zip!b.xlsx": {"Jan": "h1"}}
+        assert tracker.skipped == 2
+        assert tracker.rows == {"a.zip!b.xlsx": {"Jan": 4}}
+
+    def test_known_sheets_for_archive_members(self):
+        hashes = {"a.zip": {}, "a.zip!b.xlsx": {"Jan": "h1"}, "a.zip.xlsx": {"Jan": "h2"}}
+        assert known_sheets_for(hashes, "a.zip") == {"a.zip": {}, "a.zip!b.xlsx": {"Jan": "h1"}}
+
+
+class TestParserWithTracker:
+
+    def test_unchanged_sheets_are_not_parsed(self):
+        original = priced_workbook({"January 2024": 50.5, "February 2024": 51})
+        tracker = SheetTracker()
+        assert len(AuctionParser("a.xlsx", sheets=tracker).parse_excel(original)) == 2
+        assert tracker.rows == {"a.xlsx": {"January 2024": 1, "February 2024": 1}}
+
+        corrected = priced_workbook({"January 2024": 50.5, "February 2024": 52})
+        rerun = SheetTracker(tracker.changed)
+        records = AuctionParser("a.xlsx", sheets=rerun).parse_excel(corrected)
+
+        assert [r["weighted_avg_price_eur"] for r in records] == [52]
+        assert rerun.skipped == 1
+        assert list(rerun.changed["a.xlsx"]) == ["February 2024"]
+        assert rerun.rows == {"a.xlsx": {"February 2024": 1}}